@@ -4,7 +4,6 @@ MSA hyper dimensional data file
 
 # Standard library modules.
 import os
-import threading
 
 # Third party modules.
 
@@ -36,8 +35,6 @@ class DataFile(object):
         :arg language: language of the data file (default and recommended
             language is ``en-US``)
         """
-        self._lock = threading.Lock()
-
         if filepath is not None:
             filepath = os.path.splitext(filepath)[0] + '.hmsa'
         self._filepath = filepath
@@ -144,8 +141,7 @@ class DataFile(object):
     @language.setter
     def language(self, language):
         validate_language_tag(language)
-        with self._lock:
-            self._language = language
+        self._language = language
 
     @property
     def filepath(self):
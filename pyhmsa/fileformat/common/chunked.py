@@ -0,0 +1,277 @@
+"""
+Common constants, functions and classes for chunked directory stores.
+
+A store is a directory with an ``index.json`` file and, for each datum, a
+subdirectory with one file per chunk. Chunks are blocks of the datum with a
+fixed shape (smaller at the edges), saved in C order as little-endian values,
+either raw or compressed with zlib.
+"""
+
+# Standard library modules.
+import os
+import json
+import zlib
+import itertools
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.fileformat.common.metadata import parse_metadata, resolve_class
+
+# Globals and constants variables.
+
+CHUNKED_COMPRESSION_RAW = 'raw'
+CHUNKED_COMPRESSION_ZLIB = 'zlib'
+
+_COMPRESSIONS = frozenset([CHUNKED_COMPRESSION_RAW, CHUNKED_COMPRESSION_ZLIB])
+
+CHUNKED_INDEX_FILENAME = 'index.json'
+CHUNKED_VERSION = 1
+
+def validate_compression(compression):
+    if compression not in _COMPRESSIONS:
+        raise ValueError('Unknown compression: %s' % compression)
+
+def get_chunk_shape(shape, chunks):
+    """
+    Returns the shape of the chunks of an array. *chunks* gives the size of
+    the chunks along the first axes; remaining axes are not divided.
+    """
+    chunks = tuple(chunks)[:len(shape)]
+    if any(size <= 0 for size in chunks):
+        raise ValueError('Chunk size must be greater than 0')
+    return tuple(min(size, length) if length else 1
+                 for size, length in zip(chunks, shape)) + \
+        tuple(shape[len(chunks):])
+
+def iter_chunks(shape, chunk_shape):
+    """
+    Yields the grid index and the slices of the chunks covering an array.
+    """
+    ranges = [range(0, length, size) for length, size in zip(shape, chunk_shape)]
+    for starts in itertools.product(*ranges):
+        index = tuple(start // size for start, size in zip(starts, chunk_shape))
+        slices = tuple(slice(start, min(start + size, length))
+                       for start, size, length in zip(starts, chunk_shape, shape))
+        yield index, slices
+
+def get_chunk_filename(index):
+    return '.'.join(map(str, index)) or '0'
+
+def write_chunk(filepath, values, compression):
+    """
+    Writes the values of a chunk. Returns the number of bytes written.
+    """
+    values = np.ascontiguousarray(values, values.dtype.newbyteorder('<'))
+    buffer = memoryview(values).cast('B')
+    if compression == CHUNKED_COMPRESSION_ZLIB:
+        buffer = zlib.compress(buffer)
+
+    with open(filepath, 'wb') as fp:
+        fp.write(buffer)
+
+    return values.nbytes
+
+def read_chunk(filepath, shape, dtype, compression):
+    """
+    Reads the values of a chunk.
+    """
+    with open(filepath, 'rb') as fp:
+        buffer = fp.read()
+
+    if compression == CHUNKED_COMPRESSION_ZLIB:
+        buffer = zlib.decompress(buffer)
+
+    return np.frombuffer(buffer, dtype).reshape(shape)
+
+class ChunkedDatum(object):
+
+    def __init__(self, dirpath, entry, conditions):
+        """
+        Lazy read-only view on a datum of a chunked store.
+        Indexing with integers and slices only reads the chunks that
+        intersect the selection, e.g. ``datum[10:20, 5, :]``.
+        Use :meth:`todatum` to read all the values.
+        """
+        self._dirpath = dirpath
+        self._clasz = resolve_class(entry['class'])
+        self._shape = tuple(entry['shape'])
+        self._dtype = np.dtype(entry['dtype'])
+        self._chunk_shape = tuple(entry['chunks'])
+        self._compression = entry['compression']
+        self._conditions = conditions
+
+        validate_compression(self._compression)
+
+    def __len__(self):
+        return self._shape[0]
+
+    def __getitem__(self, key):
+        key = self._expand_key(key)
+
+        # Bounding box of the selection
+        bounds = []
+        for index, length in zip(key, self._shape):
+            indices = range(length)[index]
+            if isinstance(index, slice) and len(indices) == 0:
+                shape = tuple(len(range(length)[index])
+                              for index, length in zip(key, self._shape)
+                              if isinstance(index, slice))
+                return np.empty(shape, self._dtype)
+            if isinstance(index, slice):
+                bounds.append((min(indices[0], indices[-1]),
+                               max(indices[0], indices[-1]) + 1))
+            else:
+                bounds.append((index, index + 1))
+
+        values = self._read_region(bounds)
+
+        # Selection relative to the bounding box
+        relkey = []
+        for index, (lower, _upper), length in zip(key, bounds, self._shape):
+            if isinstance(index, slice):
+                start, stop, step = index.indices(length)
+                stop -= lower
+                relkey.append(slice(start - lower,
+                                    stop if stop >= 0 else None, step))
+            else:
+                relkey.append(index - lower)
+
+        return values[tuple(relkey)]
+
+    def _expand_key(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+
+        if any(index is Ellipsis for index in key):
+            position = key.index(Ellipsis)
+            missing = len(self._shape) - len(key) + 1
+            key = key[:position] + (slice(None),) * missing + key[position + 1:]
+
+        if len(key) > len(self._shape):
+            raise IndexError('Too many indices')
+        key = key + (slice(None),) * (len(self._shape) - len(key))
+
+        expanded = []
+        for index, length in zip(key, self._shape):
+            if isinstance(index, slice):
+                expanded.append(index)
+            elif isinstance(index, (int, np.integer)):
+                if index < -length or index >= length:
+                    raise IndexError('Index out of range: %i' % index)
+                expanded.append(int(index) % length)
+            else:
+                raise IndexError('Only integers and slices are supported')
+
+        return tuple(expanded)
+
+    def _read_region(self, bounds):
+        shape = tuple(upper - lower for lower, upper in bounds)
+        values = np.empty(shape, self._dtype)
+
+        ranges = [range(lower // size, (upper - 1) // size + 1)
+                  for (lower, upper), size in zip(bounds, self._chunk_shape)]
+        for index in itertools.product(*ranges):
+            chunk = self.read_chunk(index)
+
+            src = []
+            dst = []
+            for i, (lower, upper), size in \
+                    zip(index, bounds, self._chunk_shape):
+                start = i * size
+                stop = start + size
+                src.append(slice(max(lower, start) - start,
+                                 min(upper, stop) - start))
+                dst.append(slice(max(lower, start) - lower,
+                                 min(upper, stop) - lower))
+
+            values[tuple(dst)] = chunk[tuple(src)]
+
+        return values
+
+    def read_chunk(self, index):
+        """
+        Returns the values of a chunk from its grid index.
+        """
+        shape = tuple(min(size, length - i * size) for i, size, length in
+                      zip(index, self._chunk_shape, self._shape))
+        filepath = os.path.join(self._dirpath, get_chunk_filename(index))
+        return read_chunk(filepath, shape, self._dtype.newbyteorder('<'),
+                          self._compression).astype(self._dtype, copy=False)
+
+    def todatum(self):
+        """
+        Reads all values and returns a datum.
+        """
+        values = self[...]
+        datum = np.array(values, copy=True).view(self._clasz)
+        datum.conditions.update(self._conditions)
+        return datum
+
+    @property
+    def shape(self):
+        return self._shape
+
+    @property
+    def dtype(self):
+        return self._dtype
+
+    @property
+    def chunk_shape(self):
+        return self._chunk_shape
+
+    @property
+    def clasz(self):
+        return self._clasz
+
+    @property
+    def conditions(self):
+        return self._conditions
+
+class ChunkedStore(object):
+
+    def __init__(self, dirpath):
+        """
+        Random access to the datums of a chunked store.
+
+        :arg dirpath: location of the store directory
+        """
+        index_filepath = os.path.join(dirpath, CHUNKED_INDEX_FILENAME)
+        with open(index_filepath, 'r') as fp:
+            index = json.load(fp)
+
+        if index.get('version') != CHUNKED_VERSION:
+            raise IOError('Unsupported chunked store version: %s' % \
+                          index.get('version'))
+
+        for entry in index['data']:
+            try:
+                resolve_class(entry['class'])
+            except ValueError as ex:
+                raise IOError(str(ex))
+
+        self._dirpath = dirpath
+        self._datafile = parse_metadata(index['metadata'].encode('utf-8'))
+        self._entries = dict((entry['key'], entry) for entry in index['data'])
+
+    def keys(self):
+        """
+        Returns the identifiers of the datums, without reading them.
+        """
+        return self._entries.keys()
+
+    def __getitem__(self, key):
+        entry = self._entries[key]
+        conditions = dict((identifier, self._datafile.conditions[identifier])
+                          for identifier in entry['conditions'])
+        return ChunkedDatum(os.path.join(self._dirpath, entry['path']),
+                            entry, conditions)
+
+    @property
+    def header(self):
+        return self._datafile.header
+
+    @property
+    def conditions(self):
+        return self._datafile.conditions
@@ -3,8 +3,10 @@ Common constants and functions for EMSA.
 """
 
 # Standard library modules.
+import re
 
 # Third party modules.
+import numpy as np
 
 # Local modules.
 
@@ -24,13 +26,22 @@ EMSA_EDS_DETECTOR_SDUTW = 'SDUTW' # SDD with Ultra Thin Window (from DTSA-II)
 EMSA_EDS_DETECTOR_SDWLS = 'SDWLS' # SDD Windowless (from DTSA-II)
 EMSA_EDS_DETECTOR_UCALUTW = 'UCALUTW' # Micro-calorimeter with Ultra Thin Window (from DTSA-II)
 
-def calculate_checksum(lines):
-    checksum = 0
-
-    for line in lines:
-        if line.startswith('#CHECKSUM'):
-            continue
-        for character in line:
-            checksum += ord(character)
+_CHECKSUM_LINE_PATTERN = re.compile(br'^#CHECKSUM[^\n]*(\n|$)', re.MULTILINE)
 
-    return checksum
+def calculate_checksum(lines):
+    """
+    Returns the sum of the character codes, excluding the lines starting with
+    ``#CHECKSUM``.
+
+    :arg lines: either an iterable of lines or the raw content of a file
+        as bytes
+    """
+    if isinstance(lines, (bytes, bytearray)):
+        buffer = _CHECKSUM_LINE_PATTERN.sub(b'', bytes(lines))
+        values = np.frombuffer(buffer, np.uint8)
+    else:
+        text = ''.join(line for line in lines \
+                       if not line.startswith('#CHECKSUM'))
+        values = np.frombuffer(text.encode('utf-32-le'), np.uint32)
+
+    return int(values.sum(dtype=np.uint64))
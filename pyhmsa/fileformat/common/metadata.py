@@ -0,0 +1,94 @@
+"""
+Common functions to transport the header and conditions of a data file
+without its datums.
+"""
+
+# Standard library modules.
+import xml.etree.ElementTree as etree
+
+# Third party modules.
+
+# Local modules.
+from pyhmsa.datafile import DataFile
+from pyhmsa.fileformat.datafile import \
+    _DataFileReaderMixin, _DataFileWriterMixin
+from pyhmsa.spec.datum.datum import _Datum
+from pyhmsa.spec.datum.analysis import Analysis0D, Analysis1D, Analysis2D
+from pyhmsa.spec.datum.analysislist import \
+    AnalysisList0D, AnalysisList1D, AnalysisList2D
+from pyhmsa.spec.datum.imageraster import \
+    ImageRaster2D, ImageRaster2DSpectral, ImageRaster2DHyperimage
+
+# Globals and constants variables.
+
+_DATUM_CLASSES = (Analysis0D, Analysis1D, Analysis2D,
+                  AnalysisList0D, AnalysisList1D, AnalysisList2D,
+                  ImageRaster2D, ImageRaster2DSpectral, ImageRaster2DHyperimage)
+
+def _create_class_lookup():
+    # Classes are only resolved from this lookup, never imported, since
+    # class paths are read from files
+    lookup = {}
+    for clasz in _DATUM_CLASSES:
+        lookup['%s:%s' % (clasz.__module__, clasz.__name__)] = clasz
+        lookup['%s/%s' % (clasz.TEMPLATE, clasz.CLASS)] = clasz
+    return lookup
+
+_CLASS_LOOKUP = _create_class_lookup()
+
+class _MetadataHandler(_DataFileReaderMixin, _DataFileWriterMixin):
+    # Header and conditions are read and written as in data files
+
+    def _update_status(self, progress, status):
+        pass
+
+    def is_cancelled(self):
+        return False
+
+def convert_metadata(datafile):
+    """
+    Returns the header and conditions of a data file as XML bytes.
+    """
+    root = etree.Element('MSAHyperDimensionalDataFile')
+    root.set('Version', datafile.version)
+    root.set('{http://www.w3.org/XML/1998/namespace}lang', datafile.language)
+
+    handler = _MetadataHandler()
+    handler._write_header(datafile, root)
+    handler._write_conditions(datafile, root)
+
+    return etree.tostring(root, encoding='UTF-8')
+
+def parse_metadata(xml):
+    """
+    Returns a data file without datums from XML bytes created by
+    :func:`convert_metadata`.
+    """
+    root = etree.fromstring(xml)
+
+    datafile = DataFile(version=root.attrib['Version'])
+
+    handler = _MetadataHandler()
+    handler._read_root(datafile, root)
+    handler._read_header(datafile, root)
+    handler._read_conditions(datafile, root)
+
+    return datafile
+
+def get_class_path(obj):
+    """
+    Returns the ``module:Class`` path of the class of an object.
+    """
+    return '%s:%s' % (type(obj).__module__, type(obj).__name__)
+
+def resolve_class(path):
+    """
+    Returns the datum class from a ``module:Class`` path, or from its
+    ``TEMPLATE/CLASS`` name (e.g. ``ImageRaster/2D/Spectral``).
+    Only the datum classes of the HMSA specification are resolved; no
+    module is imported.
+    """
+    clasz = _CLASS_LOOKUP.get(path)
+    if clasz is None or not issubclass(clasz, _Datum):
+        raise ValueError('Unknown datum class: %s' % path)
+    return clasz
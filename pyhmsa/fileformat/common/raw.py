@@ -0,0 +1,78 @@
+"""
+Common constants and functions for RAW/RPL.
+"""
+
+# Standard library modules.
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Globals and constants variables.
+
+RAW_RECORD_BY_VECTOR = 'vector' # Channels of a pixel are contiguous
+RAW_RECORD_BY_IMAGE = 'image' # Pixels of a channel are contiguous
+RAW_RECORD_BY_DONT_CARE = 'dont-care' # Only one channel
+
+_RECORD_BYS = frozenset([RAW_RECORD_BY_VECTOR, RAW_RECORD_BY_IMAGE,
+                         RAW_RECORD_BY_DONT_CARE])
+
+CHUNK_SIZE = 64 * 1024 * 1024 # bytes
+
+def convert_record_by(src, dst, depth, src_record_by, dst_record_by,
+                      chunk_size=CHUNK_SIZE, callback=None):
+    """
+    Copies the values of *src* into *dst* while changing the ordering of the
+    records. Both arrays are flat and contain ``pixel count * depth`` values.
+    They can be memory-mapped, in which case the conversion is performed
+    out-of-core: at most *chunk_size* bytes of values are loaded at once.
+
+    :arg src: source flat array
+    :arg dst: destination flat array, may have a different dtype or byte
+        order than *src*
+    :arg depth: number of channels
+    :arg src_record_by: ordering of *src*
+    :arg dst_record_by: ordering of *dst*
+    :arg chunk_size: maximum number of bytes copied at once
+    :arg callback: function called with the fraction of values copied.
+        The conversion stops if it returns ``True``.
+    """
+    if src_record_by not in _RECORD_BYS:
+        raise ValueError('Unknown record-by: %s' % src_record_by)
+    if dst_record_by not in _RECORD_BYS:
+        raise ValueError('Unknown record-by: %s' % dst_record_by)
+    if src.size != dst.size:
+        raise ValueError('Source and destination must have the same size')
+    if src.size % depth != 0:
+        raise ValueError('Size is not a multiple of the depth')
+
+    itemsize = max(src.dtype.itemsize, dst.dtype.itemsize)
+
+    # Same ordering, copy by contiguous chunks
+    if depth == 1 or src_record_by == dst_record_by or \
+            RAW_RECORD_BY_DONT_CARE in (src_record_by, dst_record_by):
+        step = max(1, chunk_size // itemsize)
+        for start in range(0, src.size, step):
+            dst[start:start + step] = src[start:start + step]
+            if callback is not None and \
+                    callback(min(1.0, (start + step) / src.size)):
+                return
+        return
+
+    # Blocked transpose over ranges of pixels
+    pixel_count = src.size // depth
+    if src_record_by == RAW_RECORD_BY_VECTOR:
+        src = src.reshape(pixel_count, depth)
+        dst = dst.reshape(depth, pixel_count)
+    else:
+        src = src.reshape(depth, pixel_count).T
+        dst = dst.reshape(pixel_count, depth).T
+
+    step = max(1, chunk_size // (depth * itemsize))
+    for start in range(0, pixel_count, step):
+        block = np.array(src[start:start + step])
+        dst[:, start:start + step] = block.T
+        if callback is not None and \
+                callback(min(1.0, (start + step) / pixel_count)):
+            return
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+""" """
+
+# Standard library modules.
+import unittest
+import logging
+import os
+import json
+import tempfile
+import shutil
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.fileformat.common.chunked import \
+    ChunkedStore, get_chunk_shape, iter_chunks
+from pyhmsa.fileformat.exporter.chunked import ExporterChunked
+from pyhmsa.datafile import DataFile
+from pyhmsa.spec.datum.imageraster import ImageRaster2DSpectral
+from pyhmsa.spec.condition.detector import DetectorSpectrometerXEDS
+from pyhmsa.spec.condition.calibration import CalibrationLinear
+
+# Globals and constants variables.
+from pyhmsa.fileformat.common.chunked import \
+    CHUNKED_COMPRESSION_ZLIB, CHUNKED_INDEX_FILENAME
+
+class TestModule(unittest.TestCase):
+
+    def testget_chunk_shape(self):
+        self.assertEqual((4, 4, 10), get_chunk_shape((9, 7, 10), (4, 4)))
+        self.assertEqual((3, 4), get_chunk_shape((3, 7), (4, 4)))
+        self.assertEqual((5,), get_chunk_shape((5,), (256, 256)))
+        self.assertRaises(ValueError, get_chunk_shape, (5, 5), (0, 1))
+
+    def testiter_chunks(self):
+        chunks = list(iter_chunks((9, 7), (4, 4)))
+        self.assertEqual(6, len(chunks))
+        self.assertEqual(((2, 1), (slice(8, 9), slice(4, 7))), chunks[-1])
+
+class TestChunkedStore(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmpdir = tempfile.mkdtemp()
+
+        datafile = DataFile()
+        datafile.header.title = 'Map'
+
+        calibration = CalibrationLinear('Energy', 'eV', 10.0, 0.0)
+        datafile.conditions['EDS'] = DetectorSpectrometerXEDS(6, calibration)
+
+        self.values = np.arange(9 * 7 * 6, dtype=np.int32).reshape(9, 7, 6)
+        datafile.data['Spectra'] = \
+            ImageRaster2DSpectral(9, 7, 6, np.int32, self.values,
+                                  conditions={'EDS': datafile.conditions['EDS']})
+
+        exp = ExporterChunked(chunks=(4, 4),
+                              compression=CHUNKED_COMPRESSION_ZLIB,
+                              max_workers=2)
+        exp.export(datafile, self.tmpdir)
+        self.dirpath = exp.get()[0]
+        self.store = ChunkedStore(self.dirpath)
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def testskeleton(self):
+        self.assertEqual('Map', self.store.header.title)
+        self.assertIn('EDS', self.store.conditions)
+        self.assertEqual(['Spectra'], list(self.store.keys()))
+
+        datum = self.store['Spectra']
+        self.assertEqual((9, 7, 6), datum.shape)
+        self.assertEqual(np.int32, datum.dtype)
+        self.assertEqual((4, 4, 6), datum.chunk_shape)
+        self.assertIs(ImageRaster2DSpectral, datum.clasz)
+        self.assertIn('EDS', datum.conditions)
+
+    def test__getitem__(self):
+        datum = self.store['Spectra']
+
+        for key in [(Ellipsis,), (2, 3), (slice(3, 6), 5),
+                    (slice(None), slice(None, None, 3), 2),
+                    (slice(None, None, -2), Ellipsis, slice(1, 4)),
+                    (-1, -1, -1), (slice(5, 5),), (2, slice(5, 5)),
+                    (slice(None, None, -1), slice(3, 1), 0)]:
+            values = datum[key]
+            self.assertEqual(self.values[key].shape, values.shape)
+            np.testing.assert_array_equal(self.values[key], values)
+
+        self.assertRaises(IndexError, datum.__getitem__, (9, 0))
+        self.assertRaises(IndexError, datum.__getitem__, [0, 1])
+
+    def testread_chunk(self):
+        datum = self.store['Spectra']
+        np.testing.assert_array_equal(self.values[8:, 4:], datum.read_chunk((2, 1, 0)))
+
+    def testtodatum(self):
+        datum = self.store['Spectra'].todatum()
+        self.assertIsInstance(datum, ImageRaster2DSpectral)
+        self.assertIn('EDS', datum.conditions)
+        np.testing.assert_array_equal(self.values, datum)
+
+    def testlazy(self):
+        dirpath = os.path.join(self.tmpdir, 'Map.chunks', '0')
+        os.remove(os.path.join(dirpath, '2.1.0'))
+
+        datum = self.store['Spectra']
+        np.testing.assert_array_equal(self.values[:8, :4], datum[:8, :4])
+        self.assertRaises(IOError, datum.__getitem__, (8, 4))
+
+    def testunknown_class(self):
+        filepath = os.path.join(self.dirpath, CHUNKED_INDEX_FILENAME)
+        with open(filepath, 'r') as fp:
+            index = json.load(fp)
+
+        index['data'][0]['class'] = 'os:system'
+        with open(filepath, 'w') as fp:
+            json.dump(index, fp)
+
+        self.assertRaises(IOError, ChunkedStore, self.dirpath)
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
@@ -4,6 +4,7 @@
 # Standard library modules.
 import unittest
 import logging
+import os
 
 # Third party modules.
 
@@ -27,6 +28,15 @@ class TestModule(unittest.TestCase):
         lines = ['abc', '#CHECKSUM : 294']
         self.assertEqual(294, calculate_checksum(lines))
 
+    def testcalculate_checksum_bytes(self):
+        self.assertEqual(294, calculate_checksum(b'abc'))
+        self.assertEqual(304, calculate_checksum(b'abc\n#CHECKSUM : 294\n'))
+
+        filepath = os.path.join(os.path.dirname(__file__), '..', '..',
+                                'testdata', 'importer', 'emsa', 'spectrum1.emsa')
+        with open(filepath, 'rb') as fp:
+            self.assertEqual(522092, calculate_checksum(fp.read()))
+
 if __name__ == '__main__': #pragma: no cover
     logging.getLogger().setLevel(logging.DEBUG)
     unittest.main()
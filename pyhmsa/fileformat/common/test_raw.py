@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+""" """
+
+# Standard library modules.
+import unittest
+import logging
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.fileformat.common.raw import convert_record_by
+
+# Globals and constants variables.
+from pyhmsa.fileformat.common.raw import \
+    RAW_RECORD_BY_VECTOR, RAW_RECORD_BY_IMAGE, RAW_RECORD_BY_DONT_CARE
+
+class TestModule(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.vector = np.arange(6 * 4, dtype=np.uint16) # 6 pixels, 4 channels
+        self.image = self.vector.reshape(6, 4).T.ravel()
+
+    def tearDown(self):
+        super().tearDown()
+
+    def testconvert_record_by_vector_to_image(self):
+        dst = np.zeros_like(self.vector)
+        convert_record_by(self.vector, dst, 4, RAW_RECORD_BY_VECTOR,
+                          RAW_RECORD_BY_IMAGE, chunk_size=16)
+        np.testing.assert_array_equal(self.image, dst)
+
+    def testconvert_record_by_image_to_vector(self):
+        dst = np.zeros(self.image.size, np.dtype('>u2'))
+        convert_record_by(self.image, dst, 4, RAW_RECORD_BY_IMAGE,
+                          RAW_RECORD_BY_VECTOR, chunk_size=16)
+        np.testing.assert_array_equal(self.vector, dst)
+
+    def testconvert_record_by_same(self):
+        dst = np.zeros_like(self.vector)
+        progress = []
+        convert_record_by(self.vector, dst, 1, RAW_RECORD_BY_DONT_CARE,
+                          RAW_RECORD_BY_DONT_CARE, chunk_size=10,
+                          callback=progress.append)
+        np.testing.assert_array_equal(self.vector, dst)
+        self.assertAlmostEqual(1.0, progress[-1], 4)
+
+    def testconvert_record_by_stop(self):
+        dst = np.zeros_like(self.vector)
+        progress = []
+        def callback(fraction):
+            progress.append(fraction)
+            return True
+
+        convert_record_by(self.vector, dst, 4, RAW_RECORD_BY_VECTOR,
+                          RAW_RECORD_BY_IMAGE, chunk_size=16, callback=callback)
+        self.assertEqual(1, len(progress))
+        self.assertLess(progress[0], 1.0)
+
+    def testconvert_record_by_invalid(self):
+        dst = np.zeros(5)
+        self.assertRaises(ValueError, convert_record_by, self.vector, dst, 4,
+                          RAW_RECORD_BY_VECTOR, RAW_RECORD_BY_IMAGE)
+        dst = np.zeros_like(self.vector)
+        self.assertRaises(ValueError, convert_record_by, self.vector, dst, 4,
+                          'pixel', RAW_RECORD_BY_IMAGE)
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
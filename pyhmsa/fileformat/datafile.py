@@ -5,6 +5,9 @@ Reader and writer of data file
 # Standard library modules.
 import os
 import io
+import queue
+import threading
+import hashlib
 import logging
 logger = logging.getLogger(__name__)
 import binascii
@@ -19,22 +22,26 @@ from pyhmsa.datafile import DataFile
 
 from pyhmsa.fileformat.xmlhandler.header import HeaderXMLHandler
 
-from pyhmsa.type.checksum import calculate_checksum, calculate_checksum_sha1
+from pyhmsa.type.checksum import \
+    Checksum, calculate_checksum, calculate_checksum_sha1
 from pyhmsa.type.uid import generate_uid
 
 from pyhmsa.util.monitorable import _Monitorable, _MonitorableThread
 
 # Globals and constants variables.
+from pyhmsa.type.checksum import CHECKSUM_ALGORITHM_SHA1
+
+_CHUNK_SIZE = 16 * 1024 * 1024 # bytes
 
 def _extract_filepath(filepath):
     base, ext = os.path.splitext(filepath)
-    if ext not in ['.xml', '.hmsa']:
+    if ext.lower() not in ['.xml', '.hmsa']:
         raise IOError('File must be either a XML or HMSA')
 
-    filepath_xml = base + '.xml'
-    filepath_hmsa = base + '.hmsa'
-
-    return filepath_xml, filepath_hmsa
+    # Both files have extensions of the same case
+    if ext.isupper():
+        return base + '.XML', base + '.HMSA'
+    return base + '.xml', base + '.hmsa'
 
 class _DataFileReaderMixin:
 
@@ -101,8 +108,7 @@ class _DataFileReaderMixin:
                     datafile.conditions[key] = handler.parse(element)
                     break
 
-    def _read_data(self, datafile, root, hmsa_file):
-        # Check UID
+    def _check_uid(self, root, hmsa_file):
         xml_uid = root.attrib['UID'].encode('ascii')
         hmsa_uid = binascii.hexlify(hmsa_file.read(8))
         if xml_uid.upper() != hmsa_uid.upper():
@@ -110,6 +116,19 @@ class _DataFileReaderMixin:
                              (xml_uid, hmsa_uid))
         logger.debug('Check UID: %s == %s', xml_uid, hmsa_uid)
 
+    def _create_datum_handlers(self, datafile, hmsa_file):
+        handlers = set()
+        for entry_point in iter_entry_points('pyhmsa.fileformat.xmlhandler.datum'):
+            handler_class = entry_point.resolve()
+            handler = handler_class(datafile.version, hmsa_file,
+                                    datafile.conditions)
+            handlers.add(handler)
+        return handlers
+
+    def _read_data(self, datafile, root, hmsa_file):
+        # Check UID
+        self._check_uid(root, hmsa_file)
+
         # Check checksum
         xml_checksum = getattr(datafile.header, 'checksum', None)
         if xml_checksum is not None:
@@ -125,12 +144,7 @@ class _DataFileReaderMixin:
             logger.debug('Check sum: %s == %s', xml_checksum.value, hmsa_checksum.value)
 
         # Load handlers
-        handlers = set()
-        for entry_point in iter_entry_points('pyhmsa.fileformat.xmlhandler.datum'):
-            handler_class = entry_point.resolve()
-            handler = handler_class(datafile.version, hmsa_file,
-                                    datafile.conditions)
-            handlers.add(handler)
+        handlers = self._create_datum_handlers(datafile, hmsa_file)
 
         # Parse data
         elements = root.findall('Data/*')
@@ -184,6 +198,88 @@ class _DataFileReaderThread(_MonitorableThread, _DataFileReaderMixin):
         self._update_status(1.0, 'Completed')
         return datafile
 
+class _DataFileIteratorThread(_MonitorableThread, _DataFileReaderMixin):
+
+    def __init__(self, filepath, prefetch):
+        filepath_xml, filepath_hmsa = _extract_filepath(filepath)
+        if not os.path.exists(filepath_xml):
+            raise IOError('XML file is missing')
+        if not os.path.exists(filepath_hmsa):
+            raise IOError('HMSA file is missing')
+        if prefetch < 1:
+            raise ValueError('Prefetch must be greater or equal to 1')
+
+        super().__init__(args=(filepath,))
+
+        # The semaphore caps the number of decoded datums not yet consumed
+        self._queue = queue.Queue()
+        self._slots = threading.Semaphore(prefetch)
+
+    def _acquire_slot(self):
+        while not self._slots.acquire(timeout=0.05):
+            if self.is_cancelled():
+                return False
+        return not self.is_cancelled()
+
+    def _run(self, filepath, *args, **kwargs):
+        try:
+            return self._iterate(filepath)
+        finally:
+            self._queue.put(None) # Sentinel
+
+    def _iterate(self, filepath):
+        filepath_xml, filepath_hmsa = _extract_filepath(filepath)
+
+        with open(filepath_xml, 'rb') as xml_file:
+            root = etree.ElementTree(file=xml_file).getroot()
+
+        datafile = DataFile(version=root.attrib['Version'])
+        datafile._filepath = filepath_hmsa
+        self._read_root(datafile, root)
+        self._read_header(datafile, root)
+        self._read_conditions(datafile, root)
+        if self.is_cancelled(): return
+
+        with open(filepath_hmsa, 'rb') as hmsa_file:
+            self._check_uid(root, hmsa_file)
+
+            handlers = self._create_datum_handlers(datafile, hmsa_file)
+
+            # Sort elements by their position in the HMSA file
+            elements = root.findall('Data/*')
+            elements.sort(key=lambda element: \
+                          int(element.findtext('DataOffset', '0')))
+
+            count = len(elements)
+            for i, element in enumerate(elements):
+                key = element.get('Name', 'Inst%i' % i)
+
+                if not self._acquire_slot(): return
+                self._update_status(i / count, 'Reading datum %s' % key)
+
+                for handler in handlers:
+                    if handler.can_parse(element):
+                        self._queue.put((key, handler.parse(element)))
+                        break
+                else:
+                    self._slots.release()
+
+        return datafile
+
+    def next_item(self):
+        """
+        Returns the next ``(key, datum)`` tuple or ``None`` if all datums were
+        read.
+        """
+        item = self._queue.get()
+        if item is None:
+            self._queue.put(None) # Keep sentinel for subsequent calls
+            self.join()
+            return None
+
+        self._slots.release()
+        return item
+
 class DataFileReader(_Monitorable):
 
     def _create_thread(self, filepath=None, xml_file=None, hmsa_file=None, *args, **kwargs):
@@ -201,6 +297,284 @@ class DataFileReader(_Monitorable):
         """
         self._start(filepath, xml_file, hmsa_file)
 
+    def iter_data(self, filepath, prefetch=2):
+        """
+        Iterates over the datums of an existing MSA hyper dimensional data file,
+        in the order in which they are stored in the HMSA file.
+        A background thread reads and decodes the next datums while the
+        previous ones are processed.
+        Yields ``(key, datum)`` tuples.
+
+        .. note::
+
+           The checksum of the HMSA file is not verified, since it would
+           require reading the whole file before the first datum is returned.
+
+        :arg filepath: either the location of the XML or HMSA file.
+            Note that both have to be present.
+        :arg prefetch: maximum number of datums read in advance
+        """
+        if self._thread.is_alive():
+            raise RuntimeError('Current thread running')
+        self._thread = _DataFileIteratorThread(filepath, prefetch)
+        self._thread.start()
+
+        try:
+            while True:
+                item = self._thread.next_item()
+                if item is None:
+                    break
+                yield item
+        except GeneratorExit: # Iteration abandoned
+            self._thread.cancel()
+            self._thread.join()
+            raise
+
+class _PositionalFile(object):
+
+    def __init__(self, fileobj, lock):
+        """
+        Read-only file-like object with its own position.
+        Reads do not modify the offset of the underlying file descriptor,
+        so several instances can safely share the same file object across
+        threads and forked processes.
+        """
+        self._fileobj = fileobj
+        self._lock = lock
+        self._position = 0
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += os.fstat(self._fileobj.fileno()).st_size
+        self._position = offset
+        return offset
+
+    def tell(self):
+        return self._position
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = os.fstat(self._fileobj.fileno()).st_size - self._position
+
+        if hasattr(os, 'pread'):
+            chunks = []
+            remaining = size
+            while remaining > 0:
+                chunk = os.pread(self._fileobj.fileno(), remaining,
+                                 self._position + size - remaining)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                remaining -= len(chunk)
+            buffer = b''.join(chunks)
+        else:
+            with self._lock:
+                self._fileobj.seek(self._position)
+                buffer = self._fileobj.read(size)
+
+        self._position += len(buffer)
+        return buffer
+
+    @property
+    def closed(self):
+        return self._fileobj.closed
+
+_HMSA_FILES = {}
+_HMSA_FILES_LOCK = threading.Lock()
+
+def _reset_hmsa_files():
+    global _HMSA_FILES_LOCK
+    _HMSA_FILES_LOCK = threading.Lock()
+    _HMSA_FILES.clear()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_hmsa_files)
+
+def _acquire_hmsa_file(filepath, uid):
+    """
+    Returns the key of the HMSA file and a positional reader on it.
+    The file is opened once per process and per (path, UID), and closed when
+    the last user releases it with :func:`_release_hmsa_file`.
+    """
+    key = (os.path.realpath(filepath), uid.upper())
+    xml_uid = key[1].encode('ascii')
+
+    with _HMSA_FILES_LOCK:
+        entry = _HMSA_FILES.get(key)
+
+        if entry is None or entry[0] != os.getpid():
+            fileobj = open(filepath, 'rb')
+            hmsa_uid = binascii.hexlify(fileobj.read(8))
+            if hmsa_uid.upper() != xml_uid:
+                fileobj.close()
+                raise ValueError('UID in XML (%s) does not match UID in HMSA (%s)' % \
+                                 (xml_uid, hmsa_uid))
+
+            entry = [os.getpid(), fileobj, threading.Lock(), 0]
+            _HMSA_FILES[key] = entry
+
+        entry[3] += 1
+
+    return key, _PositionalFile(entry[1], entry[2])
+
+def _release_hmsa_file(key):
+    with _HMSA_FILES_LOCK:
+        entry = _HMSA_FILES.get(key)
+        if entry is None or entry[0] != os.getpid():
+            return
+
+        entry[3] -= 1
+        if entry[3] <= 0:
+            entry[1].close()
+            del _HMSA_FILES[key]
+
+class DataFileHandle(_DataFileReaderMixin):
+
+    def __init__(self, filepath):
+        """
+        Opens an existing MSA hyper dimensional data file for random access.
+        Only the XML file is read on creation; datums are read on demand
+        with :meth:`read_datum`.
+
+        Datums are read with positional reads from a file opened once per
+        process, so a handle may be used concurrently from several threads
+        and from forked or spawned processes (handles can be pickled).
+        The HMSA file is opened on the first read and released by
+        :meth:`close`, or when the handle is used as a context manager; it
+        is closed once no handle of the process uses it.
+
+        :arg filepath: either the location of the XML or HMSA file.
+            Note that both have to be present.
+        """
+        filepath_xml, filepath_hmsa = _extract_filepath(filepath)
+        if not os.path.exists(filepath_xml):
+            raise IOError('XML file is missing')
+        if not os.path.exists(filepath_hmsa):
+            raise IOError('HMSA file is missing')
+
+        with open(filepath_xml, 'rb') as xml_file:
+            root = etree.ElementTree(file=xml_file).getroot()
+
+        datafile = DataFile(version=root.attrib['Version'])
+        datafile._filepath = filepath_hmsa
+        self._read_root(datafile, root)
+        self._read_header(datafile, root)
+        self._read_conditions(datafile, root)
+
+        self._filepath = filepath_hmsa
+        self._uid = root.attrib['UID']
+        self._datafile = datafile
+
+        self._elements = {}
+        for element in root.findall('Data/*'):
+            key = element.get('Name', 'Inst%i' % len(self._elements))
+            self._elements[key] = element
+
+        self._handler_classes = \
+            [entry_point.resolve() for entry_point in \
+             iter_entry_points('pyhmsa.fileformat.xmlhandler.datum')]
+
+        self._lock = threading.Lock()
+        self._hmsa_key = None
+        self._hmsa_file = None
+        self._hmsa_pid = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exctype, value, tb):
+        self.close()
+
+    def __del__(self):
+        if getattr(self, '_hmsa_file', None) is not None:
+            self.close()
+
+    def __getstate__(self):
+        return {'filepath': self._filepath}
+
+    def __setstate__(self, state):
+        self.__init__(state['filepath'])
+
+    def _update_status(self, progress, status):
+        pass
+
+    def is_cancelled(self):
+        return False
+
+    def keys(self):
+        """
+        Returns the identifiers of the datums.
+        """
+        return list(self._elements.keys())
+
+    def read_datum(self, key):
+        """
+        Reads and returns a datum.
+
+        :arg key: identifier of the datum
+        """
+        element = self._elements[key]
+        hmsa_file = self._get_hmsa_file()
+
+        for handler_class in self._handler_classes:
+            handler = handler_class(self._datafile.version, hmsa_file,
+                                    self._datafile.conditions)
+            if handler.can_parse(element):
+                return handler.parse(element)
+
+        raise ValueError('No handler found for datum %s' % key)
+
+    def _get_hmsa_file(self):
+        with self._lock:
+            # Files opened by the parent process are not shared after a fork
+            if self._hmsa_file is None or self._hmsa_pid != os.getpid():
+                self._hmsa_key, self._hmsa_file = \
+                    _acquire_hmsa_file(self._filepath, self._uid)
+                self._hmsa_pid = os.getpid()
+            return self._hmsa_file
+
+    def close(self):
+        """
+        Releases the HMSA file. Datums can still be read afterwards, the
+        file is then opened again.
+        """
+        with self._lock:
+            if self._hmsa_file is not None and self._hmsa_pid == os.getpid():
+                _release_hmsa_file(self._hmsa_key)
+            self._hmsa_key = None
+            self._hmsa_file = None
+            self._hmsa_pid = None
+
+    @property
+    def filepath(self):
+        """
+        Location of the HMSA file.
+        """
+        return self._filepath
+
+    @property
+    def uid(self):
+        """
+        Unique identifier of the data file.
+        """
+        return self._uid
+
+    @property
+    def header(self):
+        """
+        Header
+        """
+        return self._datafile.header
+
+    @property
+    def conditions(self):
+        """
+        Conditions
+        """
+        return self._datafile.conditions
+
 class _DataFileWriterMixin:
 
     def _write(self, datafile, xml_file, hmsa_file, *args, **kwargs):
@@ -234,7 +608,7 @@ class _DataFileWriterMixin:
         # Calculate and add checksum
         self._update_status(0.93, 'Calculating checksum')
         if self.is_cancelled(): return
-        checksum = calculate_checksum_sha1(hmsa_file.getvalue())
+        checksum = self._calculate_checksum(hmsa_file)
 
         element = root.find('Header')
         subelement = etree.Element('Checksum')
@@ -260,6 +634,19 @@ class _DataFileWriterMixin:
 
         return datafile
 
+    def _calculate_checksum(self, hmsa_file):
+        if hasattr(hmsa_file, 'getvalue'):
+            return calculate_checksum_sha1(hmsa_file.getvalue())
+
+        # Read back file by chunks
+        sha1 = hashlib.sha1()
+        hmsa_file.flush()
+        hmsa_file.seek(0)
+        for chunk in iter(lambda: hmsa_file.read(_CHUNK_SIZE), b''):
+            sha1.update(chunk)
+        hmsa_file.seek(0, io.SEEK_END)
+        return Checksum(sha1.hexdigest(), CHECKSUM_ALGORITHM_SHA1)
+
     def _write_root(self, datafile, root, uid):
         root.set('Version', datafile.version)
         root.set('UID', binascii.hexlify(uid).decode('utf-8').upper())
@@ -348,18 +735,25 @@ class _DataFileWriterThread(_MonitorableThread, _DataFileWriterMixin):
         self._update_status(0.0, 'Running')
         if self.is_cancelled(): return
 
+        filepath_xml, filepath_hmsa = _extract_filepath(filepath)
+
+        # HMSA file is written directly to disk to avoid buffering the data
+        # in memory. It only replaces the existing file once completed.
         xml_file = io.BytesIO()
-        hmsa_file = io.BytesIO()
+        filepath_part = filepath_hmsa + '.part'
+        hmsa_file = open(filepath_part, 'w+b')
         try:
             self._write(datafile, xml_file, hmsa_file)
+            hmsa_file.close()
+            if self.is_cancelled(): return
 
-            filepath_xml, filepath_hmsa = _extract_filepath(filepath)
+            os.replace(filepath_part, filepath_hmsa)
             with open(filepath_xml, 'wb') as fp:
                 fp.write(xml_file.getvalue())
-            with open(filepath_hmsa, 'wb') as fp:
-                fp.write(hmsa_file.getvalue())
         finally:
             hmsa_file.close()
+            if os.path.exists(filepath_part):
+                os.remove(filepath_part)
             xml_file.close()
 
         self._update_status(1.0, 'Completed')
@@ -0,0 +1,135 @@
+"""
+Export to a chunked directory store
+"""
+
+# Standard library modules.
+import os
+import json
+import itertools
+import concurrent.futures
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.fileformat.exporter.exporter import _Exporter, _ExporterThread
+from pyhmsa.fileformat.common.metadata import convert_metadata, get_class_path
+from pyhmsa.fileformat.common.chunked import \
+    (validate_compression, get_chunk_shape, iter_chunks, get_chunk_filename,
+     write_chunk)
+from pyhmsa.spec.datum.datum import _Datum
+
+# Globals and constants variables.
+from pyhmsa.fileformat.common.chunked import \
+    (CHUNKED_COMPRESSION_RAW, CHUNKED_INDEX_FILENAME, CHUNKED_VERSION)
+
+class _ExporterChunkedThread(_ExporterThread):
+
+    def _run(self, datafile, dirpath, chunks, compression, max_workers,
+             *args, **kwargs):
+        basefilename = datafile.header.title or 'Untitled'
+        store_dirpath = os.path.join(dirpath, basefilename + '.chunks')
+        os.makedirs(store_dirpath, exist_ok=True)
+
+        keys = sorted(datafile.data.keys())
+        entries = []
+        for i, identifier in enumerate(keys):
+            datum = datafile.data[identifier]
+            entries.append({'key': identifier,
+                            'path': str(i),
+                            'class': get_class_path(datum),
+                            'shape': list(datum.shape),
+                            'dtype': datum.dtype.newbyteorder('<').str,
+                            'chunks': list(get_chunk_shape(datum.shape, chunks)),
+                            'compression': compression,
+                            'conditions': list(datum.conditions.keys())})
+            os.makedirs(os.path.join(store_dirpath, str(i)), exist_ok=True)
+
+        self._write_chunks(datafile, store_dirpath, entries, max_workers)
+        if self.is_cancelled(): return
+
+        # Index is written last, a store without index is incomplete
+        index = {'version': CHUNKED_VERSION,
+                 'metadata': convert_metadata(datafile).decode('utf-8'),
+                 'data': entries}
+        index_filepath = os.path.join(store_dirpath, CHUNKED_INDEX_FILENAME)
+        with open(index_filepath, 'w') as fp:
+            json.dump(index, fp, indent=2)
+
+        return [store_dirpath]
+
+    def _iter_tasks(self, datafile, store_dirpath, entries):
+        for entry in entries:
+            datum = np.asarray(datafile.data[entry['key']])
+            dirpath = os.path.join(store_dirpath, entry['path'])
+            for index, slices in iter_chunks(datum.shape, entry['chunks']):
+                filepath = os.path.join(dirpath, get_chunk_filename(index))
+                yield filepath, datum[slices], entry['compression']
+
+    def _write_chunks(self, datafile, store_dirpath, entries, max_workers):
+        workers = max_workers or os.cpu_count() or 1
+        total = max(1, sum(datafile.data[entry['key']].nbytes
+                           for entry in entries))
+        written = 0
+
+        tasks = self._iter_tasks(datafile, store_dirpath, entries)
+
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            # Limit the number of submitted chunks to bound memory usage
+            pending = set(executor.submit(write_chunk, *task)
+                          for task in itertools.islice(tasks, workers * 2))
+
+            while pending:
+                done, pending = concurrent.futures.wait(pending,
+                    return_when=concurrent.futures.FIRST_COMPLETED)
+
+                for future in done:
+                    written += future.result()
+                    self._update_status(written / total, 'Writing chunks')
+
+                if self.is_cancelled():
+                    for future in pending:
+                        future.cancel()
+                    return
+
+                pending |= set(executor.submit(write_chunk, *task)
+                               for task in itertools.islice(tasks, len(done)))
+
+class ExporterChunked(_Exporter):
+
+    def __init__(self, chunks=(256, 256), compression=CHUNKED_COMPRESSION_RAW,
+                 max_workers=None):
+        """
+        Exports to a chunked directory store, ``<title>.chunks``.
+
+        :arg chunks: size of the chunks along the first axes of the datums,
+            remaining axes are not divided. For instance, ``(256, 256)``
+            gives 256x256xC tiles for a :class:`ImageRaster2DSpectral`.
+        :arg compression: either :const:`CHUNKED_COMPRESSION_RAW` or
+            :const:`CHUNKED_COMPRESSION_ZLIB`
+        :arg max_workers: number of processes writing chunks
+            (default: number of CPUs)
+        """
+        super().__init__()
+
+        validate_compression(compression)
+        if not chunks or any(size <= 0 for size in chunks):
+            raise ValueError('Chunk size must be greater than 0')
+
+        self._chunks = tuple(chunks)
+        self._compression = compression
+        self._max_workers = max_workers
+
+    def _create_thread(self, datafile, dirpath, *args, **kwargs):
+        return _ExporterChunkedThread(datafile, dirpath, self._chunks,
+                                      self._compression, self._max_workers)
+
+    def validate(self, datafile):
+        super().validate(datafile)
+
+        if not datafile.data:
+            raise ValueError('Datafile must contain at least one datum')
+
+        for identifier, datum in datafile.data.items():
+            if not isinstance(datum, _Datum):
+                raise ValueError('Datum "%s" must be converted to a dense datum' % identifier)
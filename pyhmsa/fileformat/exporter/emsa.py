@@ -4,17 +4,23 @@ Exporter to EMSA file format.
 
 # Standard library modules.
 import os
+import itertools
+import concurrent.futures
 
 # Third party modules.
+import numpy as np
 
 # Local modules.
 from pyhmsa.fileformat.exporter.exporter import _Exporter, _ExporterThread
 from pyhmsa.fileformat.common.emsa import calculate_checksum
 
 from pyhmsa.spec.datum.analysis import Analysis1D
+from pyhmsa.spec.datum.analysislist import AnalysisList1D
+from pyhmsa.spec.datum.imageraster import ImageRaster2DSpectral
 from pyhmsa.spec.condition.detector import DetectorSpectrometer
 from pyhmsa.spec.condition.probe import _Probe
-from pyhmsa.spec.condition.acquisition import AcquisitionPoint
+from pyhmsa.spec.condition.acquisition import \
+    AcquisitionPoint, AcquisitionMultipoint
 
 from pyhmsa.type.numerical import convert_unit
 
@@ -27,11 +33,70 @@ def _create_keyword_line(tag, value=''):
     assert len(tag) == 12
     return ["#%s: %s" % (tag, value)]
 
+def _create_position_lines(x, y, z=None):
+    """
+    Returns the keyword lines of a specimen position, in mm.
+    """
+    lines = []
+    lines += _create_keyword_line('XPOSITION', x)
+    lines += _create_keyword_line('YPOSITION', y)
+    lines += _create_keyword_line('ZPOSITION', z)
+    return lines
+
+def _create_separators(channels, ncolumns):
+    separators = np.full(channels, ', ', dtype='U2')
+    separators[ncolumns - 1::ncolumns] = '\n'
+    if channels:
+        separators[-1] = ''
+    return separators
+
+def _format_data(spectra, ncolumns):
+    """
+    Returns the data lines of each spectrum as a single string.
+    All values are formatted at once.
+    """
+    spectra = np.asarray(spectra)
+    separators = _create_separators(spectra.shape[-1], ncolumns)
+    values = np.char.add(np.char.mod('%e', spectra), separators)
+    return [''.join(row) for row in values.reshape(-1, spectra.shape[-1])]
+
+def _write_files(template, spectra, positions, filepaths, ncolumns):
+    """
+    Writes one EMSA file per spectrum from the rendered *template*, a tuple
+    of the text before the position keywords, the default position keywords,
+    the text between the position keywords and the data, the text after the
+    data and the checksum of the template without the position keywords.
+    *positions* is an array of the x, y and z positions (in mm, NaN if
+    unknown) of each spectrum, or ``None`` to use the default position.
+    """
+    head, position, tail, suffix, checksum = template
+
+    texts = _format_data(spectra, ncolumns)
+    for i, (text, filepath) in enumerate(zip(texts, filepaths)):
+        if positions is not None:
+            values = [None if np.isnan(v) else float(v) for v in positions[i]]
+            position = ''.join(line + '\n'
+                               for line in _create_position_lines(*values))
+
+        # Line terminators are not part of the checksum
+        value = checksum + calculate_checksum(position.splitlines()) + \
+            calculate_checksum(text.split('\n'))
+        with open(filepath, 'w', encoding='utf-8', newline='\n') as fp:
+            fp.write(head)
+            fp.write(position)
+            fp.write(tail)
+            fp.write(text)
+            fp.write(suffix)
+            fp.write('\n'.join(_create_keyword_line('CHECKSUM', value)))
+
+    return len(filepaths)
+
 class _ExporterEMSAThread(_ExporterThread):
 
     _NCOLUMNS = 4
 
-    def _run(self, datafile, dirpath, *args, **kwargs):
+    def _run(self, datafile, dirpath, bulk=False, max_workers=None,
+             chunk_size=256, *args, **kwargs):
         basefilename = datafile.header.title or 'Untitled'
 
         items = datafile.data.finditems(Analysis1D)
@@ -39,6 +104,9 @@ class _ExporterEMSAThread(_ExporterThread):
         filepaths = []
 
         for i, item in enumerate(items):
+            if self.is_cancelled():
+                return filepaths
+
             identifier, datum = item
             detector = next(iter(datum.conditions.findvalues(DetectorSpectrometer)))
 
@@ -47,13 +115,146 @@ class _ExporterEMSAThread(_ExporterThread):
 
             filename = basefilename + '_' + identifier + '.emsa'
             filepath = os.path.join(dirpath, filename)
-            with open(filepath, 'w') as fp:
+            with open(filepath, 'w', encoding='utf-8', newline='\n') as fp:
                 fp.write('\n'.join(lines))
 
             filepaths.append(filepath)
 
+        if bulk:
+            filepaths += self._run_bulk(datafile, dirpath, basefilename,
+                                        max_workers, chunk_size)
+
+        return filepaths
+
+    def _run_bulk(self, datafile, dirpath, basefilename, max_workers,
+                  chunk_size):
+        items = list(datafile.data.finditems(ImageRaster2DSpectral)) + \
+            list(datafile.data.finditems(AnalysisList1D))
+        filepaths = []
+
+        for identifier, datum in items:
+            if self.is_cancelled():
+                break
+
+            detector = next(iter(datum.conditions.findvalues(DetectorSpectrometer)))
+
+            if isinstance(datum, ImageRaster2DSpectral):
+                indices = itertools.product(range(datum.x), range(datum.y))
+                analysis = datum.toanalysis(0, 0)
+            else:
+                indices = ((i,) for i in range(datum.analysis_count))
+                analysis = datum.toanalysis(0)
+            template = self._create_template(datafile, analysis, detector)
+            positions = self._get_positions(datum)
+
+            prefix = basefilename + '_' + identifier
+            datum_filepaths = \
+                [os.path.join(dirpath, '_'.join((prefix,) + tuple(map(str, index))) + '.emsa')
+                 for index in indices]
+            spectra = np.asarray(datum).reshape(-1, analysis.channels)
+
+            self._write_bulk(identifier, template, spectra, positions,
+                             datum_filepaths, max_workers, chunk_size)
+            if self.is_cancelled():
+                break
+
+            filepaths += datum_filepaths
+
         return filepaths
 
+    def _get_positions(self, datum):
+        """
+        Returns an array of the x, y and z positions (in mm) of each pixel or
+        analysis of the datum, or ``None`` if they are not defined.
+        """
+        if isinstance(datum, ImageRaster2DSpectral):
+            try:
+                geometry = datum.get_geometry()
+            except ValueError:
+                return None
+
+            xs, ys = np.meshgrid(np.arange(datum.x), np.arange(datum.y),
+                                 indexing='ij')
+            positions = np.full((xs.size, 3), np.nan)
+            positions[:, :2] = datum.get_positions(xs, ys).reshape(-1, 2)
+            if geometry.z is not None:
+                positions[:, 2] = geometry.z
+            return positions
+
+        for acq in datum.conditions.findvalues(AcquisitionMultipoint):
+            if len(acq.positions) != datum.analysis_count:
+                continue
+
+            positions = np.full((len(acq.positions), 3), np.nan)
+            for i, position in enumerate(acq.positions):
+                for j, value in enumerate((position.x, position.y, position.z)):
+                    if value is not None:
+                        positions[i, j] = convert_unit('mm', value)
+            return positions
+
+        return None
+
+    def _write_bulk(self, identifier, template, spectra, positions, filepaths,
+                    max_workers, chunk_size):
+        length = len(filepaths)
+        chunks = ((start, start + chunk_size)
+                  for start in range(0, length, chunk_size))
+        workers = max_workers or os.cpu_count() or 1
+        written = 0
+
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            # Limit the number of submitted chunks to bound memory usage
+            def submit(chunk):
+                start, stop = chunk
+                chunk_positions = None
+                if positions is not None:
+                    chunk_positions = positions[start:stop]
+                return executor.submit(_write_files, template,
+                                       np.array(spectra[start:stop]),
+                                       chunk_positions,
+                                       filepaths[start:stop], self._NCOLUMNS)
+
+            pending = set(submit(chunk) for chunk in
+                          itertools.islice(chunks, workers * 2))
+
+            while pending:
+                done, pending = concurrent.futures.wait(pending,
+                    return_when=concurrent.futures.FIRST_COMPLETED)
+
+                for future in done:
+                    written += future.result()
+                    self._update_status(written / length,
+                                        'Exporting %s' % identifier)
+
+                if self.is_cancelled():
+                    for future in pending:
+                        future.cancel()
+                    return
+
+                pending |= set(submit(chunk) for chunk in
+                               itertools.islice(chunks, len(done)))
+
+    def _create_template(self, datafile, datum, detector):
+        head_lines = []
+        head_lines += self._create_header_lines(datafile, datum, detector)
+        head_lines += self._create_required_keywords_lines(datafile, datum, detector)
+        head_lines += self._create_probe_keywords_lines(datafile, datum, detector)
+        head = ''.join(line + '\n' for line in head_lines)
+
+        position_lines = self._create_position_keywords_lines(datafile, datum, detector)
+        position = ''.join(line + '\n' for line in position_lines)
+
+        tail_lines = []
+        tail_lines += self._create_acquisition_keywords_lines(datafile, datum, detector)
+        tail_lines += _create_keyword_line('SPECTRUM')
+        tail = '\n'.join(tail_lines) + '\n'
+
+        suffix_lines = _create_keyword_line('ENDOFDATA')
+        suffix = '\n' + '\n'.join(suffix_lines) + '\n'
+
+        checksum = calculate_checksum(head_lines + tail_lines + suffix_lines)
+        return head, position, tail, suffix, checksum
+
     def _create_lines(self, datafile, datum, detector):
         lines = []
         lines += self._create_header_lines(datafile, datum, detector)
@@ -87,10 +288,22 @@ class _ExporterEMSAThread(_ExporterThread):
         return lines
 
     def _create_optional_keywords_lines(self, datafile, datum, detector):
+        lines = []
+        lines += self._create_probe_keywords_lines(datafile, datum, detector)
+        lines += self._create_position_keywords_lines(datafile, datum, detector)
+        lines += self._create_acquisition_keywords_lines(datafile, datum, detector)
+        return lines
+
+    def _find_acquisition(self, datafile, datum):
+        # The acquisition of the datum has precedence over the one of the
+        # data file
+        acqs = datum.conditions.findvalues(AcquisitionPoint) or \
+            datafile.conditions.findvalues(AcquisitionPoint)
+        return next(iter(acqs)) if acqs else None
+
+    def _create_probe_keywords_lines(self, datafile, datum, detector):
         probes = datafile.conditions.findvalues(_Probe)
         probe = next(iter(probes)) if probes else None
-        acqs = datafile.conditions.findvalues(AcquisitionPoint)
-        acq = next(iter(acqs)) if acqs else None
 
         lines = []
         lines += _create_keyword_line('SIGNALTYPE', detector.signal_type)
@@ -127,16 +340,24 @@ class _ExporterEMSAThread(_ExporterThread):
             if opermode is not None:
                 lines += _create_keyword_line('OPERMODE', opermode)
 
-        if acq and acq.position is not None:
-            xposition = float(convert_unit('mm', acq.position.x))
-            lines += _create_keyword_line('XPOSITION', xposition)
+        return lines
 
-            yposition = float(convert_unit('mm', acq.position.y))
-            lines += _create_keyword_line('YPOSITION', yposition)
+    def _create_position_keywords_lines(self, datafile, datum, detector):
+        acq = self._find_acquisition(datafile, datum)
+        if not acq or acq.position is None:
+            return []
 
+        xposition = float(convert_unit('mm', acq.position.x))
+        yposition = float(convert_unit('mm', acq.position.y))
+        zposition = None
+        if acq.position.z is not None:
             zposition = float(convert_unit('mm', acq.position.z))
-            lines += _create_keyword_line('ZPOSITION', zposition)
+        return _create_position_lines(xposition, yposition, zposition)
 
+    def _create_acquisition_keywords_lines(self, datafile, datum, detector):
+        acq = self._find_acquisition(datafile, datum)
+
+        lines = []
         if acq:
             if acq.dwell_time is not None:
                 dwelltime = float(convert_unit('ms', acq.dwell_time))
@@ -192,10 +413,8 @@ class _ExporterEMSAThread(_ExporterThread):
 
         lines += _create_keyword_line('SPECTRUM')
 
-        for i in range(0, len(datum), self._NCOLUMNS):
-            values = ['%e' % d \
-                      for d in datum[i:i + self._NCOLUMNS]]
-            lines.append(', '.join(values))
+        if len(datum):
+            lines += _format_data(datum, self._NCOLUMNS)[0].split('\n')
 
         lines += _create_keyword_line('ENDOFDATA')
 
@@ -207,14 +426,43 @@ class _ExporterEMSAThread(_ExporterThread):
 
 class ExporterEMSA(_Exporter):
 
+    def __init__(self, bulk=False, max_workers=None, chunk_size=256):
+        """
+        Exports to EMSA file format.
+
+        :arg bulk: whether to also export each pixel of
+            :class:`ImageRaster2DSpectral` and each analysis of
+            :class:`AnalysisList1D` datums as separate EMSA files.
+            Files are written by a pool of processes.
+        :arg max_workers: number of processes in bulk mode
+            (default: number of CPUs)
+        :arg chunk_size: number of spectra written by a process at once
+        """
+        super().__init__()
+
+        if chunk_size <= 0:
+            raise ValueError('Chunk size must be greater than 0')
+        self._bulk = bulk
+        self._max_workers = max_workers
+        self._chunk_size = chunk_size
+
     def _create_thread(self, datafile, dirpath, *args, **kwargs):
-        return _ExporterEMSAThread(datafile, dirpath)
+        return _ExporterEMSAThread(datafile, dirpath, self._bulk,
+                                   self._max_workers, self._chunk_size)
 
     def validate(self, datafile):
         super().validate(datafile)
 
         items = datafile.data.finditems(Analysis1D)
-        if not items:
+        if self._bulk:
+            items = list(items) + \
+                list(datafile.data.finditems(ImageRaster2DSpectral)) + \
+                list(datafile.data.finditems(AnalysisList1D))
+            if not items:
+                raise ValueError('Datafile must contain at least one ' + \
+                                 'Analysis1D, ImageRaster2DSpectral or ' + \
+                                 'AnalysisList1D datum')
+        elif not items:
             raise ValueError('Datafile must contain at least one Analysis1D datum')
 
         for identifier, datum in items:
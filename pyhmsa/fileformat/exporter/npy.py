@@ -0,0 +1,73 @@
+"""
+Export to NumPy .npy file format
+
+Each datum is saved in its own .npy file, next to a JSON sidecar file with
+the header and conditions of the data file.
+"""
+
+# Standard library modules.
+import os
+import json
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.fileformat.exporter.exporter import _Exporter, _ExporterThread
+from pyhmsa.fileformat.common.metadata import convert_metadata, get_class_path
+from pyhmsa.spec.datum.datum import _Datum
+
+# Globals and constants variables.
+
+class _ExporterNPYThread(_ExporterThread):
+
+    def _run(self, datafile, dirpath, *args, **kwargs):
+        basefilename = datafile.header.title or 'Untitled'
+        metadata = convert_metadata(datafile).decode('utf-8')
+
+        keys = sorted(datafile.data.keys())
+        length = len(keys)
+        filepaths = []
+
+        for i, identifier in enumerate(keys):
+            if self.is_cancelled(): break
+
+            datum = datafile.data[identifier]
+
+            self._update_status(i / length, 'Exporting %s' % identifier)
+
+            filename = basefilename + '_' + identifier
+
+            sidecar = self._create_sidecar(identifier, datum, metadata)
+            json_filepath = os.path.join(dirpath, filename + '.json')
+            with open(json_filepath, 'w') as fp:
+                json.dump(sidecar, fp, indent=2)
+
+            # Written from the datum memory, in its own byte order
+            npy_filepath = os.path.join(dirpath, filename + '.npy')
+            np.save(npy_filepath, np.asarray(datum), allow_pickle=False)
+
+            filepaths.append(npy_filepath)
+
+        return filepaths
+
+    def _create_sidecar(self, identifier, datum, metadata):
+        return {'key': identifier,
+                'class': get_class_path(datum),
+                'conditions': list(datum.conditions.keys()),
+                'metadata': metadata}
+
+class ExporterNPY(_Exporter):
+
+    def _create_thread(self, datafile, dirpath, *args, **kwargs):
+        return _ExporterNPYThread(datafile, dirpath)
+
+    def validate(self, datafile):
+        super().validate(datafile)
+
+        if not datafile.data:
+            raise ValueError('Datafile must contain at least one datum')
+
+        for identifier, datum in datafile.data.items():
+            if not isinstance(datum, _Datum):
+                raise ValueError('Datum "%s" must be converted to a dense datum' % identifier)
@@ -8,65 +8,181 @@ http://www.nist.gov/lispix/doc/image-file-formats/raw-file-format.htm
 
 # Standard library modules.
 import os
+import threading
+import concurrent.futures
 
 # Third party modules.
+import numpy as np
 
 # Local modules.
 from pyhmsa.fileformat.exporter.exporter import _Exporter, _ExporterThread
+from pyhmsa.fileformat.common.raw import convert_record_by
 from pyhmsa.spec.datum.analysislist import AnalysisList2D
 from pyhmsa.spec.datum.imageraster import ImageRaster2D, ImageRaster2DSpectral
 
 # Globals and constants variables.
+from pyhmsa.fileformat.common.raw import \
+    (RAW_RECORD_BY_VECTOR, RAW_RECORD_BY_IMAGE, RAW_RECORD_BY_DONT_CARE,
+     CHUNK_SIZE)
 
 class _ExporterRAWThread(_ExporterThread):
 
-    def _run(self, datafile, dirpath, *args, **kwargs):
+    def __init__(self, datafile, dirpath, *args, **kwargs):
+        super().__init__(datafile, dirpath, *args, **kwargs)
+        self._progress_lock = threading.Lock()
+
+    def _run(self, datafile, dirpath, record_by=None, max_workers=None,
+             *args, **kwargs):
         basefilename = datafile.header.title or 'Untitled'
 
         keys = set(datafile.data.findkeys(AnalysisList2D)) | \
             set(datafile.data.findkeys(ImageRaster2D)) | \
             set(datafile.data.findkeys(ImageRaster2DSpectral))
-        length = len(keys)
-        filepaths = []
-
-        for i, identifier in enumerate(keys):
-            datum = datafile.data[identifier]
+        keys = sorted(keys)
+
+        self._bytes_written = 0
+        self._bytes_total = \
+            max(1, sum(datafile.data[key].nbytes for key in keys))
+
+        # Each datum is written to its own files, so datums can be exported
+        # concurrently. Writes release the GIL.
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            futures = []
+            for identifier in keys:
+                filename = basefilename + '_' + identifier
+                futures.append(executor.submit(self._export_datum,
+                                               datafile.data[identifier],
+                                               identifier, dirpath, filename,
+                                               record_by))
+
+            results = [future.result() for future in futures]
+
+        # Datums whose export was cancelled are skipped
+        return [filepath for filepath in results if filepath is not None]
+
+    def _export_datum(self, datum, identifier, dirpath, filename, record_by):
+        if self.is_cancelled(): return None
+
+        datum_record_by = self._get_record_by(datum)
+        if record_by is None or datum_record_by == RAW_RECORD_BY_DONT_CARE:
+            file_record_by = datum_record_by
+        else:
+            file_record_by = record_by
 
-            self._update_status(i / length, 'Exporting %s' % identifier)
+        lines = self._create_rpl_lines(identifier, datum, file_record_by)
+        rpl_filepath = os.path.join(dirpath, filename + '.rpl')
+        raw_filepath = os.path.join(dirpath, filename + '.raw')
 
-            filename = basefilename + '_' + identifier
-            lines = self._create_rpl_lines(identifier, datum)
-            rpl_filepath = os.path.join(dirpath, filename + '.rpl')
+        try:
             with open(rpl_filepath, 'w') as fp:
                 fp.write('\n'.join(lines))
 
-            raw_filepath = os.path.join(dirpath, filename + '.raw')
-            with open(raw_filepath, 'wb') as fp:
-                datum = datum.copy()
-                datum.dtype.newbyteorder('<')
-                fp.write(datum.tobytes())
-
-            filepaths.append(raw_filepath)
+            if file_record_by == datum_record_by:
+                self._write(datum, raw_filepath, identifier)
+            else:
+                self._write_reordered(datum, raw_filepath, datum_record_by,
+                                      file_record_by, identifier)
+        except:
+            self._remove_files(rpl_filepath, raw_filepath)
+            raise
+
+        # Partial files of a cancelled export are removed
+        if self.is_cancelled():
+            self._remove_files(rpl_filepath, raw_filepath)
+            return None
+
+        return raw_filepath
+
+    def _remove_files(self, *filepaths):
+        for filepath in filepaths:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+
+    def _add_progress(self, nbytes, identifier):
+        with self._progress_lock:
+            self._bytes_written += nbytes
+            self._update_status(self._bytes_written / self._bytes_total,
+                                'Exporting %s' % identifier)
+
+    def _write(self, datum, raw_filepath, identifier, chunk_size=CHUNK_SIZE):
+        # Values are written in C order by chunks along the first axis.
+        # Chunks are views on the datum memory, unless the values must be
+        # byte swapped to little-endian or the datum is not contiguous.
+        array = np.asarray(datum)
+        dtype = array.dtype.newbyteorder('<')
+        if array.ndim == 0:
+            array = array.reshape(1)
+
+        row_nbytes = max(1, array[:1].nbytes)
+        step = max(1, chunk_size // row_nbytes)
+
+        with open(raw_filepath, 'wb') as fp:
+            for start in range(0, array.shape[0], step):
+                if self.is_cancelled(): return
+                chunk = np.ascontiguousarray(array[start:start + step], dtype)
+                fp.write(memoryview(chunk).cast('B'))
+                self._add_progress(chunk.nbytes, identifier)
+
+    def _get_record_by(self, datum):
+        if isinstance(datum, ImageRaster2D):
+            return RAW_RECORD_BY_DONT_CARE
+        elif isinstance(datum, ImageRaster2DSpectral):
+            return RAW_RECORD_BY_VECTOR
+        elif isinstance(datum, AnalysisList2D):
+            return RAW_RECORD_BY_IMAGE
+        else:
+            raise IOError('Unkmown datum type')
 
-        return filepaths
+    def _write_reordered(self, datum, raw_filepath, src_record_by,
+                         dst_record_by, identifier):
+        # Empty files cannot be memory-mapped
+        if datum.size == 0:
+            open(raw_filepath, 'wb').close()
+            return
+
+        # Out-of-core conversion through a memory-mapped output file
+        src = np.asarray(datum).reshape(-1)
+        dst = np.memmap(raw_filepath, datum.dtype.newbyteorder('<'), 'w+',
+                        shape=(src.size,))
+
+        nbytes = [0]
+        def callback(fraction):
+            current = int(fraction * datum.nbytes)
+            self._add_progress(current - nbytes[0], identifier)
+            nbytes[0] = current
+            return self.is_cancelled()
+
+        try:
+            convert_record_by(src, dst, self._get_depth(datum),
+                              src_record_by, dst_record_by, callback=callback)
+            dst.flush()
+        finally:
+            del dst
+
+    def _get_depth(self, datum):
+        if isinstance(datum, ImageRaster2DSpectral):
+            return datum.shape[2]
+        elif isinstance(datum, AnalysisList2D):
+            return datum.shape[0]
+        return 1
 
-    def _create_rpl_lines(self, identifier, datum):
+    def _create_rpl_lines(self, identifier, datum, record_by=None):
         lines = []
         lines.append('key\t%s' % identifier)
         lines.append('offset\t0')
 
         if isinstance(datum, ImageRaster2D):
             width, height = datum.shape
-            depth = 1
-            record_by = 'dont-care'
         elif isinstance(datum, ImageRaster2DSpectral):
-            width, height, depth = datum.shape
-            record_by = 'vector'
+            width, height, _depth = datum.shape
         elif isinstance(datum, AnalysisList2D):
-            depth, width, height = datum.shape
-            record_by = 'image'
+            _depth, width, height = datum.shape
         else:
             raise IOError('Unkmown datum type')
+        depth = self._get_depth(datum)
+
+        if record_by is None:
+            record_by = self._get_record_by(datum)
         lines.append('width\t%i' % width)
         lines.append('height\t%i' % height)
         lines.append('depth\t%i' % depth)
@@ -90,8 +206,28 @@ class _ExporterRAWThread(_ExporterThread):
 
 class ExporterRAW(_Exporter):
 
+    def __init__(self, record_by=None, max_workers=None):
+        """
+        Exports to RAW/RPL file format.
+
+        :arg record_by: ordering of the values in the RAW files of datums with
+            more than one channel, either :const:`RAW_RECORD_BY_VECTOR` or
+            :const:`RAW_RECORD_BY_IMAGE`. If ``None``, the ordering of the
+            datum is kept. Otherwise values are reordered by blocks through
+            a memory-mapped output file.
+        :arg max_workers: maximum number of datums exported concurrently
+            (default: chosen by :class:`concurrent.futures.ThreadPoolExecutor`)
+        """
+        super().__init__()
+
+        if record_by not in [None, RAW_RECORD_BY_VECTOR, RAW_RECORD_BY_IMAGE]:
+            raise ValueError('Unknown record-by: %s' % record_by)
+        self._record_by = record_by
+        self._max_workers = max_workers
+
     def _create_thread(self, datafile, dirpath, *args, **kwargs):
-        return _ExporterRAWThread(datafile, dirpath)
+        return _ExporterRAWThread(datafile, dirpath, self._record_by,
+                                  self._max_workers)
 
     def validate(self, datafile):
         super().validate(datafile)
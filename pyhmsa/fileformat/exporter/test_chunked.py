@@ -0,0 +1,76 @@
+""" """
+
+# Standard library modules.
+import unittest
+import logging
+import os
+import json
+import tempfile
+import shutil
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.fileformat.exporter.chunked import ExporterChunked
+from pyhmsa.datafile import DataFile
+from pyhmsa.spec.datum.imageraster import ImageRaster2D
+from pyhmsa.spec.datum.analysis import Analysis1D
+
+# Globals and constants variables.
+
+class TestExporterChunked(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.exp = ExporterChunked(chunks=(3, 2), max_workers=2)
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def testexport(self):
+        datafile = DataFile()
+        datafile.header.title = 'Test'
+        buffer = np.arange(5 * 4, dtype=np.float32).reshape(5, 4)
+        datafile.data['Image'] = ImageRaster2D(5, 4, np.float32, buffer)
+        datafile.data['Spectrum'] = Analysis1D(7, np.uint8, np.arange(7, dtype=np.uint8))
+
+        self.exp.export(datafile, self.tmpdir)
+        filepaths = self.exp.get()
+
+        dirpath = os.path.join(self.tmpdir, 'Test.chunks')
+        self.assertEqual([dirpath], filepaths)
+        self.assertAlmostEqual(1.0, self.exp.progress, 4)
+
+        with open(os.path.join(dirpath, 'index.json'), 'r') as fp:
+            index = json.load(fp)
+        self.assertEqual(2, len(index['data']))
+
+        entry = index['data'][0]
+        self.assertEqual('Image', entry['key'])
+        self.assertEqual([5, 4], entry['shape'])
+        self.assertEqual('<f4', entry['dtype'])
+        self.assertEqual([3, 2], entry['chunks'])
+        self.assertEqual(['0.0', '0.1', '1.0', '1.1'],
+                         sorted(os.listdir(os.path.join(dirpath, entry['path']))))
+
+        with open(os.path.join(dirpath, entry['path'], '1.1'), 'rb') as fp:
+            self.assertEqual(buffer[3:, 2:].tobytes(), fp.read())
+
+        entry = index['data'][1]
+        self.assertEqual([3], entry['chunks'])
+        self.assertEqual(3, len(os.listdir(os.path.join(dirpath, entry['path']))))
+
+    def testcan_export(self):
+        self.assertFalse(self.exp.can_export(DataFile()))
+
+    def test__init__(self):
+        self.assertRaises(ValueError, ExporterChunked, compression='gzip')
+        self.assertRaises(ValueError, ExporterChunked, chunks=(0, 2))
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
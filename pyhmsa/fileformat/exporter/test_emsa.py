@@ -6,18 +6,25 @@ import logging
 import tempfile
 import shutil
 import datetime
+import os
 
 # Third party modules.
 import numpy as np
 
 # Local modules.
 from pyhmsa.fileformat.exporter.emsa import ExporterEMSA
+from pyhmsa.fileformat.importer.emsa import ImporterEMSA
 
 from pyhmsa.datafile import DataFile
 from pyhmsa.spec.condition.detector import DetectorSpectrometerXEDS
 from pyhmsa.spec.condition.calibration import CalibrationLinear
 from pyhmsa.spec.condition.probe import ProbeEM
+from pyhmsa.spec.condition.acquisition import \
+    AcquisitionPoint, AcquisitionMultipoint, AcquisitionRasterXY
+from pyhmsa.spec.condition.specimenposition import SpecimenPosition
 from pyhmsa.spec.datum.analysis import Analysis1D
+from pyhmsa.spec.datum.analysislist import AnalysisList1D
+from pyhmsa.spec.datum.imageraster import ImageRaster2DSpectral
 
 # Globals and constants variables.
 from pyhmsa.spec.condition.detector import XEDS_TECHNOLOGY_SDD, SIGNAL_TYPE_EDS
@@ -81,6 +88,32 @@ class TestExporterEMSA(unittest.TestCase):
         self.assertEqual(279, len(lines))
         self.assertEqual('#CHECKSUM    : 744572', lines[-1])
 
+    def testexport_import_checksum(self):
+        datafile = self._create_datafile()
+        buffer = np.arange(2 * 1024, dtype=np.int32).reshape(2, 1024)
+        datafile.data['Points'] = \
+            AnalysisList1D(2, 1024, np.int32, buffer,
+                           conditions={'EDS': datafile.conditions['EDS']})
+
+        exp = ExporterEMSA(bulk=True, max_workers=2)
+        exp.export(datafile, self.tmpdir)
+        filepaths = exp.get()
+        self.assertEqual(3, len(filepaths))
+
+        # Checksum after the data is verified on import
+        imp = ImporterEMSA()
+        for filepath in filepaths:
+            imp.import_(filepath)
+            self.assertEqual(1024, imp.get().data['Spectrum'].channels)
+
+        with open(filepaths[-1], 'r') as fp:
+            content = fp.read()
+        with open(filepaths[-1], 'w') as fp:
+            fp.write(content.replace('1.024000e+03', '1.025000e+03'))
+
+        imp.import_(filepaths[-1])
+        self.assertRaises(IOError, imp.get)
+
     def testcan_export(self):
         datafile = self._create_datafile()
         self.assertTrue(self.exp.can_export(datafile))
@@ -92,6 +125,116 @@ class TestExporterEMSA(unittest.TestCase):
         del datafile.data['EDS sum spectrum'].conditions['EDS']
         self.assertFalse(self.exp.can_export(datafile))
 
+    def testexport_bulk_raster(self):
+        datafile = self._create_datafile()
+        detector = datafile.conditions['EDS']
+        del datafile.data['EDS sum spectrum']
+
+        buffer = np.random.rand(3, 2, 1024).astype(np.float32)
+        acq = AcquisitionRasterXY(3, 2, 0.5, 0.25)
+        acq.set_position(SpecimenPosition(1.0, 2.0, 3.0))
+        datafile.data['Map'] = \
+            ImageRaster2DSpectral(3, 2, 1024, np.float32, buffer,
+                                  conditions={'EDS': detector, 'Acq': acq})
+
+        exp = ExporterEMSA(bulk=True, max_workers=2, chunk_size=4)
+        exp.export(datafile, self.tmpdir)
+        filepaths = exp.get()
+
+        self.assertEqual(6, len(filepaths))
+        self.assertAlmostEqual(1.0, exp.progress, 4)
+
+        # Compare with the export of each pixel as an analysis
+        expected_datafile = self._create_datafile()
+        del expected_datafile.data['EDS sum spectrum']
+        expected_dirpath = os.path.join(self.tmpdir, 'expected')
+        os.mkdir(expected_dirpath)
+
+        for x in range(3):
+            for y in range(2):
+                datum = datafile.data['Map'].toanalysis(x, y)
+                position = datafile.data['Map'].get_position(x, y)
+                datum.conditions['Acq'] = AcquisitionPoint(position)
+                expected_datafile.data['Map_%i_%i' % (x, y)] = datum
+
+        self.exp.export(expected_datafile, expected_dirpath)
+        self.exp.get()
+
+        for filepath in filepaths:
+            expected_filepath = os.path.join(expected_dirpath,
+                                             os.path.basename(filepath))
+            with open(filepath, 'r') as fp1, open(expected_filepath, 'r') as fp2:
+                self.assertEqual(fp2.read(), fp1.read())
+
+    def testexport_bulk_analysislist(self):
+        datafile = self._create_datafile()
+        detector = datafile.conditions['EDS']
+
+        buffer = np.arange(5 * 1024, dtype=np.int32).reshape(5, 1024)
+        datafile.data['Points'] = \
+            AnalysisList1D(5, 1024, np.int32, buffer,
+                           conditions={'EDS': detector})
+
+        exp = ExporterEMSA(bulk=True, max_workers=2)
+        exp.export(datafile, self.tmpdir)
+        filepaths = exp.get()
+
+        self.assertEqual(6, len(filepaths))
+        self.assertTrue(filepaths[-1].endswith('_Points_4.emsa'))
+
+        with open(filepaths[0], 'r') as fp:
+            lines = fp.readlines()
+        self.assertEqual('#CHECKSUM    : 744572', lines[-1])
+
+    def testexport_bulk_analysislist_positions(self):
+        datafile = self._create_datafile()
+        detector = datafile.conditions['EDS']
+        del datafile.data['EDS sum spectrum']
+
+        positions = [SpecimenPosition(i, 2 * i) for i in range(3)]
+        acq = AcquisitionMultipoint(positions)
+        datafile.data['Points'] = \
+            AnalysisList1D(3, 1024, np.int32, conditions={'EDS': detector,
+                                                          'Acq': acq})
+
+        exp = ExporterEMSA(bulk=True, max_workers=2)
+        exp.export(datafile, self.tmpdir)
+        filepaths = exp.get()
+
+        self.assertEqual(3, len(filepaths))
+
+        imp = ImporterEMSA()
+        for i, filepath in enumerate(filepaths):
+            with open(filepath, 'r') as fp:
+                lines = fp.read().splitlines()
+            self.assertIn('#XPOSITION   : %s' % float(i), lines)
+            self.assertIn('#YPOSITION   : %s' % float(2 * i), lines)
+            self.assertFalse(any(line.startswith('#ZPOSITION') for line in lines))
+
+            imp.import_(filepath)
+            imp.get() # validates the checksum
+
+    def testexport_bulk_cancelled(self):
+        datafile = self._create_datafile()
+        detector = datafile.conditions['EDS']
+        datafile.data['Points'] = \
+            AnalysisList1D(5, 1024, conditions={'EDS': detector})
+
+        exp = ExporterEMSA(bulk=True)
+        thread = exp._create_thread(datafile, self.tmpdir)
+        thread.cancel()
+        self.assertEqual([], thread._run(datafile, self.tmpdir, bulk=True))
+        self.assertEqual([], os.listdir(self.tmpdir))
+
+    def testcan_export_bulk(self):
+        datafile = DataFile()
+        datafile.conditions['EDS'] = self._create_datafile().conditions['EDS']
+        datafile.data['Points'] = \
+            AnalysisList1D(5, 1024, conditions={'EDS': datafile.conditions['EDS']})
+
+        self.assertFalse(self.exp.can_export(datafile))
+        self.assertTrue(ExporterEMSA(bulk=True).can_export(datafile))
+
 if __name__ == '__main__': #pragma: no cover
     logging.getLogger().setLevel(logging.DEBUG)
     unittest.main()
@@ -0,0 +1,67 @@
+""" """
+
+# Standard library modules.
+import unittest
+import logging
+import os
+import json
+import tempfile
+import shutil
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.fileformat.exporter.npy import ExporterNPY
+from pyhmsa.datafile import DataFile
+from pyhmsa.spec.datum.imageraster import ImageRaster2DSpectral
+from pyhmsa.spec.condition.detector import DetectorSpectrometerXEDS
+from pyhmsa.spec.condition.calibration import CalibrationLinear
+
+# Globals and constants variables.
+
+class TestExporterNPY(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.exp = ExporterNPY()
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def testexport(self):
+        datafile = DataFile()
+        datafile.header.title = 'Map'
+
+        calibration = CalibrationLinear('Energy', 'eV', 10.0, 0.0)
+        datafile.conditions['EDS'] = DetectorSpectrometerXEDS(5, calibration)
+
+        buffer = np.arange(3 * 4 * 5, dtype=np.uint16).reshape(3, 4, 5)
+        datafile.data['Spectra'] = \
+            ImageRaster2DSpectral(3, 4, 5, np.uint16, buffer,
+                                  conditions={'EDS': datafile.conditions['EDS']})
+
+        self.exp.export(datafile, self.tmpdir)
+        filepaths = self.exp.get()
+
+        self.assertEqual(1, len(filepaths))
+        self.assertEqual(os.path.join(self.tmpdir, 'Map_Spectra.npy'),
+                         filepaths[0])
+        np.testing.assert_array_equal(buffer, np.load(filepaths[0]))
+
+        with open(os.path.join(self.tmpdir, 'Map_Spectra.json'), 'r') as fp:
+            sidecar = json.load(fp)
+        self.assertEqual('Spectra', sidecar['key'])
+        self.assertEqual('pyhmsa.spec.datum.imageraster:ImageRaster2DSpectral',
+                         sidecar['class'])
+        self.assertEqual(['EDS'], sidecar['conditions'])
+
+    def testcan_export(self):
+        self.assertFalse(self.exp.can_export(DataFile()))
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
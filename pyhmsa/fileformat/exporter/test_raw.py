@@ -6,14 +6,20 @@ import logging
 import os
 import tempfile
 import shutil
+import threading
 
 # Third party modules.
+import numpy as np
 
 # Local modules.
 from pyhmsa.fileformat.exporter.raw import ExporterRAW
 from pyhmsa.fileformat.importer.raw import ImporterRAW
+from pyhmsa.datafile import DataFile
+from pyhmsa.spec.datum.analysislist import AnalysisList2D
+from pyhmsa.spec.datum.imageraster import ImageRaster2D, ImageRaster2DSpectral
 
 # Globals and constants variables.
+from pyhmsa.fileformat.common.raw import RAW_RECORD_BY_IMAGE
 
 class TestExporterRAW(unittest.TestCase):
 
@@ -41,6 +47,120 @@ class TestExporterRAW(unittest.TestCase):
         with open(filepath, 'rb') as fp1, open(filepaths[0], 'rb') as fp2:
             self.assertEqual(fp1.read(), fp2.read())
 
+    def testexport_image(self):
+        filepath = os.path.join(self.testdata, 'bruker_bcf_fileformat_16x16.raw')
+        imp = ImporterRAW()
+        imp.import_(filepath)
+        datafile = imp.get()
+
+        exp = ExporterRAW(record_by=RAW_RECORD_BY_IMAGE)
+        exp.export(datafile, self.tmpdir)
+        filepaths = exp.get()
+
+        imp.import_(filepaths[0])
+        datum = next(iter(imp.get().data.values()))
+        self.assertIsInstance(datum, AnalysisList2D)
+        np.testing.assert_array_equal(np.rollaxis(next(iter(datafile.data.values())), 2),
+                                      datum)
+
+    def testexport_byteorder(self):
+        buffer = np.arange(4 * 5 * 3, dtype='>u2').reshape(4, 5, 3)
+        datafile = DataFile()
+        datafile.data['Map'] = buffer.view(ImageRaster2DSpectral)
+
+        self.exp.export(datafile, self.tmpdir)
+        filepaths = self.exp.get()
+
+        with open(filepaths[0], 'rb') as fp:
+            self.assertEqual(buffer.astype('<u2').tobytes(), fp.read())
+
+    def testexport_chunks(self):
+        datafile = DataFile()
+        datafile.data['Map'] = ImageRaster2DSpectral(16, 8, 4, np.float32)
+        datafile.data['Map'][...] = np.random.rand(16, 8, 4)
+
+        thread = self.exp._create_thread(datafile, self.tmpdir)
+        filepath = os.path.join(self.tmpdir, 'map.raw')
+        thread._progress_lock = threading.Lock()
+        thread._bytes_written = 0
+        thread._bytes_total = datafile.data['Map'].nbytes
+        thread._write(datafile.data['Map'], filepath, 'Map', chunk_size=100)
+
+        self.assertAlmostEqual(1.0, thread.progress, 4)
+        with open(filepath, 'rb') as fp:
+            self.assertEqual(datafile.data['Map'].tobytes(), fp.read())
+
+    def testexport_image_empty(self):
+        datafile = DataFile()
+        datafile.data['Map'] = \
+            np.zeros((0, 5, 3), np.float32).view(ImageRaster2DSpectral)
+
+        exp = ExporterRAW(record_by=RAW_RECORD_BY_IMAGE)
+        exp.export(datafile, self.tmpdir)
+        filepaths = exp.get()
+
+        self.assertEqual(1, len(filepaths))
+        self.assertEqual(0, os.path.getsize(filepaths[0]))
+
+    def testexport_cancelled(self):
+        datafile = DataFile()
+        datafile.data['Image'] = ImageRaster2D(6, 7, np.int32)
+
+        thread = self.exp._create_thread(datafile, self.tmpdir)
+        thread.cancel()
+        self.assertEqual([], thread._run(datafile, self.tmpdir))
+
+    def testexport_cancelled_partial(self):
+        datafile = DataFile()
+        datafile.data['Map'] = ImageRaster2DSpectral(6, 7, 5, np.int32)
+
+        for record_by in [None, RAW_RECORD_BY_IMAGE]:
+            exp = ExporterRAW(record_by)
+            thread = exp._create_thread(datafile, self.tmpdir)
+
+            # Cancel once the first values are written
+            add_progress = thread._add_progress
+            def cancel(nbytes, identifier):
+                add_progress(nbytes, identifier)
+                thread.cancel()
+            thread._add_progress = cancel
+
+            self.assertEqual([], thread._run(datafile, self.tmpdir, record_by))
+            self.assertEqual([], os.listdir(self.tmpdir))
+
+    def testexport_error(self):
+        datafile = DataFile()
+        datafile.data['Image'] = ImageRaster2D(6, 7, np.int32)
+
+        thread = self.exp._create_thread(datafile, self.tmpdir)
+        def write(*args, **kwargs):
+            raise IOError('Disk full')
+        thread._write = write
+
+        self.assertRaises(IOError, thread._run, datafile, self.tmpdir)
+        self.assertEqual([], os.listdir(self.tmpdir))
+
+    def testexport_multiple(self):
+        datafile = DataFile()
+        for i in range(4):
+            datum = ImageRaster2D(6, 7, np.int32)
+            datum[...] = i
+            datafile.data['Image%i' % i] = datum
+
+        exp = ExporterRAW(max_workers=2)
+        exp.export(datafile, self.tmpdir)
+        filepaths = exp.get()
+
+        self.assertEqual(4, len(filepaths))
+        self.assertAlmostEqual(1.0, exp.progress, 4)
+
+        imp = ImporterRAW()
+        for i, filepath in enumerate(filepaths):
+            self.assertTrue(filepath.endswith('Image%i.raw' % i))
+            imp.import_(filepath)
+            datum = next(iter(imp.get().data.values()))
+            np.testing.assert_array_equal(datafile.data['Image%i' % i], datum)
+
 if __name__ == '__main__': #pragma: no cover
     logging.getLogger().setLevel(logging.DEBUG)
     unittest.main()
@@ -0,0 +1,58 @@
+"""
+Import from a chunked directory store
+"""
+
+# Standard library modules.
+import os
+
+# Third party modules.
+
+# Local modules.
+from pyhmsa.fileformat.importer.importer import _Importer, _ImporterThread
+from pyhmsa.fileformat.common.chunked import ChunkedStore
+from pyhmsa.datafile import DataFile
+
+# Globals and constants variables.
+from pyhmsa.fileformat.common.chunked import CHUNKED_INDEX_FILENAME
+
+class _ImporterChunkedThread(_ImporterThread):
+
+    def _run(self, dirpath, *args, **kwargs):
+        self._update_status(0.0, 'Reading index')
+        store = ChunkedStore(dirpath)
+
+        datafile = DataFile()
+        datafile.header.update(store.header)
+        datafile.conditions.update(store.conditions)
+
+        keys = list(store.keys())
+        length = len(keys)
+        for i, identifier in enumerate(keys):
+            if self.is_cancelled(): return
+
+            self._update_status(i / length, 'Reading %s' % identifier)
+            datafile.data[identifier] = store[identifier].todatum()
+
+        return datafile
+
+class ImporterChunked(_Importer):
+    """
+    Imports all datums of a chunked directory store.
+    Use :class:`ChunkedStore <pyhmsa.fileformat.common.chunked.ChunkedStore>`
+    to only read the chunks of the datums that are needed.
+    """
+
+    SUPPORTED_EXTENSIONS = ('.chunks',)
+
+    def _create_thread(self, filepath, *args, **kwargs):
+        return _ImporterChunkedThread(filepath)
+
+    def probe(self, filepath, head):
+        return os.path.isfile(os.path.join(filepath, CHUNKED_INDEX_FILENAME))
+
+    def validate(self, filepath):
+        _Importer.validate(self, filepath.rstrip('/\\'))
+
+        index_filepath = os.path.join(filepath, CHUNKED_INDEX_FILENAME)
+        if not os.path.exists(index_filepath):
+            raise IOError('Index file "%s" is missing' % index_filepath)
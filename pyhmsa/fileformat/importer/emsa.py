@@ -3,6 +3,8 @@ Importer from EMSA file format
 """
 
 # Standard library modules.
+import re
+import codecs
 import datetime
 
 # Third party modules.
@@ -53,68 +55,105 @@ _EDSDET_TO_XEDS_TECHNOLOGY = \
      EMSA_EDS_DETECTOR_SDWLS: XEDS_TECHNOLOGY_SDD,
      EMSA_EDS_DETECTOR_UCALUTW: XEDS_TECHNOLOGY_UCAL}
 
+_SPECTRUM_LINE_PATTERN = \
+    re.compile(br'^[ \t]*#SPECTRUM[^\n]*(\n|$)', re.MULTILINE | re.IGNORECASE)
+_DATA_LINE_PATTERN = re.compile(br'^[ \t]*[^#\s]', re.MULTILINE)
+_KEYWORD_LINE_PATTERN = re.compile(br'^[ \t]*#', re.MULTILINE)
+_FORMAT_LINE_PATTERN = \
+    re.compile(br'^[ \t]*#FORMAT\s*:\s*EMSA/MAS', re.MULTILINE | re.IGNORECASE)
+
 class _ImporterEMSAThread(_ImporterThread):
 
     def _run(self, filepath, *args, **kwargs):
-        emsa_file = None
-        try:
-            # Parse EMSA file
-            emsa_file = open(filepath, 'rt')
-            lines = emsa_file.readlines()
+        # Parse EMSA file
+        with open(filepath, 'rb') as emsa_file:
+            content = emsa_file.read()
 
-            self._update_status(0.1, 'Verify checksum')
-            self._verify_checksum(lines)
+        self._update_status(0.05, 'Locate data')
+        header_lines, data, footer_lines = self._split_content(content)
 
-            self._update_status(0.2, 'Parse keywords')
-            keywords = self._parse_keywords(lines)
+        self._update_status(0.1, 'Verify checksum')
+        self._verify_checksum(content, header_lines + footer_lines)
 
-            self._update_status(0.3, 'Parse data')
-            buffer = self._parse_data(lines, keywords)
+        self._update_status(0.2, 'Parse keywords')
+        keywords = self._parse_keywords(header_lines)
 
-            # Create data file
-            datafile = DataFile()
+        self._update_status(0.3, 'Parse data')
+        buffer = self._parse_data(data, keywords)
 
-            self._update_status(0.4, 'Extracting header')
-            datafile.header.update(self._extract_header(keywords))
+        # Create data file
+        datafile = DataFile()
 
-            self._update_status(0.5, 'Extracting probe')
-            datafile.conditions.update(self._extract_probe(keywords))
+        self._update_status(0.4, 'Extracting header')
+        datafile.header.update(self._extract_header(keywords))
 
-            self._update_status(0.6, 'Extracting acquisition')
-            datafile.conditions.update(self._extract_acquisition(keywords))
+        self._update_status(0.5, 'Extracting probe')
+        datafile.conditions.update(self._extract_probe(keywords))
 
-            self._update_status(0.7, 'Extracting detector')
-            datafile.conditions.update(self._extract_detector(keywords))
+        self._update_status(0.6, 'Extracting acquisition')
+        datafile.conditions.update(self._extract_acquisition(keywords))
 
-            datum = Analysis1D(len(buffer), dtype=buffer.dtype,
-                               buffer=np.ravel(buffer),
-                               conditions=datafile.conditions)
-            datafile.data['Spectrum'] = datum
-        finally:
-            if emsa_file is not None:
-                emsa_file.close()
+        self._update_status(0.7, 'Extracting detector')
+        datafile.conditions.update(self._extract_detector(keywords))
+
+        datum = Analysis1D(len(buffer), dtype=buffer.dtype,
+                           buffer=np.ravel(buffer),
+                           conditions=datafile.conditions)
+        datafile.data['Spectrum'] = datum
 
         return datafile
 
+    def _split_content(self, content):
+        """
+        Splits the content of the file in the keyword lines before the data,
+        the data block and the keyword lines after the data.
+        The data block is returned as bytes.
+        """
+        if b'\n' not in content: # Only carriage returns
+            content = content.replace(b'\r', b'\n')
+
+        match = _SPECTRUM_LINE_PATTERN.search(content)
+        if match:
+            start = match.end()
+        else:
+            match = _DATA_LINE_PATTERN.search(content)
+            start = match.start() if match else len(content)
+
+        match = _KEYWORD_LINE_PATTERN.search(content, start)
+        end = match.start() if match else len(content)
+
+        header_lines = content[:start].decode('utf-8', 'replace').splitlines()
+        footer_lines = content[end:].decode('utf-8', 'replace').splitlines()
+
+        return header_lines, content[start:end], footer_lines
+
     def _is_line_keyword(self, line):
         try:
             return line.strip()[0] == '#'
         except:
             return False
 
-    def _verify_checksum(self, lines):
+    def _verify_checksum(self, content, lines):
+        expected_checksum = None
+
         for line in lines:
             if not self._is_line_keyword(line):
                 continue
 
-            tag, _comment, expected_checksum = self._parse_keyword_line(line)
-            if tag == 'ENDOFDATA':
-                return # No checksum
-
+            tag, _comment, value = self._parse_keyword_line(line)
             if tag == 'CHECKSUM':
+                expected_checksum = int(value)
                 break
 
-        actual_checksum = calculate_checksum(lines)
+        if expected_checksum is None:
+            return
+
+        actual_checksum = calculate_checksum(content)
+        if actual_checksum != expected_checksum:
+            # Checksum of the characters without line terminators, as
+            # written by the exporter
+            lines = content.decode('utf-8', 'replace').splitlines()
+            actual_checksum = calculate_checksum(lines)
         if actual_checksum != expected_checksum:
             raise IOError("The checksums don't match: %i != %i " % \
                           (actual_checksum, expected_checksum))
@@ -160,9 +199,9 @@ class _ImporterEMSAThread(_ImporterThread):
 
         return tag, comment, value
 
-    def _parse_data(self, lines, keywords):
-        # Filter to get only data lines
-        lines = filter(lambda line: not self._is_line_keyword(line), lines)
+    def _parse_data(self, data, keywords):
+        # Parse all values at once, values are separated by commas or spaces
+        values = np.array(data.replace(b',', b' ').split(), np.float64)
 
         # Read based on data type
         datatype = keywords.get('DATATYPE')
@@ -171,9 +210,9 @@ class _ImporterEMSAThread(_ImporterThread):
 
         datatype = datatype.upper()
         if datatype == 'XY':
-            data = self._parse_data_xy(lines, keywords)
+            data = self._parse_data_xy(values, keywords)
         elif datatype == 'Y':
-            data = self._parse_data_y(lines, keywords)
+            data = self._parse_data_y(values, keywords)
         else:
             raise ValueError('Unknown data type')
 
@@ -185,34 +224,13 @@ class _ImporterEMSAThread(_ImporterThread):
 
         return data
 
-    def _parse_data_xy(self, lines, keywords):
-        data = []
+    def _parse_data_xy(self, values, keywords):
+        if len(values) % 2 != 0:
+            raise ValueError('Odd number of values for XY data type')
+        return values.reshape(-1, 2)[:, 1]
 
-        for line in lines:
-            data.append(self._parse_data_line(line))
-
-        return np.array(data)[:, 1]
-
-    def _parse_data_y(self, lines, keywords):
-        ydata = []
-        for line in lines:
-            ydata.extend(self._parse_data_line(line))
-
-        return np.array(ydata)
-
-    def _parse_data_line(self, line):
-        # Split values separated by a comma
-        tmprow = [value.strip() for value in line.split(',')]
-
-        # Split values separated by a space
-        row = []
-        for value in tmprow:
-            row.extend(value.split())
-
-        # Convert to float
-        row = list(map(float, row))
-
-        return row
+    def _parse_data_y(self, values, keywords):
+        return values
 
     def _extract_header(self, keywords):
         header = Header()
@@ -343,3 +361,17 @@ class ImporterEMSA(_Importer):
 
     def _create_thread(self, filepath, *args, **kwargs):
         return _ImporterEMSAThread(filepath)
+
+    def probe(self, filepath, head):
+        # The FORMAT keyword may be any of the keyword lines before the data
+        if head.startswith(codecs.BOM_UTF8):
+            head = head[len(codecs.BOM_UTF8):]
+        if b'\n' not in head: # Only carriage returns
+            head = head.replace(b'\r', b'\n')
+
+        match = _SPECTRUM_LINE_PATTERN.search(head) or \
+            _DATA_LINE_PATTERN.search(head)
+        if match:
+            head = head[:match.start()]
+
+        return _FORMAT_LINE_PATTERN.search(head) is not None
@@ -0,0 +1,60 @@
+"""
+Import from MSA hyper dimensional data file format (HMSA)
+
+Allows HMSA files to be imported like the other file formats, for instance
+with :func:`import_ <pyhmsa.fileformat.importer.importer.import_>`.
+"""
+
+# Standard library modules.
+import os
+import re
+import binascii
+
+# Third party modules.
+
+# Local modules.
+from pyhmsa.fileformat.importer.importer import \
+    _Importer, _ImporterThread, read_head
+from pyhmsa.fileformat.datafile import _extract_filepath
+from pyhmsa.datafile import DataFile
+
+# Globals and constants variables.
+
+_ROOT_PATTERN = re.compile(br'<MSAHyperDimensionalDataFile\b[^>]*?\bUID="([0-9A-Fa-f]{16})"')
+
+class _ImporterHMSAThread(_ImporterThread):
+
+    def _run(self, filepath, *args, **kwargs):
+        self._update_status(0.0, 'Reading')
+        return DataFile.read(filepath)
+
+class ImporterHMSA(_Importer):
+
+    SUPPORTED_EXTENSIONS = ('.xml', '.hmsa')
+
+    def _create_thread(self, filepath, *args, **kwargs):
+        return _ImporterHMSAThread(filepath)
+
+    def probe(self, filepath, head):
+        try:
+            xml_filepath, hmsa_filepath = _extract_filepath(filepath)
+        except IOError:
+            return False
+        ext = os.path.splitext(filepath)[1].lower()
+
+        # Root element of the XML file and UID in the first 8 bytes of
+        # the HMSA file
+        xml_head = head if ext == '.xml' else read_head(xml_filepath)
+        match = _ROOT_PATTERN.search(xml_head)
+        if match is None:
+            return False
+
+        hmsa_head = head if ext == '.hmsa' else read_head(hmsa_filepath, 8)
+        return binascii.hexlify(hmsa_head[:8]).upper() == match.group(1).upper()
+
+    def validate(self, filepath):
+        _Importer.validate(self, filepath)
+
+        for companion_filepath in _extract_filepath(filepath):
+            if not os.path.exists(companion_filepath):
+                raise IOError('File "%s" is missing' % companion_filepath)
@@ -5,6 +5,10 @@ Base class for importers
 # Standard library modules.
 import os
 import sys
+import copy
+import fnmatch
+import itertools
+import threading
 import logging
 logger = logging.getLogger(__name__)
 
@@ -17,6 +21,67 @@ from pyhmsa.util.monitorable import _Monitorable, _MonitorableThread
 
 # Globals and constants variables.
 
+_EXTRA_DATAFILES = {}
+_EXTRA_DATAFILES_LOCK = threading.Lock()
+
+_IMPORTER_CLASSES = []
+_IMPORTER_CLASSES_LOCK = threading.Lock()
+
+_IMPORTERS = threading.local()
+
+PROBE_SIZE = 4096 # bytes
+
+def read_head(filepath, size=PROBE_SIZE):
+    """
+    Returns at most the first *size* bytes of a file, or empty bytes if the
+    file cannot be read (e.g. a directory).
+    """
+    try:
+        with open(filepath, 'rb') as fp:
+            return fp.read(size)
+    except (IOError, OSError):
+        return b''
+
+def _glob_extra_filepaths(suffix=''):
+    dirpaths = []
+    dirpaths.append(os.path.expanduser('~/.pyhmsa'))
+    if getattr(sys, "frozen", False):
+        dirpaths.append(os.path.dirname(os.path.abspath(sys.executable)))
+
+    filepaths = []
+    for dirpath in dirpaths:
+        filename = 'importer_extra%s.xml' % suffix
+        filepath = os.path.join(dirpath, filename)
+        if os.path.exists(filepath):
+            filepaths.append(filepath)
+
+    return filepaths
+
+def _get_mtime(filepath):
+    try:
+        return os.stat(filepath).st_mtime_ns
+    except OSError:
+        return None
+
+def _read_extra_datafile(filepath):
+    """
+    Returns the extra data file, only read again if it was modified.
+    The returned data file is shared and should not be modified.
+    """
+    mtime = _get_mtime(filepath)
+
+    with _EXTRA_DATAFILES_LOCK:
+        cached = _EXTRA_DATAFILES.get(filepath)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+    datafile = DataFile.read(filepath)
+
+    with _EXTRA_DATAFILES_LOCK:
+        _EXTRA_DATAFILES[filepath] = (mtime, datafile)
+
+    return datafile
+
 class _ImporterThread(_MonitorableThread):
 
     def __init__(self, filepath, *args, **kwargs):
@@ -41,24 +106,27 @@ class _Importer(_Monitorable):
 
             for filepath in self._glob_extra_filepaths():
                 logger.debug('Found %s' % filepath)
-                extra_datafile.update(DataFile.read(filepath))
+                extra_datafile.update(_read_extra_datafile(filepath))
 
         self._extra_datafile = extra_datafile
+        self._extra_index = self._create_extra_index(extra_datafile)
 
     def _glob_extra_filepaths(self, suffix=''):
-        dirpaths = []
-        dirpaths.append(os.path.expanduser('~/.pyhmsa'))
-        if getattr(sys, "frozen", False):
-            dirpaths.append(os.path.dirname(os.path.abspath(sys.executable)))
+        return _glob_extra_filepaths(suffix)
+
+    def _create_extra_index(self, extra_datafile):
+        # Non-empty attributes of the extra conditions, indexed by type
+        index = {}
+        for extra_name, extra_condition in extra_datafile.conditions.items():
+            values = []
+            for attr in extra_condition.__attributes__.keys():
+                value = getattr(extra_condition, attr, None)
+                if value is not None:
+                    values.append((attr, value))
 
-        filepaths = []
-        for dirpath in dirpaths:
-            filename = 'importer_extra%s.xml' % suffix
-            filepath = os.path.join(dirpath, filename)
-            if os.path.exists(filepath):
-                filepaths.append(filepath)
+            index.setdefault(type(extra_condition), []).append((extra_name + '*', values))
 
-        return filepaths
+        return index
 
     def _update_extra(self, datafile):
         # Header
@@ -67,25 +135,37 @@ class _Importer(_Monitorable):
                 datafile.header[key] = value
 
         # Conditions
-        for extra_name, extra_condition in self._extra_datafile.conditions.items():
-            conditions = datafile.conditions.findvalues(extra_name + '*')
+        if not self._extra_index:
+            return
 
-            for condition in conditions:
-                if type(condition) is not type(extra_condition):
+        for identifier, condition in datafile.conditions.items():
+            for pattern, values in self._extra_index.get(type(condition), []):
+                if not fnmatch.fnmatch(identifier, pattern):
                     continue
 
-                for attr in condition.__attributes__.keys():
+                # Values are copied, since the extra conditions are shared
+                for attr, value in values:
                     if getattr(condition, attr, None) is None:
-                        value = getattr(extra_condition, attr, None)
-                        setattr(condition, attr, value)
+                        setattr(condition, attr, copy.deepcopy(value))
 
     def _create_thread(self, filepath, *args, **kwargs):
         args = (filepath,) + args
         _Monitorable._create_thread(self, *args, **kwargs)
 
+    def probe(self, filepath, head):
+        """
+        Returns ``True`` if the content of the file is supported by this
+        importer, ``False`` if it is not and ``None`` if it cannot be
+        determined. Implementations should be cheap: only *head*, the first
+        bytes of the file (see :const:`PROBE_SIZE`), and the beginning of
+        companion files should be read.
+        """
+        return None
+
     def validate(self, filepath):
         ext = os.path.splitext(filepath)[1]
-        if ext.lower() not in self.SUPPORTED_EXTENSIONS:
+        if ext.lower() not in self.SUPPORTED_EXTENSIONS and \
+                not self.probe(filepath, read_head(filepath)):
             raise ValueError('%s is not a supported extension' % ext)
 
     def can_import(self, filepath):
@@ -108,21 +188,104 @@ class _Importer(_Monitorable):
         self._update_extra(datafile)
         return datafile
 
-def find_importers(filepath, extra_datafile=None, search_extra=True, *args, **kwargs):
-    # Load importers
+def _get_importer_classes():
+    # Entry points are only resolved once per process
+    with _IMPORTER_CLASSES_LOCK:
+        if not _IMPORTER_CLASSES:
+            for entry_point in iter_entry_points('pyhmsa.fileformat.importer'):
+                _IMPORTER_CLASSES.append(entry_point.resolve())
+        return list(_IMPORTER_CLASSES)
+
+def _create_importers(extra_datafile, search_extra, *args, **kwargs):
     importers = {}
-    for entry_point in iter_entry_points('pyhmsa.fileformat.importer'):
-        importer_class = entry_point.resolve()
+    for importer_class in _get_importer_classes():
         importer = importer_class(extra_datafile=extra_datafile,
                                   search_extra=search_extra,
                                   *args, **kwargs)
         for ext in importer.SUPPORTED_EXTENSIONS:
             importers.setdefault(ext, []).append(importer)
-
-    # Find importers
-    ext = os.path.splitext(filepath)[1]
+    return importers
+
+def _get_importers(extra_datafile, search_extra, *args, **kwargs):
+    # Importer instances are reused by the later calls of the same thread
+    # with the same arguments, unless one of them is still importing a file.
+    # The cache key includes the modification times of the extra files.
+    if extra_datafile is not None:
+        return _create_importers(extra_datafile, search_extra, *args, **kwargs)
+
+    mtimes = ()
+    if search_extra:
+        mtimes = tuple((filepath, _get_mtime(filepath))
+                       for filepath in _glob_extra_filepaths())
+    key = (search_extra, args, tuple(sorted(kwargs.items())), mtimes)
+
+    try:
+        hash(key)
+    except TypeError:
+        return _create_importers(extra_datafile, search_extra, *args, **kwargs)
+
+    if not hasattr(_IMPORTERS, 'cache'):
+        _IMPORTERS.cache = {}
+
+    importers = _IMPORTERS.cache.get(key)
+    if importers is None or \
+            any(importer.is_alive()
+                for importer in itertools.chain.from_iterable(importers.values())):
+        importers = _create_importers(extra_datafile, search_extra, *args, **kwargs)
+        _IMPORTERS.cache[key] = importers
+
+    return importers
+
+def _probe_importers(filepath, importers):
+    # Probe content, the head of the file is read once for all importers
+    head = read_head(filepath)
+    probes = {}
+    for importer in itertools.chain.from_iterable(importers.values()):
+        if importer not in probes:
+            probes[importer] = importer.probe(filepath, head)
+
+    found = [importer for importer, result in probes.items() if result]
+    if found:
+        return found
+
+    # Find importers by extension, a probe that fails is not conclusive
+    # since the content of some files does not follow the specification
+    ext = os.path.splitext(filepath)[1].lower()
     return list(filter(lambda v: v.can_import(filepath), importers.get(ext, [])))
 
+def find_importers(filepath, extra_datafile=None, search_extra=True, *args, **kwargs):
+    importers = _get_importers(extra_datafile, search_extra, *args, **kwargs)
+    return _probe_importers(filepath, importers)
+
+def classify(filepaths, extra_datafile=None, search_extra=True, *args, **kwargs):
+    """
+    Finds the importers of several files.
+    The importers are created once to probe all files and the head of each
+    file is read once.
+
+    :arg filepaths: iterable of file paths
+
+    :return: :class:`dict` of the importers found for each file path.
+        Importers of different files are different instances, so files can
+        be imported concurrently.
+    """
+    importers = _get_importers(extra_datafile, search_extra, *args, **kwargs)
+    used = set()
+
+    results = {}
+    for filepath in filepaths:
+        found = []
+        for importer in _probe_importers(filepath, importers):
+            if importer in used:
+                importer = type(importer)(extra_datafile=extra_datafile,
+                                          search_extra=search_extra,
+                                          *args, **kwargs)
+            used.add(importer)
+            found.append(importer)
+        results[filepath] = found
+
+    return results
+
 def import_(filepath, extra_datafile=None, search_extra=True, *args, **kwargs):
     importers = find_importers(filepath, extra_datafile, search_extra, *args, **kwargs)
 
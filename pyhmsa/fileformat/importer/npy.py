@@ -0,0 +1,91 @@
+"""
+Import from NumPy .npy file format
+
+The .npy file must be accompanied by the JSON sidecar file written by
+:class:`ExporterNPY <pyhmsa.fileformat.exporter.npy.ExporterNPY>`.
+"""
+
+# Standard library modules.
+import os
+import json
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.fileformat.importer.importer import _Importer, _ImporterThread
+from pyhmsa.fileformat.common.metadata import parse_metadata, resolve_class
+
+# Globals and constants variables.
+
+class _ImporterNPYThread(_ImporterThread):
+
+    def __init__(self, npy_filepath, mmap=False):
+        json_filepath = os.path.splitext(npy_filepath)[0] + '.json'
+        super().__init__(npy_filepath, json_filepath, mmap)
+
+    def _run(self, npy_filepath, json_filepath, mmap, *args, **kwargs):
+        # Read sidecar
+        self._update_status(0.1, 'Reading sidecar')
+
+        with open(json_filepath, 'r') as fp:
+            sidecar = json.load(fp)
+
+        for name in ['key', 'class', 'conditions', 'metadata']:
+            if name not in sidecar:
+                raise IOError('Missing "%s" in sidecar file' % name)
+
+        datafile = parse_metadata(sidecar['metadata'].encode('utf-8'))
+
+        # Read values
+        self._update_status(0.5, 'Reading values')
+
+        values = np.load(npy_filepath, mmap_mode='r' if mmap else None,
+                         allow_pickle=False)
+
+        # Create datum
+        self._update_status(0.9, 'Create datum')
+
+        try:
+            clasz = resolve_class(sidecar['class'])
+        except ValueError as ex:
+            raise IOError(str(ex))
+
+        datum = values.view(clasz)
+        for identifier in sidecar['conditions']:
+            if identifier not in datafile.conditions:
+                raise IOError('Unknown condition: %s' % identifier)
+            datum.conditions[identifier] = datafile.conditions[identifier]
+
+        datafile.data[sidecar['key']] = datum
+
+        return datafile
+
+class ImporterNPY(_Importer):
+
+    SUPPORTED_EXTENSIONS = ('.npy',)
+
+    def __init__(self, extra_datafile=None, search_extra=True, mmap=False):
+        """
+        Imports a .npy file and its JSON sidecar file.
+
+        :arg mmap: whether to memory-map the .npy file instead of reading it.
+            The datum is then a read-only view on the file and its values are
+            only loaded from disk when they are accessed.
+        """
+        super().__init__(extra_datafile, search_extra)
+        self._mmap = mmap
+
+    def _create_thread(self, filepath, *args, **kwargs):
+        return _ImporterNPYThread(filepath, self._mmap)
+
+    def probe(self, filepath, head):
+        json_filepath = os.path.splitext(filepath)[0] + '.json'
+        return head.startswith(b'\x93NUMPY') and os.path.exists(json_filepath)
+
+    def validate(self, filepath):
+        _Importer.validate(self, filepath)
+
+        json_filepath = os.path.splitext(filepath)[0] + '.json'
+        if not os.path.exists(json_filepath):
+            raise IOError('Sidecar file "%s" is missing' % json_filepath)
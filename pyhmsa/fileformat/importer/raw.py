@@ -8,6 +8,9 @@ http://www.nist.gov/lispix/doc/image-file-formats/raw-file-format.htm
 
 # Standard library modules.
 import os
+import glob
+import tempfile
+import concurrent.futures
 import logging
 logger = logging.getLogger(__name__)
 
@@ -15,23 +18,96 @@ logger = logging.getLogger(__name__)
 import numpy as np
 
 # Local modules.
-from pyhmsa.fileformat.importer.importer import _Importer, _ImporterThread
+from pyhmsa.fileformat.importer.importer import \
+    _Importer, _ImporterThread, read_head
+from pyhmsa.fileformat.common.raw import convert_record_by
 from pyhmsa.datafile import DataFile
-from pyhmsa.spec.datum.imageraster import ImageRaster2D, ImageRaster2DSpectral
+from pyhmsa.spec.datum.imageraster import \
+    ImageRaster2D, ImageRaster2DSpectral, ImageRaster2DHyperimage
 from pyhmsa.spec.datum.analysislist import AnalysisList2D
 
 # Globals and constants variables.
+from pyhmsa.fileformat.common.raw import \
+    RAW_RECORD_BY_VECTOR, RAW_RECORD_BY_IMAGE
+
+_RPL_REQUIRED_NAMES = frozenset(['width', 'height', 'depth', 'data-type',
+                                 'data-length', 'byte-order'])
 
 class _ImporterRAWThread(_ImporterThread):
 
-    def __init__(self, raw_filepath):
+    def __init__(self, raw_filepath, mmap=False, record_by=None):
         rpl_filepath = os.path.splitext(raw_filepath)[0] + '.rpl'
-        super().__init__(raw_filepath, rpl_filepath)
+        super().__init__(raw_filepath, rpl_filepath, mmap, record_by)
 
-    def _run(self, raw_filepath, rpl_filepath, *args, **kwargs):
+    def _run(self, raw_filepath, rpl_filepath, mmap, record_by, *args, **kwargs):
         # Read RPL
         self._update_status(0.1, 'Reading RPL')
+        rpl = self._read_rpl(rpl_filepath)
+
+        # Read RAW
+        ## Find dtype
+        self._update_status(0.2, 'Finding dtype')
+        dtype = self._find_dtype(rpl)
+
+        ## Find dimensions
+        self._update_status(0.4, 'Finding dimensions')
+        width, height, depth = self._find_dimensions(rpl)
+
+        count = width * height * depth
+
+        ## Extract values
+        self._update_status(0.5, 'Extract values')
+
+        offset = int(rpl.get('offset', 0))
+        logger.debug('Offset: %i', offset)
+
+        if mmap:
+            values = np.memmap(raw_filepath, dtype, 'r', offset, (count,))
+        else:
+            with open(raw_filepath, 'rb') as fp:
+                fp.seek(offset)
+                values = np.fromfile(fp, dtype, count)
+
+        ## Reshape
+        self._update_status(0.6, 'Reshape datum')
+
+        if depth == 1:
+            datum = ImageRaster2D(width, height, dtype, buffer=values)
+        else:
+            file_record_by = rpl['record-by']
+            logger.debug('Record by: %s', file_record_by)
+
+            if file_record_by not in [RAW_RECORD_BY_VECTOR, RAW_RECORD_BY_IMAGE]:
+                raise IOError('Unknown "record-by" parameter')
+
+            if record_by is None:
+                record_by = file_record_by
+
+            if record_by != file_record_by:
+                self._update_status(0.6, 'Convert record-by')
+                values = self._convert_record_by(values, depth, file_record_by,
+                                                 record_by, mmap)
+
+            if record_by == RAW_RECORD_BY_VECTOR:
+                datum = ImageRaster2DSpectral(width, height, depth, dtype,
+                                              buffer=values)
+            else:
+                datum = AnalysisList2D(depth, width, height, dtype,
+                                       buffer=values)
+
+        # Create datafile
+        self._update_status(0.7, 'Create datafile')
+
+        datafile = DataFile()
+
+        datafile.header.title = \
+            os.path.splitext(os.path.basename(raw_filepath))[0]
 
+        datafile.data.add(rpl.get('key', 'Datum0'), datum)
+
+        return datafile
+
+    def _read_rpl(self, rpl_filepath):
         rpl = {}
         with open(rpl_filepath, 'r') as fp:
             for line in fp:
@@ -45,10 +121,9 @@ class _ImporterRAWThread(_ImporterThread):
                 if name == 'key' and 'key' in rpl: continue # only read once
                 rpl[name] = value
 
-        # Read RAW
-        ## Find dtype
-        self._update_status(0.2, 'Finding dtype')
+        return rpl
 
+    def _find_dtype(self, rpl):
         if 'data-type' not in rpl:
             raise IOError('Missing "data-type" parameter in rpl file')
         data_type = rpl['data-type']
@@ -81,8 +156,6 @@ class _ImporterRAWThread(_ImporterThread):
         logger.debug('Numpy dtype: %s', dtype)
 
         ## Adjust byte order
-        self._update_status(0.3, 'Adjust byte order')
-
         if 'byte-order' not in rpl:
             raise IOError('Missing "byte-order" parameter in rpl file')
         byte_order = rpl['byte-order']
@@ -91,9 +164,9 @@ class _ImporterRAWThread(_ImporterThread):
         if byte_order != 'dont-care':
             dtype = dtype.newbyteorder('>' if byte_order == 'big-endian' else '<')
 
-        ## Find dimensions
-        self._update_status(0.4, 'Finding dimensions')
+        return dtype
 
+    def _find_dimensions(self, rpl):
         if 'width' not in rpl:
             raise IOError('Missing "width" parameter in rpl file')
         width = int(rpl['width'])
@@ -109,46 +182,124 @@ class _ImporterRAWThread(_ImporterThread):
         depth = int(rpl['depth'])
         logger.debug('Depth: %i', depth)
 
-        count = width * height * depth * dtype.itemsize
+        return width, height, depth
 
-        ## Extract values
-        self._update_status(0.5, 'Extract values')
+    def _convert_record_by(self, values, depth, src_record_by, dst_record_by,
+                           mmap):
+        if mmap:
+            # Out-of-core, the temporary file is deleted once unmapped
+            with tempfile.TemporaryFile() as fp:
+                fp.truncate(values.nbytes)
+                buffer = np.memmap(fp, values.dtype, 'r+', 0, values.shape)
+        else:
+            buffer = np.empty_like(values)
+
+        convert_record_by(values, buffer, depth, src_record_by, dst_record_by)
+        return buffer
+
+class _ImporterRAWStackThread(_ImporterRAWThread):
+
+    def __init__(self, raw_filepaths, raster=None, mmap=False,
+                 max_workers=None):
+        rpl_filepaths = [os.path.splitext(raw_filepath)[0] + '.rpl'
+                         for raw_filepath in raw_filepaths]
+        _ImporterThread.__init__(self, raw_filepaths, rpl_filepaths, raster,
+                                 mmap, max_workers)
+
+    def _run(self, raw_filepaths, rpl_filepaths, raster, mmap, max_workers,
+             *args, **kwargs):
+        # Validate headers
+        self._update_status(0.0, 'Reading RPL')
+
+        dtype = None
+        offsets = []
+        for rpl_filepath in rpl_filepaths:
+            rpl = self._read_rpl(rpl_filepath)
+            frame_dtype = self._find_dtype(rpl)
+            width, height, depth = self._find_dimensions(rpl)
+
+            if depth != 1:
+                raise IOError('Frame "%s" must have a depth of 1' % rpl_filepath)
+            if dtype is None:
+                dtype = frame_dtype
+                frame_shape = (width, height)
+            elif frame_dtype != dtype or (width, height) != frame_shape:
+                raise IOError('Frame "%s" has a different dtype or dimensions' % \
+                              rpl_filepath)
+
+            offsets.append(int(rpl.get('offset', 0)))
+
+        # Preallocate, in native byte order
+        self._update_status(0.05, 'Allocate datum')
+
+        swap = not dtype.isnative
+        dtype = dtype.newbyteorder('=')
+
+        count = len(raw_filepaths)
+        if raster is None:
+            shape = (count,) + frame_shape
+        else:
+            if raster[0] * raster[1] != count:
+                raise IOError('Raster %ix%i does not match the number of frames: %i' % \
+                              (raster[0], raster[1], count))
+            shape = tuple(raster) + frame_shape
+
+        if mmap:
+            # Out-of-core, the temporary file is deleted once unmapped
+            with tempfile.TemporaryFile() as fp:
+                fp.truncate(max(1, int(np.prod(shape)) * dtype.itemsize))
+                buffer = np.memmap(fp, dtype, 'r+', 0, shape)
+        else:
+            buffer = np.empty(shape, dtype)
 
-        offset = int(rpl.get('offset', 0))
-        logger.debug('Offset: %i', offset)
+        # Read frames
+        def read_frame(index):
+            # Frames are in raster order, x varies fastest
+            if raster is None:
+                out = buffer[index]
+            else:
+                out = buffer[index % raster[0], index // raster[0]]
 
-        fp = open(raw_filepath, 'rb')
-        fp.seek(offset)
-        values = np.fromfile(fp, dtype, count)
-        fp.close()
+            with open(raw_filepaths[index], 'rb') as fp:
+                fp.seek(offsets[index])
+                if fp.readinto(memoryview(out).cast('B')) != out.nbytes:
+                    raise IOError('Frame "%s" is truncated' % raw_filepaths[index])
 
-        ## Reshape
-        self._update_status(0.6, 'Reshape datum')
+            if swap:
+                out.byteswap(inplace=True)
 
-        if depth == 1:
-            datum = ImageRaster2D(width, height, dtype, buffer=values)
-        else:
-            record_by = rpl['record-by']
-            logger.debug('Record by: %s', record_by)
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            futures = [executor.submit(read_frame, index)
+                       for index in range(count)]
 
-            if record_by == 'vector':
-                datum = ImageRaster2DSpectral(width, height, depth, dtype,
-                                              buffer=values)
-            elif record_by == 'image':
-                datum = AnalysisList2D(depth, width, height, dtype,
-                                       buffer=values)
-            else:
-                raise IOError('Unknown "record-by" parameter')
+            for done, future in enumerate(concurrent.futures.as_completed(futures)):
+                if self.is_cancelled():
+                    for future in futures:
+                        future.cancel()
+                    return
+                future.result()
+                self._update_status(0.05 + 0.9 * (done + 1) / count,
+                                    'Reading frames')
 
         # Create datafile
-        self._update_status(0.7, 'Create datafile')
+        self._update_status(0.95, 'Create datafile')
+
+        if raster is None:
+            datum = AnalysisList2D(count, frame_shape[0], frame_shape[1],
+                                   dtype, buffer=buffer)
+        else:
+            datum = ImageRaster2DHyperimage(raster[0], raster[1],
+                                            frame_shape[0], frame_shape[1],
+                                            dtype, buffer=buffer)
 
         datafile = DataFile()
 
+        basenames = [os.path.splitext(os.path.basename(raw_filepath))[0]
+                     for raw_filepath in raw_filepaths]
         datafile.header.title = \
-            os.path.splitext(os.path.basename(raw_filepath))[0]
+            os.path.commonprefix(basenames).rstrip('0123456789_-. ') or basenames[0]
 
-        datafile.data.add(rpl.get('key', 'Datum0'), datum)
+        datafile.data.add('Datum0', datum)
 
         return datafile
 
@@ -156,8 +307,39 @@ class ImporterRAW(_Importer):
 
     SUPPORTED_EXTENSIONS = ('.raw',)
 
+    def __init__(self, extra_datafile=None, search_extra=True, mmap=False,
+                 record_by=None):
+        """
+        Imports a RAW/RPL file.
+
+        :arg mmap: whether to memory-map the RAW file instead of reading it.
+            The datum is then a read-only view on the file and its values are
+            only loaded from disk when they are accessed.
+        :arg record_by: ordering of the imported datum, either
+            :const:`RAW_RECORD_BY_VECTOR` (:class:`ImageRaster2DSpectral`) or
+            :const:`RAW_RECORD_BY_IMAGE` (:class:`AnalysisList2D`).
+            If ``None``, the ordering of the RAW file is kept.
+            Otherwise the values are reordered by blocks, in a temporary
+            memory-mapped file if *mmap* is ``True``.
+        """
+        super().__init__(extra_datafile, search_extra)
+
+        if record_by not in [None, RAW_RECORD_BY_VECTOR, RAW_RECORD_BY_IMAGE]:
+            raise ValueError('Unknown record-by: %s' % record_by)
+
+        self._mmap = mmap
+        self._record_by = record_by
+
     def _create_thread(self, filepath, *args, **kwargs):
-        return _ImporterRAWThread(filepath)
+        return _ImporterRAWThread(filepath, self._mmap, self._record_by)
+
+    def probe(self, filepath, head):
+        rpl_filepath = os.path.splitext(filepath)[0] + '.rpl'
+        names = set()
+        for line in read_head(rpl_filepath).splitlines():
+            name = line.split(b'\t', 1)[0].strip().lower()
+            names.add(name.decode('ascii', 'replace'))
+        return _RPL_REQUIRED_NAMES.issubset(names)
 
     def validate(self, filepath):
         _Importer.validate(self, filepath)
@@ -165,3 +347,62 @@ class ImporterRAW(_Importer):
         rpl_filepath = os.path.splitext(filepath)[0] + '.rpl'
         if not os.path.exists(rpl_filepath):
             raise IOError('Raw parameter list file "%s" is missing' % rpl_filepath)
+
+class ImporterRAWStack(_Importer):
+
+    SUPPORTED_EXTENSIONS = ('.raw',)
+
+    def __init__(self, extra_datafile=None, search_extra=True, raster=None,
+                 mmap=False, max_workers=None):
+        """
+        Imports a stack of RAW/RPL files, one per frame, into a single datum.
+        All frames must have the same dtype and dimensions, and a depth of 1.
+        Frames are read concurrently into a preallocated buffer.
+
+        :arg raster: number of raster points ``(x, y)``. If ``None``, the
+            frames are assembled as a :class:`AnalysisList2D`. Otherwise as
+            a :class:`ImageRaster2DHyperimage`, where the frames are in
+            raster order (x varies fastest).
+        :arg mmap: whether to allocate the datum in a temporary
+            memory-mapped file instead of in memory
+        :arg max_workers: number of threads reading frames
+        """
+        super().__init__(extra_datafile, search_extra)
+
+        if raster is not None and len(raster) != 2:
+            raise ValueError('Raster must be (x, y)')
+
+        self._raster = raster
+        self._mmap = mmap
+        self._max_workers = max_workers
+
+    def _expand_filepaths(self, filepaths):
+        if isinstance(filepaths, str):
+            return sorted(glob.glob(filepaths))
+        return list(filepaths)
+
+    def _create_thread(self, filepaths, *args, **kwargs):
+        return _ImporterRAWStackThread(self._expand_filepaths(filepaths),
+                                       self._raster, self._mmap,
+                                       self._max_workers)
+
+    def validate(self, filepaths):
+        filepaths = self._expand_filepaths(filepaths)
+        if not filepaths:
+            raise ValueError('No RAW file')
+
+        for filepath in filepaths:
+            _Importer.validate(self, filepath)
+
+            rpl_filepath = os.path.splitext(filepath)[0] + '.rpl'
+            if not os.path.exists(rpl_filepath):
+                raise IOError('Raw parameter list file "%s" is missing' % rpl_filepath)
+
+    def import_(self, filepaths):
+        """
+        Imports a stack.
+
+        :arg filepaths: either a list of RAW files or a glob pattern.
+            Files matching a pattern are sorted by name.
+        """
+        super().import_(filepaths)
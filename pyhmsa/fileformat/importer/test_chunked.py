@@ -0,0 +1,71 @@
+""" """
+
+# Standard library modules.
+import unittest
+import logging
+import os
+import tempfile
+import shutil
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.fileformat.importer.chunked import ImporterChunked
+from pyhmsa.fileformat.exporter.chunked import ExporterChunked
+from pyhmsa.datafile import DataFile
+from pyhmsa.spec.datum.analysislist import AnalysisList2D
+from pyhmsa.spec.condition.acquisition import AcquisitionPoint
+from pyhmsa.spec.condition.specimenposition import SpecimenPosition
+
+# Globals and constants variables.
+from pyhmsa.fileformat.common.chunked import CHUNKED_COMPRESSION_ZLIB
+
+class TestImporterChunked(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmpdir = tempfile.mkdtemp()
+
+        datafile = DataFile()
+        datafile.header.title = 'Points'
+        datafile.conditions['Acq'] = AcquisitionPoint(SpecimenPosition(1.0, 2.0))
+
+        self.values = np.random.rand(4, 5, 6)
+        datafile.data['Images'] = \
+            AnalysisList2D(4, 5, 6, np.float64, self.values,
+                           conditions={'Acq': datafile.conditions['Acq']})
+
+        exp = ExporterChunked(chunks=(3,), compression=CHUNKED_COMPRESSION_ZLIB)
+        exp.export(datafile, self.tmpdir)
+        self.filepath = exp.get()[0]
+
+        self.imp = ImporterChunked(search_extra=False)
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def testimport(self):
+        self.imp.import_(self.filepath)
+        datafile = self.imp.get()
+
+        self.assertEqual('Points', datafile.header.title)
+        self.assertAlmostEqual(2.0, datafile.conditions['Acq'].position.y, 4)
+
+        datum = datafile.data['Images']
+        self.assertIsInstance(datum, AnalysisList2D)
+        self.assertIn('Acq', datum.conditions)
+        np.testing.assert_array_equal(self.values, datum)
+
+    def testcan_import(self):
+        self.assertTrue(self.imp.can_import(self.filepath))
+        self.assertTrue(self.imp.can_import(self.filepath + os.sep))
+
+        os.remove(os.path.join(self.filepath, 'index.json'))
+        self.assertFalse(self.imp.can_import(self.filepath))
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
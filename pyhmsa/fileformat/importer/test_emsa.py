@@ -4,11 +4,14 @@
 import unittest
 import logging
 import os
+import tempfile
+import shutil
 
 # Third party modules.
 
 # Local modules.
 from pyhmsa.fileformat.importer.emsa import ImporterEMSA
+from pyhmsa.fileformat.importer.importer import read_head
 
 # Globals and constants variables.
 
@@ -45,6 +48,94 @@ class TestImporterESMA(unittest.TestCase):
         self.assertEqual(3, len(datafile.conditions))
         self.assertEqual(1, len(datafile.data))
 
+    def testimport_checksum(self):
+        tmpdir = tempfile.mkdtemp()
+        filepath = os.path.join(tmpdir, 'checksum.emsa')
+        with open(filepath, 'w') as fp:
+            fp.write('#FORMAT      : EMSA/MAS Spectral Data File\n')
+            fp.write('#TITLE       : Checksum\n')
+            fp.write('#DATE        : 20-NOV-2006\n')
+            fp.write('#TIME        : 16:03\n')
+            fp.write('#OWNER       : helen\n')
+            fp.write('#NPOINTS     : 5.\n')
+            fp.write('#DATATYPE    : Y\n')
+            fp.write('#CHECKSUM    : 1\n')
+            fp.write('#SPECTRUM    : Spectral Data Starts Here\n')
+            fp.write('1.0, 2.0, 3.0,\n4.0, 5.0\n')
+            fp.write('#ENDOFDATA   :\n')
+
+        self.imp.import_(filepath)
+        self.assertRaises(IOError, self.imp.get)
+
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def testimport_checksum_terminators(self):
+        lines = ['#FORMAT      : EMSA/MAS Spectral Data File',
+                 '#TITLE       : Checksum',
+                 '#DATE        : 20-NOV-2006',
+                 '#TIME        : 16:03',
+                 '#OWNER       : helen',
+                 '#NPOINTS     : 5.',
+                 '#DATATYPE    : Y',
+                 '#SPECTRUM    : Spectral Data Starts Here',
+                 '1.0, 2.0, 3.0,', '4.0, 5.0',
+                 '#ENDOFDATA   :']
+        without = sum(ord(c) for line in lines for c in line)
+        with_ = without + 10 * len(lines)
+
+        tmpdir = tempfile.mkdtemp()
+        filepath = os.path.join(tmpdir, 'checksum.emsa')
+
+        # Checksums with and without line terminators are accepted
+        for checksum in [without, with_]:
+            with open(filepath, 'w', newline='\n') as fp:
+                fp.write('\n'.join(lines))
+                fp.write('\n#CHECKSUM    : %i\n' % checksum)
+
+            self.imp.import_(filepath)
+            self.assertEqual(5, self.imp.get().data['Spectrum'].channels)
+
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def testimport_invalid_data(self):
+        tmpdir = tempfile.mkdtemp()
+        filepath = os.path.join(tmpdir, 'invalid.emsa')
+        with open(filepath, 'w') as fp:
+            fp.write('#FORMAT      : EMSA/MAS Spectral Data File\n')
+            fp.write('#TITLE       : Invalid\n')
+            fp.write('#DATE        : 20-NOV-2006\n')
+            fp.write('#TIME        : 16:03\n')
+            fp.write('#OWNER       : helen\n')
+            fp.write('#DATATYPE    : Y\n')
+            fp.write('#SPECTRUM    : Spectral Data Starts Here\n')
+            fp.write('1.0, abc, 3.0\n')
+            fp.write('#ENDOFDATA   :\n')
+
+        self.imp.import_(filepath)
+        self.assertRaises(ValueError, self.imp.get)
+
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def testimport_y(self):
+        self.imp.import_(os.path.join(self.testdata, 'spectrum3.emsa'))
+        datum = self.imp.get().data['Spectrum']
+
+        self.assertEqual(80, datum.channels)
+        self.assertAlmostEqual(65.820, datum[0], 4)
+        self.assertAlmostEqual(49.442, datum[-1], 4)
+
+    def testprobe(self):
+        filepath = os.path.join(self.testdata, 'spectrum1.emsa')
+        self.assertTrue(self.imp.probe(filepath, read_head(filepath)))
+        self.assertTrue(self.imp.probe(filepath, b'#format: emsa/mas spectral data'))
+        self.assertFalse(self.imp.probe(filepath, b'<?xml version="1.0"?>'))
+
+        # FORMAT keyword after other keyword lines
+        self.assertTrue(self.imp.probe(filepath, b'\r\n#TITLE: Spectrum\r\n#FORMAT: EMSA/MAS Spectral Data\r\n'))
+        self.assertTrue(self.imp.probe(filepath, b'\xef\xbb\xbf  \r#FORMAT: EMSA/MAS Spectral Data\r'))
+        self.assertFalse(self.imp.probe(filepath, b'#TITLE: Spectrum\n#SPECTRUM\n#FORMAT: EMSA/MAS\n'))
+        self.assertFalse(self.imp.probe(filepath, b'1, 2, 3\n#FORMAT: EMSA/MAS\n'))
+
 if __name__ == '__main__': #pragma: no cover
     logging.getLogger().setLevel(logging.DEBUG)
     unittest.main()
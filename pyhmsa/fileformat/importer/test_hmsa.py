@@ -0,0 +1,49 @@
+""" """
+
+# Standard library modules.
+import unittest
+import logging
+import os
+
+# Third party modules.
+
+# Local modules.
+from pyhmsa.fileformat.importer.hmsa import ImporterHMSA
+from pyhmsa.fileformat.importer.importer import read_head
+
+# Globals and constants variables.
+
+class TestImporterHMSA(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.testdata = os.path.join(os.path.dirname(__file__),
+                                     '..', '..', 'testdata')
+        self.imp = ImporterHMSA(search_extra=False)
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+
+    def testimport(self):
+        self.imp.import_(os.path.join(self.testdata, 'breccia_eds.hmsa'))
+        datafile = self.imp.get()
+
+        self.assertEqual('Breccia - EDS sum spectrum', datafile.header.title)
+        self.assertEqual(1, len(datafile.data))
+
+    def testprobe(self):
+        for ext in ['.xml', '.hmsa']:
+            filepath = os.path.join(self.testdata, 'breccia_eds' + ext)
+            self.assertTrue(self.imp.probe(filepath, read_head(filepath)))
+
+        filepath = os.path.join(self.testdata, 'breccia_eds.xml')
+        self.assertFalse(self.imp.probe(filepath, b'<?xml version="1.0"?><Root />'))
+
+        # UID mismatch
+        filepath = os.path.join(self.testdata, 'breccia_eds.hmsa')
+        self.assertFalse(self.imp.probe(filepath, b'\x00' * 8))
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
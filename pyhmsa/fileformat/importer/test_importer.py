@@ -3,12 +3,26 @@
 # Standard library modules.
 import unittest
 import logging
+import os
+import tempfile
+import shutil
+import threading
 
 # Third party modules.
 
 # Local modules.
-from pyhmsa.fileformat.importer.importer import _Importer, _ImporterThread
+from pyhmsa.fileformat.importer.importer import \
+    (_Importer, _ImporterThread, _read_extra_datafile, find_importers,
+     classify, import_)
+from pyhmsa.fileformat.importer.emsa import ImporterEMSA
+from pyhmsa.fileformat.importer.raw import ImporterRAW
+from pyhmsa.fileformat.importer.hmsa import ImporterHMSA
 from pyhmsa.datafile import DataFile
+from pyhmsa.spec.condition.probe import ProbeEM
+from pyhmsa.spec.condition.acquisition import AcquisitionPoint
+from pyhmsa.spec.condition.specimenposition import SpecimenPosition
+from pyhmsa.spec.condition.specimen import Specimen
+from pyhmsa.spec.condition.composition import CompositionElemental
 
 # Globals and constants variables.
 
@@ -17,6 +31,9 @@ class ImporterThreadMock(_ImporterThread):
     def _run(self, filepath, *args, **kwargs):
         datafile = DataFile(filepath)
         datafile.header.title = 'Imported'
+        datafile.conditions['Probe0'] = ProbeEM(15.0)
+        datafile.conditions['Acq0'] = AcquisitionPoint(SpecimenPosition(1.0))
+        datafile.conditions['Spec0'] = Specimen('Iron')
         return datafile
 
 class ImporterMock(_Importer):
@@ -51,10 +68,202 @@ class TestImporter(unittest.TestCase):
         self.assertEqual('Imported', datafile.header.title)
         self.assertEqual('Me', datafile.header.author)
 
+    def test_update_extra_conditions(self):
+        extra_datafile = DataFile()
+        extra_datafile.conditions['Probe'] = \
+            ProbeEM(10.0, beam_current=(5.0, 'nA'))
+        extra_datafile.conditions['Acq'] = \
+            ProbeEM(10.0, emission_current=(1.0, 'uA')) # Different type
+        imp = ImporterMock(extra_datafile, search_extra=False)
+
+        imp.import_('file.abc')
+        datafile = imp.get()
+        probe = datafile.conditions['Probe0']
+        self.assertAlmostEqual(15.0, probe.beam_voltage, 4)
+        self.assertAlmostEqual(5.0, probe.beam_current, 4)
+        self.assertIsNone(probe.emission_current)
+
+    def test_update_extra_copy(self):
+        extra_datafile = DataFile()
+        composition = CompositionElemental('atoms', {26: 1.0})
+        extra_datafile.conditions['Spec'] = \
+            Specimen('Iron', composition=composition)
+        imp = ImporterMock(extra_datafile, search_extra=False)
+
+        imp.import_('file.abc')
+        specimen = imp.get().conditions['Spec0']
+        self.assertAlmostEqual(1.0, specimen.composition[26], 4)
+        specimen.composition[6] = 0.5
+
+        imp.import_('file.abc')
+        specimen2 = imp.get().conditions['Spec0']
+        self.assertNotIn(6, specimen2.composition)
+        self.assertNotIn(6, composition)
+
     def testcan_import(self):
         self.assertTrue(self.imp.can_import('file.abc'))
         self.assertFalse(self.imp.can_import('file.def'))
 
+class TestModule(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.testdata = os.path.join(os.path.dirname(__file__),
+                                     '..', '..', 'testdata', 'importer')
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_read_extra_datafile(self):
+        filepath = os.path.join(self.tmpdir, 'importer_extra.xml')
+        datafile = DataFile()
+        datafile.header.author = 'Me'
+        datafile.write(filepath)
+
+        extra_datafile = _read_extra_datafile(filepath)
+        self.assertEqual('Me', extra_datafile.header.author)
+        self.assertIs(extra_datafile, _read_extra_datafile(filepath))
+
+        # Modified
+        datafile.header.author = 'You'
+        datafile.write(filepath)
+        stat = os.stat(filepath)
+        os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        extra_datafile2 = _read_extra_datafile(filepath)
+        self.assertIsNot(extra_datafile, extra_datafile2)
+        self.assertEqual('You', extra_datafile2.header.author)
+
+    def testfind_importers(self):
+        filepath = os.path.join(self.testdata, 'emsa', 'spectrum1.emsa')
+
+        importers = find_importers(filepath, search_extra=False)
+        self.assertEqual(1, len(importers))
+
+        # Instances are reused by the same thread
+        importers2 = find_importers(filepath, search_extra=False)
+        self.assertEqual(1, len(importers2))
+        self.assertIs(importers[0], importers2[0])
+
+        # Unless they are importing a file
+        importers[0].is_alive = lambda: True
+        importers3 = find_importers(filepath, search_extra=False)
+        self.assertEqual(1, len(importers3))
+        self.assertIsNot(importers[0], importers3[0])
+
+        # Or the arguments differ
+        extra_datafile = DataFile()
+        importers4 = find_importers(filepath, extra_datafile, search_extra=False)
+        self.assertIsNot(importers3[0], importers4[0])
+
+    def testfind_importers_thread(self):
+        filepath = os.path.join(self.testdata, 'emsa', 'spectrum1.emsa')
+        importers = find_importers(filepath, search_extra=False)
+
+        results = []
+        thread = threading.Thread(target=lambda: results.extend(
+            find_importers(filepath, search_extra=False)))
+        thread.start()
+        thread.join()
+
+        self.assertEqual(1, len(results))
+        self.assertIsNot(importers[0], results[0])
+
+    def testimport_twice(self):
+        filepath = os.path.join(self.testdata, 'emsa', 'spectrum1.emsa')
+
+        datafile = import_(filepath, search_extra=False)
+        datafile2 = import_(filepath, search_extra=False)
+        self.assertIsNot(datafile, datafile2)
+        self.assertEqual(1, len(datafile2.data))
+
+    def testfind_importers_probe(self):
+        # Misnamed files
+        src = os.path.join(self.testdata, 'emsa', 'spectrum1.emsa')
+        filepath = os.path.join(self.tmpdir, 'spectrum1.txt')
+        shutil.copy(src, filepath)
+
+        importers = find_importers(filepath, search_extra=False)
+        self.assertEqual(1, len(importers))
+        self.assertIsInstance(importers[0], ImporterEMSA)
+
+        datafile = import_(filepath, search_extra=False)
+        self.assertEqual(1, len(datafile.data))
+
+        # FORMAT keyword not on the first line
+        with open(src, 'rb') as fp:
+            content = fp.read()
+        filepath = os.path.join(self.tmpdir, 'spectrum2.txt')
+        with open(filepath, 'wb') as fp:
+            fp.write(b'\r\n' + content)
+
+        importers = find_importers(filepath, search_extra=False)
+        self.assertEqual(1, len(importers))
+        self.assertIsInstance(importers[0], ImporterEMSA)
+
+        src = os.path.join(self.testdata, 'raw', 'bruker_bcf_fileformat_16x16')
+        filepath = os.path.join(self.tmpdir, 'map.dat')
+        shutil.copy(src + '.raw', filepath)
+        shutil.copy(src + '.rpl', os.path.join(self.tmpdir, 'map.rpl'))
+
+        importers = find_importers(filepath, search_extra=False)
+        self.assertEqual(1, len(importers))
+        self.assertIsInstance(importers[0], ImporterRAW)
+
+        # Content not recognized, the extension is used
+        filepath = os.path.join(self.tmpdir, 'spectrum.emsa')
+        with open(filepath, 'w') as fp:
+            fp.write('#TITLE: Spectrum\n#NPOINTS: 3\n#SPECTRUM\n1, 2, 3\n#ENDOFDATA\n')
+        importers = find_importers(filepath, search_extra=False)
+        self.assertEqual(1, len(importers))
+        self.assertIsInstance(importers[0], ImporterEMSA)
+
+        filepath = os.path.join(self.tmpdir, 'spectrum.txt')
+        with open(filepath, 'w') as fp:
+            fp.write('1, 2, 3')
+        self.assertEqual([], find_importers(filepath, search_extra=False))
+
+        # HMSA
+        filepath = os.path.join(self.testdata, '..', 'breccia_eds.xml')
+        importers = find_importers(filepath, search_extra=False)
+        self.assertEqual(1, len(importers))
+        self.assertIsInstance(importers[0], ImporterHMSA)
+
+    def testfind_importers_uppercase(self):
+        src = os.path.join(self.testdata, '..', 'breccia_eds')
+        shutil.copy(src + '.xml', os.path.join(self.tmpdir, 'BRECCIA.XML'))
+        shutil.copy(src + '.hmsa', os.path.join(self.tmpdir, 'BRECCIA.HMSA'))
+
+        filepath = os.path.join(self.tmpdir, 'BRECCIA.HMSA')
+        importers = find_importers(filepath, search_extra=False)
+        self.assertEqual(1, len(importers))
+        self.assertIsInstance(importers[0], ImporterHMSA)
+
+        datafile = import_(filepath, search_extra=False)
+        self.assertEqual(1, len(datafile.data))
+
+    def testclassify(self):
+        emsa_filepath = os.path.join(self.testdata, 'emsa', 'spectrum1.emsa')
+        txt_filepath = os.path.join(self.tmpdir, 'spectrum1.txt')
+        shutil.copy(emsa_filepath, txt_filepath)
+        hmsa_filepath = os.path.join(self.testdata, '..', 'breccia_eds.xml')
+        unknown_filepath = os.path.join(self.tmpdir, 'unknown.abc')
+        with open(unknown_filepath, 'w') as fp:
+            fp.write('abc')
+
+        filepaths = [emsa_filepath, txt_filepath, hmsa_filepath, unknown_filepath]
+        results = classify(filepaths, search_extra=False)
+
+        self.assertEqual(set(filepaths), set(results.keys()))
+        self.assertIsInstance(results[emsa_filepath][0], ImporterEMSA)
+        self.assertIsInstance(results[txt_filepath][0], ImporterEMSA)
+        self.assertIsNot(results[emsa_filepath][0], results[txt_filepath][0])
+        self.assertIsInstance(results[hmsa_filepath][0], ImporterHMSA)
+        self.assertEqual([], results[unknown_filepath])
+
 if __name__ == '__main__': #pragma: no cover
     logging.getLogger().setLevel(logging.DEBUG)
     unittest.main()
@@ -0,0 +1,114 @@
+""" """
+
+# Standard library modules.
+import unittest
+import logging
+import os
+import tempfile
+import shutil
+import json
+import sys
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.fileformat.importer.npy import ImporterNPY
+from pyhmsa.fileformat.exporter.npy import ExporterNPY
+from pyhmsa.datafile import DataFile
+from pyhmsa.spec.datum.analysis import Analysis1D
+from pyhmsa.spec.condition.detector import DetectorSpectrometerXEDS
+from pyhmsa.spec.condition.calibration import CalibrationLinear
+
+# Globals and constants variables.
+
+class TestImporterNPY(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmpdir = tempfile.mkdtemp()
+
+        datafile = DataFile()
+        datafile.header.title = 'Spectrum'
+        datafile.header.author = 'Me'
+
+        calibration = CalibrationLinear('Energy', 'eV', 10.0, 0.0)
+        datafile.conditions['EDS'] = DetectorSpectrometerXEDS(8, calibration)
+
+        datafile.data['Sum'] = \
+            Analysis1D(8, np.float64, np.linspace(0.0, 1.0, 8),
+                       conditions={'EDS': datafile.conditions['EDS']})
+
+        exp = ExporterNPY()
+        exp.export(datafile, self.tmpdir)
+        self.filepath = exp.get()[0]
+        self.datafile = datafile
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _test_datafile(self, datafile):
+        self.assertEqual('Spectrum', datafile.header.title)
+        self.assertEqual('Me', datafile.header.author)
+        self.assertEqual(8, datafile.conditions['EDS'].channel_count)
+        self.assertAlmostEqual(10.0, datafile.conditions['EDS'].calibration.gain, 4)
+
+        datum = datafile.data['Sum']
+        self.assertIsInstance(datum, Analysis1D)
+        self.assertEqual(8, datum.channels)
+        self.assertIs(datafile.conditions['EDS'], datum.conditions['EDS'])
+        np.testing.assert_array_equal(self.datafile.data['Sum'], datum)
+
+    def testimport(self):
+        imp = ImporterNPY(search_extra=False)
+        imp.import_(self.filepath)
+        self._test_datafile(imp.get())
+
+    def testimport_mmap(self):
+        imp = ImporterNPY(search_extra=False, mmap=True)
+        imp.import_(self.filepath)
+        datafile = imp.get()
+        self._test_datafile(datafile)
+
+        datum = datafile.data['Sum']
+        self.assertIsInstance(datum.base, np.memmap)
+        self.assertFalse(datum.flags.writeable)
+
+    def _write_sidecar_class(self, clasz):
+        json_filepath = os.path.splitext(self.filepath)[0] + '.json'
+        with open(json_filepath, 'r') as fp:
+            sidecar = json.load(fp)
+        sidecar['class'] = clasz
+        with open(json_filepath, 'w') as fp:
+            json.dump(sidecar, fp)
+
+    def testimport_class_name(self):
+        self._write_sidecar_class('Analysis/1D')
+
+        imp = ImporterNPY(search_extra=False)
+        imp.import_(self.filepath)
+        self._test_datafile(imp.get())
+
+    def testimport_unknown_class(self):
+        for clasz in ['pyhmsa_untrusted_module:Datum', 'os:system',
+                      'pyhmsa.datafile:DataFile']:
+            self._write_sidecar_class(clasz)
+
+            imp = ImporterNPY(search_extra=False)
+            imp.import_(self.filepath)
+            self.assertRaises(IOError, imp.get)
+
+        self.assertNotIn('pyhmsa_untrusted_module', sys.modules)
+
+    def testcan_import(self):
+        imp = ImporterNPY(search_extra=False)
+        self.assertTrue(imp.can_import(self.filepath))
+
+        os.remove(os.path.splitext(self.filepath)[0] + '.json')
+        self.assertFalse(imp.can_import(self.filepath))
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
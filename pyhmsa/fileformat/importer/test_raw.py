@@ -4,13 +4,20 @@
 import unittest
 import logging
 import os
+import tempfile
+import shutil
 
 # Third party modules.
+import numpy as np
 
 # Local modules.
-from pyhmsa.fileformat.importer.raw import ImporterRAW
+from pyhmsa.fileformat.importer.raw import ImporterRAW, ImporterRAWStack
+from pyhmsa.datafile import DataFile
+from pyhmsa.spec.datum.analysislist import AnalysisList2D
+from pyhmsa.spec.datum.imageraster import ImageRaster2DHyperimage
 
 # Globals and constants variables.
+from pyhmsa.fileformat.common.raw import RAW_RECORD_BY_IMAGE
 
 class TestImporterRAW(unittest.TestCase):
 
@@ -32,6 +39,123 @@ class TestImporterRAW(unittest.TestCase):
         self.assertEqual(0, len(datafile.conditions))
         self.assertEqual(1, len(datafile.data))
 
+    def testimport_mmap(self):
+        filepath = os.path.join(self.testdata, 'bruker_bcf_fileformat_16x16.raw')
+        self.imp.import_(filepath)
+        datum = next(iter(self.imp.get().data.values()))
+
+        imp = ImporterRAW(mmap=True)
+        imp.import_(filepath)
+        datafile = imp.get()
+        datum_mmap = next(iter(datafile.data.values()))
+
+        self.assertIsInstance(datum_mmap.base, np.memmap)
+        self.assertFalse(datum_mmap.flags.writeable)
+        self.assertEqual(datum.shape, datum_mmap.shape)
+        np.testing.assert_array_equal(datum, datum_mmap)
+
+        # Convert to HMSA
+        tmpdir = tempfile.mkdtemp()
+        filepath = os.path.join(tmpdir, 'mmap.hmsa')
+        datafile.write(filepath)
+
+        datafile = DataFile.read(filepath)
+        np.testing.assert_array_equal(datum, next(iter(datafile.data.values())))
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def testimport_record_by(self):
+        filepath = os.path.join(self.testdata, 'bruker_bcf_fileformat_16x16.raw')
+        self.imp.import_(filepath)
+        datum = next(iter(self.imp.get().data.values()))
+
+        for mmap in [False, True]:
+            imp = ImporterRAW(mmap=mmap, record_by=RAW_RECORD_BY_IMAGE)
+            imp.import_(filepath)
+            datum_image = next(iter(imp.get().data.values()))
+
+            self.assertIsInstance(datum_image, AnalysisList2D)
+            self.assertEqual((1121, 16, 16), datum_image.shape)
+            np.testing.assert_array_equal(np.rollaxis(datum, 2), datum_image)
+
+    def testprobe(self):
+        filepath = os.path.join(self.testdata, 'bruker_bcf_fileformat_16x16.raw')
+        self.assertTrue(self.imp.probe(filepath, b''))
+        self.assertFalse(self.imp.probe(filepath + '.abc', b''))
+
+class TestImporterRAWStack(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmpdir = tempfile.mkdtemp()
+
+        self.frames = np.random.randint(0, 1000, (6, 5, 4)).astype('>u2')
+        for i, frame in enumerate(self.frames):
+            self._write_frame('frame_%02i' % i, frame)
+
+        self.pattern = os.path.join(self.tmpdir, 'frame_*.raw')
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _write_frame(self, name, frame, offset=8):
+        basepath = os.path.join(self.tmpdir, name)
+        with open(basepath + '.rpl', 'w') as fp:
+            fp.write('key\t%s\n' % name)
+            fp.write('offset\t%i\n' % offset)
+            fp.write('width\t%i\n' % frame.shape[0])
+            fp.write('height\t%i\n' % frame.shape[1])
+            fp.write('depth\t1\n')
+            fp.write('record-by\tdont-care\n')
+            fp.write('data-length\t%i\n' % frame.dtype.itemsize)
+            fp.write('byte-order\tbig-endian\n')
+            fp.write('data-type\tunsigned\n')
+        with open(basepath + '.raw', 'wb') as fp:
+            fp.write(b'\x00' * offset)
+            fp.write(frame.tobytes())
+
+    def testimport_analysislist(self):
+        imp = ImporterRAWStack(search_extra=False, max_workers=3)
+        imp.import_(self.pattern)
+        datafile = imp.get()
+
+        self.assertEqual('frame', datafile.header.title)
+        datum = datafile.data['Datum0']
+        self.assertIsInstance(datum, AnalysisList2D)
+        self.assertEqual((6, 5, 4), datum.shape)
+        np.testing.assert_array_equal(self.frames, datum)
+
+    def testimport_hyperimage(self):
+        filepaths = sorted(os.path.join(self.tmpdir, 'frame_%02i.raw' % i)
+                           for i in range(6))
+
+        for mmap in [False, True]:
+            imp = ImporterRAWStack(search_extra=False, raster=(3, 2), mmap=mmap)
+            imp.import_(filepaths)
+            datum = imp.get().data['Datum0']
+
+            self.assertIsInstance(datum, ImageRaster2DHyperimage)
+            self.assertEqual((3, 2, 5, 4), datum.shape)
+            np.testing.assert_array_equal(self.frames[4], datum[1, 1])
+            np.testing.assert_array_equal(self.frames[2], datum[2, 0])
+
+    def testimport_invalid(self):
+        self._write_frame('frame_99', np.zeros((4, 5), '>u2'))
+
+        imp = ImporterRAWStack(search_extra=False)
+        imp.import_(self.pattern)
+        self.assertRaises(IOError, imp.get)
+
+        imp = ImporterRAWStack(search_extra=False, raster=(2, 2))
+        imp.import_(os.path.join(self.tmpdir, 'frame_0*.raw'))
+        self.assertRaises(IOError, imp.get)
+
+    def testcan_import(self):
+        imp = ImporterRAWStack(search_extra=False)
+        self.assertTrue(imp.can_import(self.pattern))
+        self.assertFalse(imp.can_import(os.path.join(self.tmpdir, '*.abc')))
+
 if __name__ == '__main__': #pragma: no cover
     logging.getLogger().setLevel(logging.DEBUG)
     unittest.main()
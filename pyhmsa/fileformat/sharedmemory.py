@@ -0,0 +1,184 @@
+"""
+Transport of data file between processes using shared memory
+"""
+
+# Standard library modules.
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.fileformat.common.metadata import \
+    convert_metadata, parse_metadata, get_class_path, resolve_class
+from pyhmsa.spec.datum.datum import _Datum
+
+# Globals and constants variables.
+
+SharedDatum = namedtuple('SharedDatum',
+                         ['name', 'clasz', 'shape', 'dtype', 'memory_name',
+                          'condition_ids'])
+
+SharedDataFileDescriptor = namedtuple('SharedDataFileDescriptor',
+                                      ['xml', 'data'])
+
+def _open_memory(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError: # Python < 3.13
+        return shared_memory.SharedMemory(name=name)
+
+class SharedDataFile(object):
+
+    def __init__(self, descriptor, memories, owner=False):
+        """
+        Data file whose datum buffers live in shared memory blocks.
+        Use :meth:`create` to export a data file and :meth:`attach` to access
+        it from another process using its :attr:`descriptor`.
+        """
+        self._descriptor = descriptor
+        self._memories = memories
+        self._owner = owner
+        self._datafile = None
+        self._closed = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exctype, value, tb):
+        self.close()
+        if self._owner:
+            self.unlink()
+
+    @classmethod
+    def create(cls, datafile):
+        """
+        Copies the datum buffers of a data file into new shared memory blocks.
+        The returned object owns the blocks and must be unlinked once all
+        processes are done with them.
+
+        :arg datafile: data file to share
+        """
+        for name, datum in datafile.data.items():
+            if not isinstance(datum, _Datum):
+                raise ValueError('Datum "%s" must be converted to a dense datum' % name)
+
+        memories = {}
+        data = []
+
+        try:
+            for name, datum in datafile.data.items():
+                memory = shared_memory.SharedMemory(create=True,
+                                                    size=max(datum.nbytes, 1))
+                memories[memory.name] = memory
+
+                buffer = np.ndarray(datum.shape, datum.dtype, memory.buf)
+                np.copyto(buffer, datum, casting='no')
+                del buffer
+
+                clasz = get_class_path(datum)
+                data.append(SharedDatum(name, clasz, datum.shape,
+                                        datum.dtype.str, memory.name,
+                                        tuple(datum.conditions.keys())))
+        except:
+            for memory in memories.values():
+                memory.close()
+                memory.unlink()
+            raise
+
+        descriptor = SharedDataFileDescriptor(convert_metadata(datafile),
+                                              tuple(data))
+        return cls(descriptor, memories, owner=True)
+
+    @classmethod
+    def attach(cls, descriptor):
+        """
+        Attaches to the shared memory blocks of a descriptor, typically
+        from a worker process.
+
+        :arg descriptor: descriptor returned by :attr:`descriptor`
+        """
+        memories = {}
+        try:
+            for shared_datum in descriptor.data:
+                memories[shared_datum.memory_name] = \
+                    _open_memory(shared_datum.memory_name)
+        except:
+            for memory in memories.values():
+                memory.close()
+            raise
+
+        return cls(descriptor, memories)
+
+    def close(self):
+        """
+        Closes the access to the shared memory blocks.
+        Datums of :attr:`datafile` cannot be used afterwards.
+
+        A block cannot be closed while one of its views is still referenced,
+        for instance a datum kept by the caller. Such a block stays mapped
+        and is closed by a later call, once the views are deleted.
+
+        :return: whether all blocks are closed
+        """
+        # Release the views of the data file
+        if self._datafile is not None:
+            for name in list(self._datafile.data.keys()):
+                del self._datafile.data[name]
+            self._datafile = None
+
+        for name, memory in self._memories.items():
+            if name in self._closed:
+                continue
+            try:
+                memory.close()
+            except BufferError:
+                continue
+            self._closed.add(name)
+
+        return len(self._closed) == len(self._memories)
+
+    def unlink(self):
+        """
+        Requests the destruction of the shared memory blocks.
+        Only the process which created the blocks should call this method.
+        """
+        for memory in self._memories.values():
+            memory.unlink()
+
+    @property
+    def descriptor(self):
+        """
+        Lightweight and picklable description of the shared data file:
+        the header and conditions as XML and, for each datum, the name of
+        its shared memory block.
+        """
+        return self._descriptor
+
+    @property
+    def datafile(self):
+        """
+        Data file where each datum is a view on its shared memory block.
+        """
+        if self._datafile is None:
+            datafile = parse_metadata(self._descriptor.xml)
+
+            for shared_datum in self._descriptor.data:
+                memory = self._memories[shared_datum.memory_name]
+                clasz = resolve_class(shared_datum.clasz)
+                # Views hold an export of the block, so that it cannot be
+                # closed under them
+                count = int(np.prod(shared_datum.shape))
+                buffer = np.frombuffer(memory.buf, np.dtype(shared_datum.dtype),
+                                       count).reshape(shared_datum.shape)
+
+                datum = buffer.view(clasz)
+                for identifier in shared_datum.condition_ids:
+                    datum.conditions[identifier] = datafile.conditions[identifier]
+
+                datafile.data[shared_datum.name] = datum
+
+            self._datafile = datafile
+
+        return self._datafile
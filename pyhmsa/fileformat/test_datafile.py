@@ -11,13 +11,16 @@ import xml.etree.ElementTree as etree
 import binascii
 import struct
 import io
+import pickle
+import multiprocessing
 
 # Third party modules.
 import numpy as np
 
 # Local modules.
 from pyhmsa.fileformat.datafile import \
-    DataFileReader, DataFileWriter, _extract_filepath
+    DataFileReader, DataFileWriter, DataFileHandle, _extract_filepath, \
+    _HMSA_FILES
 
 from pyhmsa.datafile import DataFile
 from pyhmsa.spec.datum.analysis import Analysis1D
@@ -201,6 +204,111 @@ class TestDataFileReader(unittest.TestCase):
         reader = DataFileReader()
         self.assertRaises(IOError, reader.read, 'test.abc')
 
+    def testiter_data1(self):
+        reader = DataFileReader()
+        items = list(reader.iter_data(self.filepath))
+
+        self.assertEqual(1, len(items))
+        key, analysis = items[0]
+        self.assertEqual('EDS sum spectrum', key)
+        self.assertEqual(4096, analysis.channels)
+        self.assertEqual(395, analysis[-1])
+        self.assertEqual('Completed', reader.status)
+
+    def testiter_data2(self):
+        tmpdir = tempfile.mkdtemp()
+        filepath = os.path.join(tmpdir, 'iter.hmsa')
+
+        datafile = DataFile()
+        for i in range(5):
+            datafile.data['Datum%i' % i] = \
+                Analysis1D(8, np.int32, buffer=np.full(8, i, dtype=np.int32))
+        datafile.write(filepath)
+
+        reader = DataFileReader()
+        iterator = reader.iter_data(filepath, prefetch=1)
+        key, datum = next(iterator)
+        self.assertEqual(8, datum.channels)
+        self.assertEqual('Datum%i' % datum[0], key)
+        iterator.close()
+
+        self.assertFalse(reader.is_alive())
+        self.assertEqual('Cancelled', reader.status)
+
+        items = dict(reader.iter_data(filepath, prefetch=2))
+        self.assertEqual(5, len(items))
+        for i in range(5):
+            self.assertEqual(i, items['Datum%i' % i][0])
+
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+def _read_datum_sum(handle, key):
+    return int(handle.read_datum(key).sum())
+
+class TestDataFileHandle(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.tmpdir, 'handle.hmsa')
+
+        datafile = DataFile()
+        datafile.header.title = 'Handle'
+        for i in range(4):
+            datafile.data['Datum%i' % i] = \
+                Analysis1D(16, np.int32, buffer=np.full(16, i, dtype=np.int32))
+        datafile.write(self.filepath)
+
+        self.handle = DataFileHandle(self.filepath)
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        self.handle.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def testskeleton(self):
+        self.assertEqual('Handle', self.handle.header.title)
+        self.assertEqual(4, len(self.handle.keys()))
+        self.assertEqual(16, len(self.handle.uid))
+
+    def testread_datum(self):
+        datum = self.handle.read_datum('Datum3')
+        self.assertEqual(16, datum.channels)
+        self.assertEqual(3, datum[0])
+
+        datum = self.handle.read_datum('Datum1')
+        self.assertEqual(1, datum[-1])
+
+    def testpickle(self):
+        handle = pickle.loads(pickle.dumps(self.handle))
+        self.assertEqual(2, handle.read_datum('Datum2')[5])
+
+    def testclose(self):
+        self.handle.read_datum('Datum0')
+        fileobj = self.handle._hmsa_file._fileobj
+
+        with DataFileHandle(self.filepath) as handle:
+            self.assertEqual(1, handle.read_datum('Datum1')[0])
+            self.assertIs(fileobj, handle._hmsa_file._fileobj)
+        self.assertFalse(fileobj.closed)
+
+        # Last handle using the file
+        self.handle.close()
+        self.assertTrue(fileobj.closed)
+        self.assertEqual(0, len(_HMSA_FILES))
+
+        # Opened again
+        self.assertEqual(2, self.handle.read_datum('Datum2')[0])
+        self.handle.close()
+
+    def testprocesses(self):
+        context = multiprocessing.get_context()
+        with context.Pool(2) as pool:
+            args = [(self.handle, key) for key in self.handle.keys()]
+            sums = pool.starmap(_read_datum_sum, args)
+        self.assertEqual([0, 16, 32, 48], sorted(sums))
+
 class TestDataFileWriter(unittest.TestCase):
 
     def setUp(self):
@@ -0,0 +1,102 @@
+""" """
+
+# Standard library modules.
+import unittest
+import logging
+import pickle
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.fileformat.sharedmemory import SharedDataFile
+from pyhmsa.datafile import DataFile
+from pyhmsa.spec.datum.analysis import Analysis1D
+from pyhmsa.spec.datum.imageraster import ImageRaster2DSpectral
+from pyhmsa.spec.condition.detector import DetectorSpectrometerXEDS
+from pyhmsa.spec.condition.calibration import CalibrationLinear
+
+# Globals and constants variables.
+
+class TestSharedDataFile(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.datafile = DataFile()
+        self.datafile.header.title = 'Shared'
+
+        calibration = CalibrationLinear('Energy', 'eV', 10.0, 0.0)
+        detector = DetectorSpectrometerXEDS(7, calibration)
+
+        buffer = np.arange(5 * 6 * 7, dtype=np.uint16)
+        datum = ImageRaster2DSpectral(5, 6, 7, np.uint16, buffer,
+                                      conditions={'EDS': detector})
+        self.datafile.data['Map'] = datum
+
+        self.datafile.data['Spectrum'] = \
+            Analysis1D(7, np.float64, buffer=np.ones(7))
+
+        self.shared = SharedDataFile.create(self.datafile)
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        self.shared.close()
+        self.shared.unlink()
+
+    def testdescriptor(self):
+        descriptor = pickle.loads(pickle.dumps(self.shared.descriptor))
+        self.assertEqual(2, len(descriptor.data))
+        self.assertLess(len(pickle.dumps(descriptor)), 2048)
+
+    def testattach(self):
+        descriptor = pickle.loads(pickle.dumps(self.shared.descriptor))
+        attached = SharedDataFile.attach(descriptor)
+        datafile = attached.datafile
+
+        self.assertEqual('Shared', datafile.header.title)
+        self.assertEqual(1, len(datafile.conditions))
+
+        datum = datafile.data['Map']
+        self.assertIsInstance(datum, ImageRaster2DSpectral)
+        self.assertEqual((5, 6, 7), datum.shape)
+        self.assertEqual(np.uint16, datum.dtype)
+        np.testing.assert_array_equal(self.datafile.data['Map'], datum)
+        self.assertEqual(1, len(datum.conditions))
+        self.assertAlmostEqual(10.0, datum.conditions['EDS'].calibration.gain, 4)
+
+        datum = datafile.data['Spectrum']
+        self.assertIsInstance(datum, Analysis1D)
+        self.assertAlmostEqual(1.0, datum[0], 4)
+
+        # Shared buffer
+        datum[0] = 2.0
+        self.assertAlmostEqual(2.0, self.shared.datafile.data['Spectrum'][0], 4)
+
+        del datum, datafile
+        attached.close()
+
+    def testclose_kept_datum(self):
+        descriptor = self.shared.descriptor
+        with SharedDataFile.attach(descriptor) as attached:
+            datum = attached.datafile.data['Map']
+
+        # Block stays mapped while the datum is referenced
+        np.testing.assert_array_equal(self.datafile.data['Map'], datum)
+        self.assertFalse(attached.close())
+
+        del datum
+        self.assertTrue(attached.close())
+
+    def testattach_unknown_class(self):
+        descriptor = self.shared.descriptor
+        data = [datum._replace(clasz='os:system') for datum in descriptor.data]
+        descriptor = descriptor._replace(data=data)
+
+        attached = SharedDataFile.attach(descriptor)
+        self.assertRaises(ValueError, getattr, attached, 'datafile')
+        attached.close()
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
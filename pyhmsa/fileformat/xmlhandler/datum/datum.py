@@ -17,6 +17,8 @@ from pyhmsa.fileformat.xmlhandler.xmlhandler import \
 
 # Globals and constants variables.
 
+_CHUNK_SIZE = 16 * 1024 * 1024 # bytes
+
 class _DatumXMLHandler(_XMLHandler):
 
     def __init__(self, version, hmsa_file, conditions):
@@ -64,7 +66,7 @@ class _DatumXMLHandler(_XMLHandler):
 
     def _convert_datum_type(self, obj):
         element = etree.Element('DatumType')
-        element.text = DTYPES_LOOKUP_CONVERT[obj.dtype]
+        element.text = DTYPES_LOOKUP_CONVERT[obj.dtype.newbyteorder('=')]
         element.set('SizeInBytes', str(obj.dtype.itemsize))
         return [element]
 
@@ -144,13 +146,21 @@ class _DatumXMLHandler(_XMLHandler):
         return np.frombuffer(arr, dtype, length // dtype.itemsize)
 
     def _convert_binary(self, obj):
-        arr = array.array(obj.dtype.char, obj.ravel(order='F'))
-        try:
-            b = arr.tobytes()
-        except AttributeError: # For Python 2.7 and < 3.4
-            b = arr.tostring()
-        self._hmsa_file.write(b)
-        del arr
+        dtype = obj.dtype.newbyteorder('<') # Force little endian
+        arr = np.asarray(obj)
+
+        if arr.ndim == 0:
+            self._hmsa_file.write(arr.astype(dtype).tobytes())
+            return
+
+        # Write by blocks along the last axis, which are contiguous in
+        # Fortran order, to avoid copying the whole array (e.g. memory-mapped)
+        slice_size = max(1, arr.size // max(1, arr.shape[-1]))
+        step = max(1, _CHUNK_SIZE // (slice_size * dtype.itemsize))
+
+        for i in range(0, arr.shape[-1], step):
+            chunk = arr[..., i:i + step].astype(dtype, copy=False)
+            self._hmsa_file.write(chunk.tobytes(order='F'))
 
     def _convert(self, obj):
         elements = []
@@ -9,9 +9,11 @@ import xml.etree.ElementTree as etree
 import numpy as np
 
 # Local modules.
-from pyhmsa.fileformat.xmlhandler.datum.datum import _DatumXMLHandler
+from pyhmsa.fileformat.xmlhandler.datum.datum import \
+    _DatumXMLHandler, _CHUNK_SIZE
 from pyhmsa.spec.datum.imageraster import \
     ImageRaster2D, ImageRaster2DSpectral, ImageRaster2DHyperimage
+from pyhmsa.spec.datum.sparse import SparseImageRaster2DSpectral
 
 # Globals and constants variables.
 
@@ -92,6 +94,34 @@ class ImageRaster2DSpectralXMLHandler(_DatumXMLHandler):
 
         return element
 
+class SparseImageRaster2DSpectralXMLHandler(_DatumXMLHandler):
+    """
+    Writes sparse spectral raster datums as dense 2D/Spectral image rasters.
+    They are read back by :class:`ImageRaster2DSpectralXMLHandler`.
+    """
+
+    def can_parse(self, element):
+        return False
+
+    def can_convert(self, obj):
+        return isinstance(obj, SparseImageRaster2DSpectral)
+
+    def convert(self, obj):
+        element = etree.Element('ImageRaster', {'Class': '2D/Spectral'})
+        element.extend(self._convert(obj))
+
+        # Densify by blocks of y, the slowest axis in Fortran order
+        dtype = obj.dtype.newbyteorder('<') # Force little endian
+        x, y, channels = obj.shape
+        step = max(1, _CHUNK_SIZE // (x * channels * dtype.itemsize))
+
+        for start in range(0, y, step):
+            block = obj.get_block(slice(None), slice(start, start + step))
+            block = np.transpose(block, (1, 0, 2)).astype(dtype, copy=False)
+            self._hmsa_file.write(block.tobytes(order='C'))
+
+        return element
+
 class ImageRaster2DHyperimageXMLHandler(_DatumXMLHandler):
 
     def can_parse(self, element):
@@ -2,6 +2,7 @@
 
 # Standard library modules.
 import unittest
+import unittest.mock
 import logging
 import os
 import filecmp
@@ -11,11 +12,13 @@ import numpy as np
 
 # Local modules.
 from pyhmsa.fileformat.xmlhandler.datum.test_datum import BaseTestCaseDatum
+from pyhmsa.fileformat.xmlhandler.datum import imageraster
 from pyhmsa.fileformat.xmlhandler.datum.imageraster import \
     (ImageRaster2DXMLHandler, ImageRaster2DSpectralXMLHandler,
-     ImageRaster2DHyperimageXMLHandler)
+     ImageRaster2DHyperimageXMLHandler, SparseImageRaster2DSpectralXMLHandler)
 from pyhmsa.spec.datum.imageraster import \
     ImageRaster2D, ImageRaster2DSpectral, ImageRaster2DHyperimage
+from pyhmsa.spec.datum.sparse import SparseImageRaster2DSpectral
 
 # Globals and constants variables.
 
@@ -78,6 +81,39 @@ class TestImageRaster2DSpectral(BaseTestCaseDatum):
         self.assertTrue(filecmp.cmp(xml_filepath, self.xml_filepath, False))
         self.assertTrue(filecmp.cmp(hmsa_filepath, self.hmsa_filepath, False))
 
+class TestSparseImageRaster2DSpectral(BaseTestCaseDatum):
+
+    def setUp(self):
+        BaseTestCaseDatum.setUp(self)
+
+        testdata = os.path.join(os.path.dirname(__file__),
+                                '..', '..', '..', 'testdata')
+        self.hmsa_filepath = os.path.join(testdata, 'imageraster2dspectral.hmsa')
+        self.xml_filepath = os.path.join(testdata, 'imageraster2dspectral.xml')
+
+        buffer = sum(np.indices((5, 6, 7), dtype=np.uint8))
+        datum = ImageRaster2DSpectral(5, 6, 7, np.uint8, buffer)
+        self.obj = SparseImageRaster2DSpectral.fromdense(datum)
+
+    def testconvert(self):
+        xml_filepath, hmsa_filepath = \
+            self.save(SparseImageRaster2DSpectralXMLHandler, self.obj)
+
+        self.assertTrue(filecmp.cmp(xml_filepath, self.xml_filepath, False))
+        self.assertTrue(filecmp.cmp(hmsa_filepath, self.hmsa_filepath, False))
+
+    def testconvert_blocks(self):
+        # Blocks of 70 bytes, that is two y
+        get_block = unittest.mock.Mock(wraps=self.obj.get_block)
+        self.obj.get_block = get_block
+
+        with unittest.mock.patch.object(imageraster, '_CHUNK_SIZE', 70):
+            _xml_filepath, hmsa_filepath = \
+                self.save(SparseImageRaster2DSpectralXMLHandler, self.obj)
+
+        self.assertEqual(3, get_block.call_count)
+        self.assertTrue(filecmp.cmp(hmsa_filepath, self.hmsa_filepath, False))
+
 class TestImageRaster2DHyperimageXMLHandler(BaseTestCaseDatum):
 
     def setUp(self):
@@ -40,11 +40,34 @@ class _Calibration(_Condition):
         return self.get_quantity(index)
 
     def get_quantity(self, index):
+        """
+        Returns the physical quantity of a measurement ordinal, or an array
+        of quantities if *index* is an array.
+        """
         raise NotImplementedError
 
     def get_index(self, value):
+        """
+        Returns the measurement ordinal of a physical quantity, or an array
+        of ordinals if *value* is an array. The ordinal is -1 if the quantity
+        is out of the calibration.
+        """
         raise NotImplementedError
 
+    def get_axis(self, count):
+        """
+        Returns a read-only array with the physical quantities of the first
+        *count* measurement ordinals.
+        The array is cached until an attribute of the calibration is set.
+        """
+        axes = self._get_cached('axes', dict)
+        if count not in axes:
+            axis = np.asarray(self.get_quantity(np.arange(count)), dtype=float)
+            axis = np.array(np.broadcast_to(axis, (count,)))
+            axis.flags.writeable = False
+            axes[count] = axis
+        return axes[count]
+
 class CalibrationConstant(_Calibration):
 
     CLASS = 'Constant'
@@ -66,9 +89,13 @@ class CalibrationConstant(_Calibration):
         self.value = value
 
     def get_quantity(self, index):
+        if np.ndim(index):
+            return np.full(np.shape(index), float(self.value))
         return self.value
 
     def get_index(self, value):
+        if np.ndim(value):
+            return np.where(np.asarray(value) == float(self.value), 0, -1)
         return 0 if value == self.value else -1
 
 class CalibrationLinear(_Calibration):
@@ -98,16 +125,20 @@ class CalibrationLinear(_Calibration):
         self.offset = offset
 
     def get_quantity(self, index):
-        return self.func(index)
+        return float(self.offset) + float(self.gain) * np.asarray(index)
 
     def get_index(self, value):
-        return int((self.func - value).r[0])
+        # Quantities before the first ordinal are out of the calibration
+        indices = np.floor((np.asarray(value) - float(self.offset)) / float(self.gain))
+        indices = np.where(indices < 0, -1, indices)
+        if np.ndim(value):
+            return indices.astype(np.int64)
+        return int(indices)
 
     @property
     def func(self):
-        if not hasattr(self, '_func'):
-            self._func = np.poly1d([self.gain, self.offset])
-        return self._func
+        return self._get_cached('func',
+                                lambda: np.poly1d([self.gain, self.offset]))
 
 class CalibrationPolynomial(_Calibration):
 
@@ -134,16 +165,118 @@ class CalibrationPolynomial(_Calibration):
         return self.func(index)
 
     def get_index(self, value):
-        for root in (self.func - value).r:
-            if not np.iscomplex(root) and root >= 0:
-                return int(np.real(root))
-        return -1
+        """
+        Returns the measurement ordinal of a physical quantity, or an array
+        of ordinals if *value* is an array. The smallest positive ordinal is
+        returned if several ordinals have the same quantity.
+        """
+        if not np.ndim(value):
+            return self._get_index_scalar(float(value))
+
+        values = np.asarray(value, dtype=float)
+        indices = np.full(values.shape, -1, dtype=np.int64)
+        remaining = np.ones(values.shape, dtype=bool)
+
+        for lower, upper, increasing in self._segments:
+            flower = self.func(lower)
+            fupper = self.func(upper) if np.isfinite(upper) else \
+                (np.inf if increasing else -np.inf)
+            vmin, vmax = min(flower, fupper), max(flower, fupper)
+
+            mask = remaining & (values >= vmin) & (values <= vmax)
+            if not mask.any():
+                continue
+
+            if not np.isfinite(upper):
+                upper = self._find_upper(lower, values[mask], increasing)
+
+            roots = self._bisect(values[mask], lower, upper, increasing)
+            indices[mask] = self._round_roots(roots, values[mask], upper)
+            remaining &= ~mask
+
+        return indices
+
+    def _get_index_scalar(self, value):
+        # The roots of the polynomial are faster to find than the search
+        # over the segments for a single value
+        func = self.func
+        if func.order == 0:
+            return 0 if value == func(0.0) else -1
+
+        coefficients = np.array(func.coeffs, dtype=float)
+        coefficients[-1] -= value
+        roots = np.roots(coefficients)
+        reals = np.abs(np.imag(roots)) <= 1e-12 * np.maximum(1.0, np.abs(roots))
+        roots = np.real(roots[reals])
+        roots = roots[roots >= 0]
+        if roots.size == 0:
+            return -1
+
+        root = roots.min()
+        index = int(np.floor(root))
+        if np.isclose(func(index + 1), value, rtol=1e-12, atol=0.0):
+            index += 1
+        return index
+
+    @property
+    def _segments(self):
+        # Monotone segments (lower, upper, increasing) of the positive domain
+        def create():
+            func = self.func
+            if func.order == 0:
+                return [(0.0, 0.0, True)]
+
+            roots = func.deriv().r
+            roots = np.real(roots[np.abs(np.imag(roots)) < 1e-12])
+            bounds = [0.0] + sorted(set(roots[roots > 0])) + [np.inf]
+
+            segments = []
+            for lower, upper in zip(bounds[:-1], bounds[1:]):
+                middle = lower + 1.0 if not np.isfinite(upper) else (lower + upper) / 2
+                segments.append((lower, upper, func.deriv()(middle) >= 0))
+            return segments
+
+        return self._get_cached('segments', create)
+
+    def _find_upper(self, lower, values, increasing):
+        target = values.max() if increasing else values.min()
+        upper = max(2.0 * lower, 1.0)
+        while np.isfinite(upper):
+            fupper = self.func(upper)
+            if (fupper >= target) if increasing else (fupper <= target):
+                break
+            upper *= 2.0
+        return upper
+
+    def _bisect(self, values, lower, upper, increasing):
+        lowers = np.full(values.shape, lower, dtype=float)
+        uppers = np.full(values.shape, upper, dtype=float)
+
+        for _ in range(1100):
+            middles = (lowers + uppers) / 2
+            fmiddles = self.func(middles)
+            below = fmiddles < values if increasing else fmiddles > values
+            done = (middles == lowers) | (middles == uppers)
+
+            lowers = np.where(below, middles, lowers)
+            uppers = np.where(below, uppers, middles)
+            if done.all():
+                break
+
+        # Upper bound is the first position reaching the value
+        return uppers
+
+    def _round_roots(self, roots, values, upper):
+        # Next ordinal if its quantity is the value, within rounding errors
+        indices = np.floor(roots)
+        nexts = indices + 1
+        hits = (nexts <= upper) & \
+            np.isclose(self.func(nexts), values, rtol=1e-12, atol=0.0)
+        return np.where(hits, nexts, indices)
 
     @property
     def func(self):
-        if not hasattr(self, '_func'):
-            self._func = np.poly1d(self.coefficients)
-        return self._func
+        return self._get_cached('func', lambda: np.poly1d(self.coefficients))
 
 class CalibrationExplicit(_Calibration):
 
@@ -171,10 +304,32 @@ class CalibrationExplicit(_Calibration):
         self.labels = labels
 
     def get_quantity(self, index):
+        if np.ndim(index):
+            return np.asarray(self.values)[index]
         return self.values[index]
 
     def get_index(self, value):
-        return np.abs(self.values - value).argmin()
+        order, sorted_values = self._sorted_values
+        values = np.asarray(value, dtype=float)
+
+        # Nearest of the two neighbours in the sorted values
+        right = np.clip(np.searchsorted(sorted_values, values), 0, len(sorted_values) - 1)
+        left = np.clip(right - 1, 0, len(sorted_values) - 1)
+        nearest = np.where(np.abs(sorted_values[left] - values) <= \
+                           np.abs(sorted_values[right] - values), left, right)
+        indices = order[nearest]
+
+        if np.ndim(value):
+            return indices
+        return indices.item()
+
+    @property
+    def _sorted_values(self):
+        def create():
+            values = np.asarray(self.values, dtype=float)
+            order = np.argsort(values, kind='stable')
+            return order, values[order]
+        return self._get_cached('sorted_values', create)
 
     def get_label(self, index):
         if self.labels is None:
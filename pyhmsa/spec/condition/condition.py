@@ -15,3 +15,23 @@ class _Condition(Parameter):
 
     TEMPLATE = None
     CLASS = None
+
+    def _get_cached(self, name, func, *conditions):
+        # Cached values are computed again when any attribute of this
+        # condition or of the other *conditions* it depends on is set
+        state = tuple(self.__dict__.get(attr) for attr in self.__attributes__)
+        for condition in conditions:
+            state += (condition,) + \
+                tuple(condition.__dict__.get(attr)
+                      for attr in condition.__attributes__)
+        cache = self.__dict__.setdefault('_cache', {})
+
+        if name in cache:
+            cached_state, value = cache[name]
+            if len(cached_state) == len(state) and \
+                    all(a is b for a, b in zip(cached_state, state)):
+                return value
+
+        value = func()
+        cache[name] = (state, value)
+        return value
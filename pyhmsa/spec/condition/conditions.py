@@ -17,7 +17,6 @@ class Conditions(_IdentifierDict):
 
     def __init__(self, datafile=None):
         super().__init__()
-        self._lock = datafile._lock if datafile else threading.Lock()
 
     def __setitem__(self, identifier, condition):
         if not isinstance(condition, _Condition):
@@ -34,7 +33,7 @@ class WeakConditions(_WeakValueIdentifierDict):
     def __init__(self, datafile):
         super().__init__()
         self._datafile = datafile
-        self._lock = datafile._lock
+        self._lock = threading.Lock()
 
     def __setitem__(self, identifier, condition):
         self._datafile.conditions[identifier] = condition
@@ -3,6 +3,7 @@ Detector condition
 """
 
 # Standard library modules.
+import copy
 
 # Third party modules.
 
@@ -273,6 +274,22 @@ class DetectorSpectrometer(_Detector):
         self.calibration = calibration
         self.collection_mode = collection_mode
 
+    def _get_cached_calibration(self, name, func):
+        # The calibration is cached with read-only values and a copy is
+        # returned, so that the cached one cannot be modified
+        def create():
+            calibration = func()
+            calibration.values.flags.writeable = False
+            return calibration
+
+        calibration = copy.copy(self._get_cached(name, create, self.calibration))
+        calibration.__dict__.pop('_cache', None)
+        return calibration
+
+    def _get_calibration_axis(self, multiplier):
+        axis = self.calibration.get_axis(int(self.channel_count))
+        return axis * multiplier
+
     def get_calibration_energy(self):
         quantity = self.calibration.quantity.lower()
         prefix, baseunit, _exponent = parse_unit(self.calibration.unit)
@@ -284,9 +301,11 @@ class DetectorSpectrometer(_Detector):
 
         # From wavelength
         if quantity == 'wavelength' and baseunit in ['m', u'\u00c5']:
-            values = [wavelength_to_energy_eV(self.calibration(i) * multiplier) \
-                      for i in range(int(self.channel_count))]
-            return CalibrationExplicit('Energy', 'eV', list(values))
+            def create():
+                axis = self._get_calibration_axis(multiplier)
+                values = wavelength_to_energy_eV(axis)
+                return CalibrationExplicit('Energy', 'eV', values)
+            return self._get_cached_calibration('calibration_energy', create)
 
         raise ValueError('Cannot convert calibration to energy')
 
@@ -303,9 +322,11 @@ class DetectorSpectrometer(_Detector):
 
         # From energy
         if quantity == 'energy' and baseunit == 'eV':
-            values = [energy_to_wavelength_m(self.calibration(i) * multiplier) \
-                      for i in range(int(self.channel_count))]
-            return CalibrationExplicit('Wavelength', 'm', list(values))
+            def create():
+                axis = self._get_calibration_axis(multiplier)
+                values = energy_to_wavelength_m(axis)
+                return CalibrationExplicit('Wavelength', 'm', values)
+            return self._get_cached_calibration('calibration_wavelength', create)
 
         raise ValueError('Cannot convert calibration to wavelength')
 
@@ -444,21 +465,17 @@ class DetectorSpectrometerWDS(DetectorSpectrometer):
             if quantity == 'position' and baseunit == 'm':
                 if self.crystal_2d is None:
                     raise ValueError('Element "crystal_2d" is not defined')
-                d_spacing = convert_unit('m', self.crystal_2d)
+                d_spacing = float(convert_unit('m', self.crystal_2d))
 
                 if self.rowland_circle_diameter is None:
                     raise ValueError('Element "rowland_circle_diameter" is not defined')
-                rowland_m = convert_unit('m', self.rowland_circle_diameter)
+                rowland_m = float(convert_unit('m', self.rowland_circle_diameter))
 
-                values = []
-                for i in range(int(self.channel_count)):
-                    v = self.calibration(i) * multiplier
-                    v /= rowland_m
-                    v *= d_spacing
-                    v = wavelength_to_energy_eV(v)
-                    values.append(v)
-
-                return CalibrationExplicit('Energy', 'eV', list(values))
+                def create():
+                    axis = self._get_calibration_axis(multiplier)
+                    values = wavelength_to_energy_eV(axis / rowland_m * d_spacing)
+                    return CalibrationExplicit('Energy', 'eV', values)
+                return self._get_cached_calibration('calibration_energy', create)
 
         raise ValueError('Cannot convert calibration to energy')
 
@@ -476,20 +493,17 @@ class DetectorSpectrometerWDS(DetectorSpectrometer):
             if quantity == 'position' and baseunit == 'm':
                 if self.crystal_2d is None:
                     raise ValueError('Element "crystal_2d" is not defined')
-                d_spacing = convert_unit('m', self.crystal_2d)
+                d_spacing = float(convert_unit('m', self.crystal_2d))
 
                 if self.rowland_circle_diameter is None:
                     raise ValueError('Element "rowland_circle_diameter" is not defined')
-                rowland_m = convert_unit('m', self.rowland_circle_diameter)
-
-                values = []
-                for i in range(int(self.channel_count)):
-                    v = self.calibration(i) * multiplier
-                    v /= rowland_m
-                    v *= d_spacing
-                    values.append(v)
+                rowland_m = float(convert_unit('m', self.rowland_circle_diameter))
 
-                return CalibrationExplicit('Wavelength', 'm', list(values))
+                def create():
+                    axis = self._get_calibration_axis(multiplier)
+                    values = axis / rowland_m * d_spacing
+                    return CalibrationExplicit('Wavelength', 'm', values)
+                return self._get_cached_calibration('calibration_wavelength', create)
 
         raise ValueError('Cannot convert calibration to wavelength')
 
@@ -507,30 +521,24 @@ class DetectorSpectrometerWDS(DetectorSpectrometer):
         # From energy and wavelength
         if self.crystal_2d is None:
             raise ValueError('Element "crystal_2d" is not defined')
-        d_spacing = convert_unit('m', self.crystal_2d)
+        d_spacing = float(convert_unit('m', self.crystal_2d))
 
         if self.rowland_circle_diameter is None:
             raise ValueError('Element "rowland_circle_diameter" is not defined')
-        rowland_m = convert_unit('m', self.rowland_circle_diameter)
+        rowland_m = float(convert_unit('m', self.rowland_circle_diameter))
 
         if quantity == 'wavelength' and baseunit in ['m', u'\u00c5']:
-            values = []
-            for i in range(int(self.channel_count)):
-                v = self.calibration(i) * multiplier
-                v *= rowland_m
-                v /= d_spacing
-                values.append(v)
-
-            return CalibrationExplicit('Position', 'm', list(values))
+            def create():
+                axis = self._get_calibration_axis(multiplier)
+                values = axis * rowland_m / d_spacing
+                return CalibrationExplicit('Position', 'm', values)
+            return self._get_cached_calibration('calibration_position', create)
         elif quantity == 'energy' and baseunit == 'eV':
-            values = []
-            for i in range(int(self.channel_count)):
-                v = energy_to_wavelength_m(self.calibration(i) * multiplier)
-                v *= rowland_m
-                v /= d_spacing
-                values.append(v)
-
-            return CalibrationExplicit('Position', 'm', list(values))
+            def create():
+                axis = self._get_calibration_axis(multiplier)
+                values = energy_to_wavelength_m(axis) * rowland_m / d_spacing
+                return CalibrationExplicit('Position', 'm', values)
+            return self._get_cached_calibration('calibration_position', create)
 
         raise ValueError('Cannot convert calibration to position')
 
@@ -6,6 +6,7 @@ import logging
 import pickle
 
 # Third party modules.
+import numpy as np
 
 # Local modules.
 from pyhmsa.spec.condition.calibration import \
@@ -59,6 +60,12 @@ class TestCalibrationConstant(unittest.TestCase):
 
         self.assertRaises(ValueError, CalibrationConstant, 'Energy', 'eV', None)
 
+    def testarray(self):
+        np.testing.assert_array_almost_equal([-237.098251] * 3,
+                                             self.cal.get_quantity(np.arange(3)))
+        np.testing.assert_array_equal([0, -1],
+                                      self.cal.get_index([-237.098251, 0.0]))
+
     def testpickle(self):
         s = pickle.dumps(self.cal)
         cal = pickle.loads(s)
@@ -92,6 +99,32 @@ class TestCalibrationLinear(unittest.TestCase):
         self.assertRaises(ValueError, CalibrationLinear, 'Energy', 'eV', None, -237.098251)
         self.assertRaises(ValueError, CalibrationLinear, 'Energy', 'eV', 2.49985, None)
 
+    def testarray(self):
+        indices = np.arange(4096)
+        values = self.cal.get_quantity(indices)
+        np.testing.assert_array_almost_equal(-237.098251 + 2.49985 * indices, values)
+        np.testing.assert_array_equal(indices, self.cal.get_index(values + 0.1))
+
+    def testget_index_negative(self):
+        self.assertEqual(-1, self.cal.get_index(-237.098251 - 0.1))
+        self.assertEqual(-1, self.cal.get_index(-237.098251 - 2.49985 * 1.5))
+        np.testing.assert_array_equal([-1, -1, 0, 1],
+                                      self.cal.get_index([-300.0, -237.2, -237.0, -234.5]))
+
+        cal = CalibrationLinear('Energy', 'eV', -2.0, 10.0)
+        np.testing.assert_array_equal([-1, 0, 0, 1], cal.get_index([10.5, 10.0, 9.5, 7.9]))
+
+    def testget_axis(self):
+        axis = self.cal.get_axis(3)
+        np.testing.assert_array_almost_equal([-237.098251, -234.598401, -232.098551], axis)
+        self.assertIs(axis, self.cal.get_axis(3))
+        self.assertFalse(axis.flags.writeable)
+
+        self.cal.offset = 0.0
+        axis = self.cal.get_axis(3)
+        np.testing.assert_array_almost_equal([0.0, 2.49985, 4.9997], axis)
+        self.assertAlmostEqual(2.49985, self.cal.func(1), 4)
+
     def testpickle(self):
         s = pickle.dumps(self.cal)
         cal = pickle.loads(s)
@@ -129,6 +162,34 @@ class TestCalibrationPolynomial(unittest.TestCase):
 
         self.assertRaises(ValueError, CalibrationPolynomial, 'Energy', 'eV', None)
 
+    def testarray(self):
+        np.testing.assert_array_almost_equal([-0.018, -1.462],
+                                             self.cal.get_quantity(np.arange(2)))
+        np.testing.assert_array_equal([0, 1, -1],
+                                      self.cal.get_index([-0.018, -1.463, 1000]))
+
+    def testget_index_segments(self):
+        # (x - 2)^2, decreasing then increasing
+        cal = CalibrationPolynomial('Energy', 'eV', (1.0, -4.0, 4.0))
+        np.testing.assert_array_equal([0, 1, 2, 5, -1],
+                                      cal.get_index([4.0, 1.0, 0.0, 9.0, -1.0]))
+        self.assertEqual(1, cal.get_index(0.5))
+
+        # Changed coefficients
+        cal.coefficients = (1.0, 0.0)
+        np.testing.assert_array_equal([0, 4], cal.get_index([0.0, 4.5]))
+
+    def testget_index_scalar(self):
+        # Scalar and array searches give the same ordinals
+        for coefficients in [(-2.255, 0.677, 0.134, -0.018), (1.0, -4.0, 4.0),
+                             (1.0, 0.0), (5.0,)]:
+            cal = CalibrationPolynomial('Energy', 'eV', coefficients)
+            values = np.concatenate([cal(np.arange(20)),
+                                     np.linspace(-50.0, 500.0, 101)])
+            expected = cal.get_index(values)
+            for value, index in zip(values, expected):
+                self.assertEqual(index, cal.get_index(value))
+
     def testpickle(self):
         s = pickle.dumps(self.cal)
         cal = pickle.loads(s)
@@ -182,6 +243,15 @@ class TestCalibrationExplicit(unittest.TestCase):
         self.assertEqual('c', self.cal.get_label(2))
         self.assertEqual('d', self.cal.get_label(3))
 
+    def testarray(self):
+        np.testing.assert_array_almost_equal([-0.018, 0.677],
+                                             self.cal.get_quantity(np.array([1, 3])))
+        np.testing.assert_array_equal([0, 0, 1, 2, 3, 3],
+                                      self.cal.get_index([-5.0, -2.0, 0.0, 0.2, 0.5, 10.0]))
+
+        cal = CalibrationExplicit('Energy', 'eV', (3.0, 1.0, 2.0))
+        np.testing.assert_array_equal([1, 2, 0], cal.get_index([0.9, 2.2, 2.9]))
+
     def testpickle(self):
         s = pickle.dumps(self.cal)
         cal = pickle.loads(s)
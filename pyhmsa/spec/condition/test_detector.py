@@ -12,7 +12,8 @@ from pyhmsa.spec.condition.detector import \
     (PulseHeightAnalyser, WindowLayer, Window,
      _Detector, DetectorCamera, DetectorSpectrometer,
      DetectorSpectrometerCL, DetectorSpectrometerWDS, DetectorSpectrometerXEDS)
-from pyhmsa.spec.condition.calibration import CalibrationConstant
+from pyhmsa.spec.condition.calibration import \
+    CalibrationConstant, CalibrationLinear
 
 # Globals and constants variables.
 from pyhmsa.spec.condition.detector import \
@@ -406,6 +407,36 @@ class TestDetectorSpectrometerWDS(unittest.TestCase):
         self.assertEqual('m', cal.unit)
         self.assertAlmostEqual(-0.8374, cal(0), 4)
 
+    def testcalibration_position_cached(self):
+        cal = self.det.calibration_position
+        self.assertIs(cal.values, self.det.calibration_position.values)
+
+        self.det.crystal_2d = 4.0
+        cal2 = self.det.calibration_position
+        self.assertIsNot(cal.values, cal2.values)
+        self.assertAlmostEqual(-0.8374 * 8.742 / 4.0, cal2(0), 3)
+
+        self.det.calibration.value = -500.0
+        self.assertIsNot(cal2.values, self.det.calibration_position.values)
+
+    def testcalibration_position_cached_copy(self):
+        cal = self.det.calibration_position
+        expected = cal(0)
+        self.assertIsNot(cal, self.det.calibration_position)
+        self.assertRaises(ValueError, cal.values.__setitem__, 0, 1.0)
+
+        cal.values = [1.0, 2.0]
+        self.assertAlmostEqual(expected, self.det.calibration_position(0), 4)
+
+    def testcalibration_energy_from_position(self):
+        self.det.calibration = CalibrationLinear('Position', 'mm', 0.01, 50.0)
+        cal = self.det.calibration_energy
+        self.assertEqual('Energy', cal.quantity)
+        self.assertEqual('eV', cal.unit)
+        self.assertEqual(4096, len(cal.values))
+        self.assertAlmostEqual(3971.1247, cal(0), 4)
+        self.assertAlmostEqual(2183.1362, cal(4095), 4)
+
     def testpickle(self):
         self.det.dispersion_element = 'TAP'
         self.det.crystal_2d = 8.742
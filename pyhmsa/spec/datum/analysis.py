@@ -53,18 +53,21 @@ class Analysis1D(_Analysis):
                                buffer, offset, strides, order, conditions)
 
     def get_xdata(self, calibration=None):
-        xs = range(self.channels)
-
+        """
+        Returns the channels, or their calibrated values if a calibration is
+        specified or found in the conditions.
+        Calibrated values are a copy of the array cached by the calibration.
+        """
         if calibration is None:
             conditions = self.conditions.findvalues(DetectorSpectrometer)
             if conditions:
                 condition = next(iter(conditions))
                 calibration = condition.calibration
 
-        if calibration is not None:
-            xs = list(map(calibration, xs))
+        if calibration is None:
+            return np.arange(self.channels)
 
-        return np.array(xs)
+        return np.array(calibration.get_axis(int(self.channels)))
 
     def set_xlabel(self, xlabel="", unit=""):
         xlabel += ' (%s)' % unit
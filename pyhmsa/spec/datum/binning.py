@@ -0,0 +1,259 @@
+"""
+Binning of raster and analysis list datums
+"""
+
+# Standard library modules.
+import copy
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.spec.datum.analysislist import \
+    AnalysisList0D, AnalysisList1D, AnalysisList2D
+from pyhmsa.spec.datum.imageraster import \
+    ImageRaster2D, ImageRaster2DSpectral, ImageRaster2DHyperimage
+from pyhmsa.spec.condition.acquisition import \
+    AcquisitionRasterXY, AcquisitionRasterLinescan
+from pyhmsa.spec.condition.detector import DetectorSpectrometer
+from pyhmsa.spec.condition.calibration import \
+    (CalibrationConstant, CalibrationLinear, CalibrationPolynomial,
+     CalibrationExplicit)
+from pyhmsa.type.numerical import validate_dtype, convert_value, convert_unit
+
+# Globals and constants variables.
+from pyhmsa.spec.condition.acquisition import \
+    (POSITION_LOCATION_START, POSITION_LOCATION_CENTER,
+     POSITION_LOCATION_END)
+
+CHUNK_SIZE = 16 * 1024 * 1024 # bytes
+
+def _get_factors(datum, x, y, channel):
+    # Binning factor of each axis of the datum
+    if isinstance(datum, ImageRaster2D):
+        factors, unused = (x, y), (channel,)
+    elif isinstance(datum, ImageRaster2DSpectral):
+        factors, unused = (x, y, channel), ()
+    elif isinstance(datum, ImageRaster2DHyperimage):
+        factors, unused = (x, y, 1, 1), (channel,)
+    elif isinstance(datum, AnalysisList0D):
+        factors, unused = (x, 1), (y, channel)
+    elif isinstance(datum, AnalysisList1D):
+        factors, unused = (x, channel), (y,)
+    elif isinstance(datum, AnalysisList2D):
+        factors, unused = (x, 1, 1), (y, channel)
+    else:
+        raise ValueError('Unsupported datum type: %s' % type(datum).__name__)
+
+    if any(factor != 1 for factor in unused):
+        raise ValueError('Binning factor not applicable to %s' % \
+                         type(datum).__name__)
+    if any(int(factor) != factor or factor < 1 for factor in factors):
+        raise ValueError('Binning factors must be integers greater than 0')
+
+    return tuple(int(factor) for factor in factors)
+
+def _bin_calibration(calibration, factor):
+    # Quantity of a binned channel is the quantity at the center of the
+    # binned channels
+    if isinstance(calibration, CalibrationConstant):
+        return calibration
+    elif isinstance(calibration, CalibrationLinear):
+        gain = float(calibration.gain)
+        offset = float(calibration.offset)
+        return CalibrationLinear(calibration.quantity, calibration.unit,
+                                 gain * factor,
+                                 offset + gain * (factor - 1) / 2.0)
+    elif isinstance(calibration, CalibrationPolynomial):
+        func = np.poly1d(np.asarray(calibration.coefficients, dtype=float))
+        func = func(np.poly1d([factor, (factor - 1) / 2.0]))
+        return CalibrationPolynomial(calibration.quantity, calibration.unit,
+                                     func.coeffs)
+    elif isinstance(calibration, CalibrationExplicit):
+        values = np.asarray(calibration.values, dtype=float)
+        count = values.size // factor
+        centers = np.arange(count) * factor + (factor - 1) / 2.0
+        values = np.interp(centers, np.arange(values.size), values)
+        labels = calibration.labels
+        if labels is not None:
+            labels = list(labels)[:count * factor:factor]
+        return CalibrationExplicit(calibration.quantity, calibration.unit,
+                                   values, labels)
+    raise ValueError('Unknown calibration: %s' % type(calibration).__name__)
+
+def _bin_count(count, factor, partial):
+    # Trailing steps that do not fill a block are discarded, unless partial
+    # blocks are kept
+    if partial:
+        return -(-int(count) // factor)
+    return int(count) // factor
+
+def _bin_offsets(count, factor, partial):
+    # Offsets, in steps, of the start, center and end positions of a binned
+    # raster: its first and last steps are the centers of the first and last
+    # blocks
+    count = int(count)
+    lower = (_bin_count(count, factor, partial) - 1) * factor
+    first = (min(factor, count) - 1) / 2.0
+    last = (lower + min(lower + factor, count) - 1) / 2.0
+    return {POSITION_LOCATION_START: first,
+            POSITION_LOCATION_CENTER: (first + last - (count - 1)) / 2.0,
+            POSITION_LOCATION_END: last - (count - 1)}
+
+def _shift(value, steps, step_size):
+    # Moves a coordinate by a number of steps, in the unit of the coordinate
+    if value is None or step_size is None or steps == 0:
+        return value
+    step_size = float(convert_unit(value.unit, step_size))
+    return (float(value) + steps * step_size, value.unit)
+
+def _bin_condition(condition, x, y, channel, partial=False):
+    if isinstance(condition, AcquisitionRasterXY) and (x, y) != (1, 1):
+        condition = copy.deepcopy(condition)
+
+        offsets_x = _bin_offsets(condition.step_count_x, x, partial)
+        offsets_y = _bin_offsets(condition.step_count_y, y, partial)
+        for location, position in condition.positions.items():
+            position.x = _shift(position.x, offsets_x[location],
+                                condition.step_size_x)
+            position.y = _shift(position.y, offsets_y[location],
+                                condition.step_size_y)
+
+        condition.step_count_x = _bin_count(condition.step_count_x, x, partial)
+        condition.step_count_y = _bin_count(condition.step_count_y, y, partial)
+        condition.step_size_x = _scale(condition.step_size_x, x)
+        condition.step_size_y = _scale(condition.step_size_y, y)
+        _scale_dwell_times(condition, x * y)
+
+    elif isinstance(condition, AcquisitionRasterLinescan) and x != 1:
+        condition = copy.deepcopy(condition)
+
+        # The direction of the line is only known from both end positions
+        start, end = condition.position_start, condition.position_end
+        count = int(condition.step_count)
+        if start is not None and end is not None and count > 1:
+            step_sizes = {}
+            for name in ('x', 'y', 'z'):
+                value_start, value_end = getattr(start, name), getattr(end, name)
+                if value_start is None or value_end is None:
+                    continue
+                value_end = float(convert_unit(value_start.unit, value_end))
+                step_sizes[name] = convert_value(
+                    (value_end - float(value_start)) / (count - 1), value_start.unit)
+
+            offsets = _bin_offsets(count, x, partial)
+            for location, position in condition.positions.items():
+                for name, step_size in step_sizes.items():
+                    setattr(position, name, _shift(getattr(position, name),
+                                                   offsets[location], step_size))
+
+        condition.step_count = _bin_count(count, x, partial)
+        condition.step_size = _scale(condition.step_size, x)
+        _scale_dwell_times(condition, x)
+
+    elif isinstance(condition, DetectorSpectrometer) and channel != 1:
+        condition = copy.deepcopy(condition)
+        condition.channel_count = int(condition.channel_count) // channel
+        condition.calibration = _bin_calibration(condition.calibration, channel)
+
+    return condition
+
+def _scale(value, factor):
+    # Keeps the unit of the value, which is lost by the multiplication
+    if value is None:
+        return None
+    return (float(value) * factor, value.unit)
+
+def _scale_dwell_times(condition, factor):
+    # A binned measurement accumulates the dwell times of its measurements
+    condition.dwell_time = _scale(condition.dwell_time, factor)
+    condition.dwell_time_live = _scale(condition.dwell_time_live, factor)
+
+def bin(datum, x=1, y=1, channel=1, dtype=None, out=None,
+        chunk_size=CHUNK_SIZE):
+    """
+    Sums blocks of adjacent pixels, analyses and/or channels of a datum.
+    Trailing pixels, analyses or channels that do not fill a block are
+    discarded.
+
+    The datum is read by blocks of at most about *chunk_size* bytes, so it
+    can be memory-mapped. The result is written in *out* if specified, for
+    instance a :class:`numpy.memmap` to bin datums larger than memory.
+
+    The binned datum has the conditions of the datum, except the following
+    ones which are copied and updated:
+
+        * :class:`AcquisitionRasterXY` and :class:`AcquisitionRasterLinescan`:
+          step counts are divided and step sizes and dwell times are
+          multiplied by the binning factors. The start, center and end
+          positions are moved to the centers of the first and last blocks,
+          without the discarded trailing pixels. The positions of a
+          line scan are only moved if both its start and end positions
+          are defined;
+        * :class:`DetectorSpectrometer`: the channel count is divided and
+          the calibration gives the quantity at the center of the binned
+          channels.
+
+    :arg datum: raster datum (:class:`ImageRaster2D`,
+        :class:`ImageRaster2DSpectral` or :class:`ImageRaster2DHyperimage`)
+        or analysis list datum (:class:`AnalysisList0D`,
+        :class:`AnalysisList1D` or :class:`AnalysisList2D`)
+    :arg x: binning factor in x, or of the analyses of an analysis list
+    :arg y: binning factor in y
+    :arg channel: binning factor of the channels
+    :arg dtype: data type of the binned datum (default: 64-bit integers for
+        integer datums, 64-bit floats otherwise)
+    :arg out: array where the binned values are written
+    :arg chunk_size: approximate maximum number of bytes read at once
+
+    :return: binned datum of the same class as *datum*
+    """
+    factors = _get_factors(datum, x, y, channel)
+
+    array = np.asarray(datum)
+    shape = tuple(length // factor for length, factor in zip(array.shape, factors))
+    if any(length == 0 for length in shape):
+        raise ValueError('Binning factors larger than datum dimensions')
+
+    if out is not None:
+        if tuple(out.shape) != shape:
+            raise ValueError('Output must have shape %s' % (shape,))
+        dtype = out.dtype
+    elif dtype is None:
+        if np.issubdtype(array.dtype, np.integer):
+            dtype = np.int64
+        else:
+            dtype = np.float64
+    dtype = np.dtype(dtype)
+    validate_dtype(dtype)
+
+    if out is None:
+        out = np.zeros(shape, dtype)
+
+    # Blocks of output rows along the first axis
+    row_nbytes = factors[0] * int(np.prod(array.shape[1:])) * array.itemsize
+    step = max(1, chunk_size // max(1, row_nbytes))
+
+    # Each axis of a block is split into (length, factor) and summed
+    crop = tuple(slice(0, length * factor)
+                 for length, factor in zip(shape[1:], factors[1:]))
+    sum_axes = tuple(range(1, 2 * len(shape), 2))
+
+    for start in range(0, shape[0], step):
+        stop = min(start + step, shape[0])
+        block = np.asarray(array[(slice(start * factors[0],
+                                        stop * factors[0]),) + crop])
+
+        block_shape = []
+        for length, factor in zip((stop - start,) + shape[1:], factors):
+            block_shape.extend((length, factor))
+
+        out[start:stop] = block.reshape(block_shape).sum(axis=sum_axes,
+                                                         dtype=dtype)
+
+    binned = out.view(type(datum))
+    for identifier, condition in datum.conditions.items():
+        binned.conditions[identifier] = \
+            _bin_condition(condition, x, y, channel)
+
+    return binned
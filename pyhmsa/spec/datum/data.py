@@ -8,6 +8,7 @@ Dictionary of datum objects
 
 # Local modules.
 from pyhmsa.spec.datum.datum import _Datum
+from pyhmsa.spec.datum.sparse import SparseImageRaster2DSpectral
 from pyhmsa.type.identifier import _IdentifierDict
 from pyhmsa.spec.condition.conditions import Conditions, WeakConditions
 
@@ -18,10 +19,9 @@ class Data(_IdentifierDict):
     def __init__(self, datafile):
         super().__init__()
         self._datafile = datafile
-        self._lock = datafile._lock
 
     def __setitem__(self, identifier, datum):
-        if not isinstance(datum, _Datum):
+        if not isinstance(datum, (_Datum, SparseImageRaster2DSpectral)):
             raise ValueError("Value is not a datum")
 
         # Remove old datum
@@ -0,0 +1,298 @@
+"""
+Binning of event lists (photon lists) into spectral raster datums
+"""
+
+# Standard library modules.
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.spec.datum.imageraster import ImageRaster2DSpectral
+from pyhmsa.spec.datum.analysislist import AnalysisList1D, AnalysisList2D
+from pyhmsa.spec.condition.acquisition import AcquisitionRasterXY
+from pyhmsa.spec.condition.detector import DetectorSpectrometerXEDS
+from pyhmsa.type.numerical import validate_dtype
+
+# Globals and constants variables.
+
+CHUNK_SIZE = 16 * 1024 * 1024 # bytes
+
+EVENT_DTYPE = np.dtype([('x', '<u2'), ('y', '<u2'), ('channel', '<u2'),
+                        ('timestamp', '<u8')])
+
+def read_events(filepath, dtype=EVENT_DTYPE, offset=0, chunk_size=CHUNK_SIZE):
+    """
+    Yields chunks of events of a binary file of fixed-size records.
+
+    :arg filepath: path of the file
+    :arg dtype: structured data type of a record, with ``x``, ``y`` and
+        ``channel`` fields and, optionally, a ``timestamp`` field
+    :arg offset: number of bytes to skip at the beginning of the file
+    :arg chunk_size: approximate maximum number of bytes of a chunk
+    """
+    dtype = np.dtype(dtype)
+    count = max(1, chunk_size // dtype.itemsize)
+
+    with open(filepath, 'rb') as fp:
+        fp.seek(offset)
+        while True:
+            events = np.fromfile(fp, dtype, count)
+            if events.size == 0:
+                break
+            yield events
+
+def _accumulate(flat, indices):
+    # Dense chunks are counted at once, sparse ones only where needed
+    if indices.size * 4 >= flat.size:
+        counts = np.bincount(indices, minlength=flat.size)
+        np.add(flat, counts, out=flat, casting='unsafe')
+    else:
+        np.add.at(flat, indices, 1)
+
+class EventBinner(object):
+
+    def __init__(self, x, y, channels, calibration,
+                 step_size_x=None, step_size_y=None,
+                 frame_duration=None, frame_images=False, tick=1.0,
+                 dtype=np.uint32, out=None):
+        """
+        Accumulates events, each the detection of a photon at pixel
+        ``(x, y)`` in a channel of the spectrometer, into a spectral raster
+        datum. Events are added by chunks of arrays, from
+        :func:`read_events` for instance, and counted with
+        :func:`numpy.bincount` or :func:`numpy.add.at`.
+
+        If a *frame_duration* is specified, events are also sliced in time
+        in frames: the sum spectrum of each frame is accumulated as an
+        :class:`AnalysisList1D` and, if *frame_images* is ``True``, the
+        count image of each frame as an :class:`AnalysisList2D`.
+        The frame of an event is its timestamp divided by the frame duration.
+
+        :arg x: number of pixels in x
+        :arg y: number of pixels in y
+        :arg channels: number of channels
+        :arg calibration: energy calibration of the channels
+        :type calibration: :class:`._Calibration`
+        :arg step_size_x: dimension of each step in x direction (optional)
+        :arg step_size_y: dimension of each step in y direction (optional)
+        :arg frame_duration: duration of a frame (s) (optional)
+        :arg frame_images: whether to accumulate the count image of each frame
+        :arg tick: duration of a unit of the timestamps (s)
+        :arg dtype: data type of the counts
+        :arg out: C-contiguous array where the counts are accumulated, for
+            instance a :class:`numpy.memmap`. Its values are not reset.
+        """
+        if x <= 0 or y <= 0 or channels <= 0:
+            raise ValueError('Dimensions must be greater than 0')
+        if frame_duration is not None and frame_duration <= 0:
+            raise ValueError('Frame duration must be greater than 0')
+        if tick <= 0:
+            raise ValueError('Tick must be greater than 0')
+
+        shape = (int(x), int(y), int(channels))
+        if out is not None:
+            if tuple(out.shape) != shape:
+                raise ValueError('Output must have shape %s' % (shape,))
+            if not out.flags.c_contiguous:
+                raise ValueError('Output must be C-contiguous')
+        else:
+            out = np.zeros(shape, dtype)
+        validate_dtype(out.dtype)
+
+        self._shape = shape
+        self._calibration = calibration
+        self._step_size_x = step_size_x
+        self._step_size_y = step_size_y
+        self._frame_duration = frame_duration
+        self._tick = tick
+
+        self._out = out
+        self._flat = out.reshape(-1)
+
+        self._frame_count = 0
+        self._frame_spectra = np.zeros((0, shape[2]), out.dtype)
+        self._frame_images = None
+        if frame_images:
+            if frame_duration is None:
+                raise ValueError('Frame images require a frame duration')
+            self._frame_images = np.zeros((0,) + shape[:2], out.dtype)
+
+        self._event_count = 0
+        self._rejected_count = 0
+        self._time_range = None
+
+    def _reserve_frames(self, frame_count):
+        # Frame arrays grow geometrically
+        capacity = self._frame_spectra.shape[0]
+        if frame_count > capacity:
+            capacity = max(frame_count, 2 * capacity)
+
+            spectra = np.zeros((capacity,) + self._frame_spectra.shape[1:],
+                               self._frame_spectra.dtype)
+            spectra[:self._frame_count] = self._frame_spectra[:self._frame_count]
+            self._frame_spectra = spectra
+
+            if self._frame_images is not None:
+                images = np.zeros((capacity,) + self._frame_images.shape[1:],
+                                  self._frame_images.dtype)
+                images[:self._frame_count] = self._frame_images[:self._frame_count]
+                self._frame_images = images
+
+        self._frame_count = max(self._frame_count, frame_count)
+
+    def add(self, x, y, channel, timestamp=None):
+        """
+        Adds a chunk of events.
+        Events outside the raster or the channels, or before the first
+        frame, are rejected.
+
+        :arg x: array of x indices
+        :arg y: array of y indices
+        :arg channel: array of channels
+        :arg timestamp: array of timestamps, in units of *tick*. Required to
+            slice events in frames.
+
+        :return: number of accepted events
+        """
+        x = np.asarray(x, np.int64).ravel()
+        y = np.asarray(y, np.int64).ravel()
+        channel = np.asarray(channel, np.int64).ravel()
+        if not (x.size == y.size == channel.size):
+            raise ValueError('Arrays of events must have the same size')
+
+        nx, ny, channels = self._shape
+        valid = (x >= 0) & (x < nx) & (y >= 0) & (y < ny) & \
+            (channel >= 0) & (channel < channels)
+
+        if timestamp is not None:
+            times = np.asarray(timestamp, np.float64).ravel() * self._tick
+            if times.size != x.size:
+                raise ValueError('Arrays of events must have the same size')
+            if self._frame_duration is not None:
+                frames = np.floor(times / self._frame_duration).astype(np.int64)
+                valid &= frames >= 0
+        elif self._frame_duration is not None:
+            raise ValueError('Timestamps are required to slice frames')
+
+        if not valid.all():
+            x, y, channel = x[valid], y[valid], channel[valid]
+            if timestamp is not None:
+                times = times[valid]
+                if self._frame_duration is not None:
+                    frames = frames[valid]
+
+        self._rejected_count += int(valid.size - x.size)
+        self._event_count += int(x.size)
+        if x.size == 0:
+            return 0
+
+        pixels = x * ny + y
+        _accumulate(self._flat, pixels * channels + channel)
+
+        if timestamp is not None:
+            tmin, tmax = float(times.min()), float(times.max())
+            if self._time_range is not None:
+                tmin = min(tmin, self._time_range[0])
+                tmax = max(tmax, self._time_range[1])
+            self._time_range = (tmin, tmax)
+
+            if self._frame_duration is not None:
+                self._reserve_frames(int(frames.max()) + 1)
+                _accumulate(self._frame_spectra.reshape(-1),
+                            frames * channels + channel)
+                if self._frame_images is not None:
+                    _accumulate(self._frame_images.reshape(-1),
+                                frames * (nx * ny) + pixels)
+
+        return int(x.size)
+
+    def add_events(self, events):
+        """
+        Adds a chunk of events from a structured array with ``x``, ``y`` and
+        ``channel`` fields and, optionally, a ``timestamp`` field.
+
+        :return: number of accepted events
+        """
+        timestamp = None
+        if 'timestamp' in events.dtype.names:
+            timestamp = events['timestamp']
+        return self.add(events['x'], events['y'], events['channel'], timestamp)
+
+    def add_chunks(self, chunks):
+        """
+        Adds all chunks of events of an iterable of structured arrays, such
+        as the one returned by :func:`read_events`.
+
+        :return: number of accepted events
+        """
+        return sum(self.add_events(events) for events in chunks)
+
+    def _create_conditions(self):
+        nx, ny, channels = self._shape
+
+        acq = AcquisitionRasterXY(nx, ny, self._step_size_x, self._step_size_y)
+        if self._time_range is not None:
+            acq.total_time = self._time_range[1] - self._time_range[0]
+            acq.dwell_time = acq.total_time / (nx * ny)
+        if self._frame_duration is not None:
+            acq.frame_count = self.frame_count
+
+        det = DetectorSpectrometerXEDS(channels, self._calibration)
+
+        return {'Acq0': acq, 'Det0': det}
+
+    @property
+    def hypermap(self):
+        """
+        Spectral raster datum of the counts, a view of the accumulated
+        counts with the acquisition and spectrometer conditions.
+        """
+        datum = self._out.view(ImageRaster2DSpectral)
+        datum.conditions.update(self._create_conditions())
+        return datum
+
+    @property
+    def frame_spectra(self):
+        """
+        Sum spectrum of each frame, or ``None`` if no frame duration is
+        specified.
+        """
+        if self._frame_duration is None:
+            return None
+        spectra = self._frame_spectra[:self._frame_count]
+        return AnalysisList1D(spectra.shape[0], spectra.shape[1], spectra.dtype,
+                              spectra.copy(), conditions=self._create_conditions())
+
+    @property
+    def frame_images(self):
+        """
+        Count image of each frame, or ``None`` if not accumulated.
+        """
+        if self._frame_images is None:
+            return None
+        images = self._frame_images[:self._frame_count]
+        return AnalysisList2D(*images.shape, dtype=images.dtype,
+                              buffer=images.copy(),
+                              conditions=self._create_conditions())
+
+    @property
+    def event_count(self):
+        """
+        Number of accepted events.
+        """
+        return self._event_count
+
+    @property
+    def rejected_count(self):
+        """
+        Number of rejected events.
+        """
+        return self._rejected_count
+
+    @property
+    def frame_count(self):
+        """
+        Number of frames, up to the last frame with an accepted event.
+        """
+        return self._frame_count
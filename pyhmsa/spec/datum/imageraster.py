@@ -3,6 +3,7 @@ Image raster (2D and 3D collection)
 """
 
 # Standard library modules.
+from collections import namedtuple
 
 # Third party modules.
 import numpy as np
@@ -18,6 +19,17 @@ from pyhmsa.type.numerical import convert_unit
 from pyhmsa.spec.condition.acquisition import \
     POSITION_LOCATION_CENTER, POSITION_LOCATION_START, POSITION_LOCATION_END
 
+RasterGeometry = namedtuple('RasterGeometry',
+                            ['origin', 'step', 'index_step', 'z',
+                             'rotation', 'tilt'])
+RasterGeometry.__doc__ = """
+Geometry of a 2D raster: coordinates (in mm) of the first pixel
+(*origin*), distances (in mm) between consecutive pixels in x and y
+(*step*) and the step sizes used to find the index of a position
+(*index_step*), as well as the z coordinate (in mm or ``None``),
+rotation and tilt of the raster.
+"""
+
 class _ImageRaster(_Datum):
     """
     Represents a dataset that has been rastered over regularly spaced intervals
@@ -32,22 +44,45 @@ class _ImageRaster2D(_ImageRaster):
     Abstract class for image raster 2D classes.
     """
 
-    def get_position(self, x, y):
-        if x < 0:
-            x = self.x + x
-        if y < 0:
-            y = self.y + y
-
-        if x < 0 or x >= self.x:
-            raise IndexError('Index %i is out of bounds' % x)
-        if y < 0 or y >= self.y:
-            raise IndexError('Index %i is out of bounds' % y)
-
+    def _get_geometry_state(self, acq):
+        # Identity of the values from which the geometry is computed
+        state = [acq]
+        state.extend(acq.__dict__.get(attr) for attr in acq.__attributes__)
+        for location, position in sorted(acq.positions.items()):
+            state.append(location)
+            state.append(position)
+            state.extend(position.__dict__.get(attr)
+                         for attr in position.__attributes__)
+        return state
+
+    def get_geometry(self):
+        """
+        Returns the geometry of the raster, computed from the
+        :class:`AcquisitionRasterXY` condition.
+        The geometry is cached until the shape, the acquisition condition or
+        one of its positions changes.
+
+        :rtype: :class:`RasterGeometry`
+        """
         acqs = self.conditions.findvalues(AcquisitionRasterXY)
         if not acqs:
             raise ValueError('No acquisition raster XY found in conditions')
         acq = next(iter(acqs))
 
+        shape = self.shape[:2]
+        state = self._get_geometry_state(acq)
+        cache = getattr(self, '_geometry_cache', None)
+        if cache is not None:
+            cached_shape, cached_state, geometry = cache
+            if cached_shape == shape and len(cached_state) == len(state) and \
+                    all(a is b for a, b in zip(cached_state, state)):
+                return geometry
+
+        geometry = self._create_geometry(acq)
+        self._geometry_cache = (shape, state, geometry)
+        return geometry
+
+    def _create_geometry(self, acq):
         position_start = acq.positions.get(POSITION_LOCATION_START)
         position_center = acq.positions.get(POSITION_LOCATION_CENTER)
         position_end = acq.positions.get(POSITION_LOCATION_END)
@@ -95,42 +130,77 @@ class _ImageRaster2D(_ImageRaster):
         delta_x = convert_unit('mm', delta.x) / (acq.step_count_x - 1)
         delta_y = convert_unit('mm', delta.y) / (acq.step_count_y - 1)
 
-        x = convert_unit('mm', position_start.x) + delta_x * x
-        y = convert_unit('mm', position_start.y) + delta_y * y
+        origin = (float(convert_unit('mm', position_start.x)),
+                  float(convert_unit('mm', position_start.y)))
+        step = (float(delta_x), float(delta_y))
+
+        # Step sizes used to find indices
+        index_step_x = convert_unit('mm', acq.step_size_x)
+        index_step_y = convert_unit('mm', acq.step_size_y)
+        index_step = (float(step[0] if index_step_x is None else index_step_x),
+                      float(step[1] if index_step_y is None else index_step_y))
+
         if position_start.z is None and position_end.z is None:
             z = None
         else:
             z = np.mean([convert_unit('mm', position_start.z),
                          convert_unit('mm', position_end.z)])
-        r = position_start.r
-        t = position_start.t
 
-        return SpecimenPosition(x, y, z, r, t)
+        return RasterGeometry(origin, step, index_step, z,
+                              position_start.r, position_start.t)
 
-    def get_index(self, position):
-        acqs = self.conditions.findvalues(AcquisitionRasterXY)
-        if not acqs:
-            raise ValueError('No acquisition raster XY found in conditions')
-        acq = next(iter(acqs))
+    def get_position(self, x, y):
+        if x < 0:
+            x = self.x + x
+        if y < 0:
+            y = self.y + y
+
+        if x < 0 or x >= self.x:
+            raise IndexError('Index %i is out of bounds' % x)
+        if y < 0 or y >= self.y:
+            raise IndexError('Index %i is out of bounds' % y)
+
+        geometry = self.get_geometry()
+
+        x = geometry.origin[0] + geometry.step[0] * x
+        y = geometry.origin[1] + geometry.step[1] * y
+
+        return SpecimenPosition(x, y, geometry.z,
+                                geometry.rotation, geometry.tilt)
 
-        position_start = self.get_position(0, 0)
+    def get_positions(self, xs, ys):
+        """
+        Returns the x and y coordinates (in mm) of pixels.
 
-        step_size_x = convert_unit('mm', acq.step_size_x)
-        step_size_y = convert_unit('mm', acq.step_size_y)
+        :arg xs: array of x indices, negative indices count from the end
+        :arg ys: array of y indices, broadcast with *xs*
 
-        if step_size_x is None or step_size_y is None:
-            position_end = self.get_position(-1, -1)
-            delta = position_end - position_start
+        :return: array with the shape of the broadcast indices plus a last
+            axis with the x and y coordinates
+        """
+        xs, ys = np.broadcast_arrays(np.asarray(xs), np.asarray(ys))
+        xs = np.where(xs < 0, int(self.x) + xs, xs)
+        ys = np.where(ys < 0, int(self.y) + ys, ys)
 
-            if acq.step_size_x is None:
-                step_size_x = convert_unit('mm', delta.x) / (acq.step_count_x - 1)
+        if np.any((xs < 0) | (xs >= self.x)):
+            raise IndexError('Index out of bounds in x')
+        if np.any((ys < 0) | (ys >= self.y)):
+            raise IndexError('Index out of bounds in y')
 
-            if acq.step_size_y is None:
-                step_size_y = convert_unit('mm', delta.y) / (acq.step_count_y - 1)
+        geometry = self.get_geometry()
 
-        delta = position - position_start
-        x = abs(int(convert_unit('mm', delta.x) / step_size_x))
-        y = abs(int(convert_unit('mm', delta.y) / step_size_y))
+        positions = np.empty(xs.shape + (2,))
+        positions[..., 0] = geometry.origin[0] + geometry.step[0] * xs
+        positions[..., 1] = geometry.origin[1] + geometry.step[1] * ys
+        return positions
+
+    def get_index(self, position):
+        geometry = self.get_geometry()
+
+        x = convert_unit('mm', position.x) - geometry.origin[0]
+        y = convert_unit('mm', position.y) - geometry.origin[1]
+        x = abs(int(x / geometry.index_step[0]))
+        y = abs(int(y / geometry.index_step[1]))
 
         if x < 0 or x >= self.x or y < 0 or y >= self.y:
             raise IndexError('Position (%i, %i) is out of bounds [0,%i[ : [0,%i[' % \
@@ -138,6 +208,33 @@ class _ImageRaster2D(_ImageRaster):
 
         return x, y
 
+    def get_indices(self, positions):
+        """
+        Returns the indices of the pixels at positions.
+
+        :arg positions: array with a last axis with the x and y
+            coordinates (in mm)
+
+        :return: tuple of the arrays of x and y indices, where indices of
+            positions out of the raster are -1
+        """
+        positions = np.asarray(positions, dtype=float)
+        if positions.shape[-1:] != (2,):
+            raise ValueError('Last axis of positions must have 2 coordinates')
+
+        geometry = self.get_geometry()
+
+        xs = (positions[..., 0] - geometry.origin[0]) / geometry.index_step[0]
+        ys = (positions[..., 1] - geometry.origin[1]) / geometry.index_step[1]
+        xs = np.abs(np.trunc(xs)).astype(np.int64)
+        ys = np.abs(np.trunc(ys)).astype(np.int64)
+
+        outside = (xs >= self.x) | (ys >= self.y)
+        xs[outside] = -1
+        ys[outside] = -1
+
+        return xs, ys
+
     @property
     def x(self):
         return np.uint32(self.shape[0])
@@ -237,81 +334,14 @@ class ImageRaster2DHyperimage(_ImageRaster2D):
                           conditions=self.conditions)
 
 def stitch(*data):
+    """
+    Stitches image raster 2D datums according to their positions.
+    Pixels covered by several datums are taken from the last one.
+    See :func:`pyhmsa.spec.datum.mosaic.mosaic` for more options.
+    """
+    from pyhmsa.spec.datum.mosaic import mosaic
+
     if len(data) < 2:
         raise ValueError('Specify at least 2 datum')
 
-    # Check data and step sizes
-    datum_clasz = None
-    datum_dtype = None
-    datum_dims = None
-    step_size_x_mm = None
-    step_size_y_mm = None
-
-    for datum in data:
-        acqs = datum.conditions.findvalues(AcquisitionRasterXY)
-        if not acqs:
-            raise ValueError('No acquisition raster XY found in conditions')
-        acq = next(iter(acqs))
-
-        if step_size_x_mm is None:
-            step_size_x_mm = convert_unit('mm', acq.step_size_x)
-        else:
-            if step_size_x_mm != convert_unit('mm', acq.step_size_x):
-                raise ValueError('All data must have the same step size x')
-
-        if step_size_y_mm is None:
-            step_size_y_mm = convert_unit('mm', acq.step_size_y)
-        else:
-            if step_size_y_mm != convert_unit('mm', acq.step_size_y):
-                raise ValueError('All data must have the same step size y')
-
-        if datum_clasz is None:
-            datum_clasz = type(datum)
-        else:
-            if datum_clasz != type(datum):
-                raise ValueError('All data must have the same type')
-
-        if datum_dtype is None:
-            datum_dtype = datum.dtype
-        else:
-            if datum_dtype != datum.dtype:
-                raise ValueError('All data must have the same data type')
-
-        if datum_dims is None:
-            datum_dims = datum.datum_dimensions
-        else:
-            if datum_dims != datum.datum_dimensions:
-                raise ValueError('All data must have the same dimensions')
-
-    # Extract start and end positions
-    positions = []
-    for datum in data:
-        positions.append(np.array(datum.get_position(0, 0).tolist('mm')[:3]))
-        positions.append(np.array(datum.get_position(-1, -1).tolist('mm')[:3]))
-
-    # Find new start and end positions
-    start_position = np.min(positions, axis=0)
-    end_position = np.max(positions, axis=0)
-
-    # Create new datum
-    nx = abs(int((end_position - start_position)[0] / step_size_x_mm)) + 1
-    ny = abs(int((end_position - start_position)[1] / step_size_y_mm)) + 1
-
-    datum_stitch = datum_clasz(nx, ny, *datum_dims.values(), dtype=datum_dtype)
-
-    acq = AcquisitionRasterXY(nx, ny, acq.step_size_x, acq.step_size_y)
-    acq.positions[POSITION_LOCATION_START] = SpecimenPosition(*start_position)
-    acq.positions[POSITION_LOCATION_END] = SpecimenPosition(*end_position)
-    datum_stitch.conditions.add('Acq0', acq)
-
-    for datum in data:
-        i0, j0 = datum_stitch.get_index(datum.get_position(0, 0))
-        i1, j1 = datum_stitch.get_index(datum.get_position(-1, -1))
-        xstep = 1 if i1 > i0 else -1
-        ystep = 1 if j1 > j0 else -1
-        i = min(i0, i1)
-        j = min(j0, j1)
-        ni, nj = datum.shape[:2]
-        datum_stitch[i:i + ni, j:j + nj, ...] = datum[::xstep, ::ystep]
-
-    return datum_stitch
+    return mosaic(data)
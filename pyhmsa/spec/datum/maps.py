@@ -0,0 +1,214 @@
+"""
+Region of interest maps of spectral raster datums
+"""
+
+# Standard library modules.
+import os
+import itertools
+import concurrent.futures
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.spec.datum.imageraster import ImageRaster2D, ImageRaster2DSpectral
+from pyhmsa.spec.datum.sparse import SparseImageRaster2DSpectral
+from pyhmsa.spec.datum.parallel import iter_tiles
+from pyhmsa.spec.condition.region import RegionOfInterest
+from pyhmsa.spec.condition.elementalid import ElementalIDXray
+from pyhmsa.spec.condition.detector import DetectorSpectrometer
+
+# Globals and constants variables.
+
+CHUNK_SIZE = 16 * 1024 * 1024 # bytes
+
+def _get_energy_axis(datum):
+    detectors = datum.conditions.findvalues(DetectorSpectrometer)
+    if not detectors:
+        raise ValueError('Datum has no spectrometer to convert energies')
+    detector = next(iter(detectors))
+    return detector.calibration_energy.get_axis(int(datum.channels))
+
+def _find_channels(datum, window, width):
+    """
+    Returns the inclusive channel range of a window and the conditions
+    describing it.
+    """
+    channels = int(datum.channels)
+    conditions = {}
+
+    if isinstance(window, RegionOfInterest):
+        start, end = int(window.start_channel), int(window.end_channel)
+    else:
+        if isinstance(window, ElementalIDXray):
+            if window.energy is None:
+                raise ValueError('Energy of x-ray line is not defined')
+            energy = float(window.energy)
+            low, high = energy - width / 2.0, energy + width / 2.0
+            conditions['ElementalID'] = window
+        else:
+            low, high = sorted(map(float, window))
+
+        axis = _get_energy_axis(datum)
+        indices = np.flatnonzero((axis >= low) & (axis <= high))
+        if indices.size == 0:
+            raise ValueError('Window from %s to %s eV contains no channel' % \
+                             (low, high))
+        start, end = int(indices[0]), int(indices[-1])
+
+    start, end = max(0, start), min(channels - 1, end)
+    if start > end:
+        raise ValueError('Window contains no channel')
+
+    conditions['RegionOfInterest'] = RegionOfInterest(start, end)
+    return start, end, conditions
+
+def _sum_windows(block, starts, ends, dtype):
+    # Prefix sums along the channels with a leading zero, so that the sum of
+    # channels start to end is cumsum[end + 1] - cumsum[start]
+    block = np.asarray(block)
+    cumsum = np.zeros(block.shape[:2] + (block.shape[2] + 1,), dtype)
+    np.cumsum(block, axis=2, dtype=dtype, out=cumsum[..., 1:])
+    return cumsum[..., ends + 1] - cumsum[..., starts]
+
+def _sum_sparse_windows(datum, starts, ends, dtype):
+    # Single pass over the non-zero values of the datum. The channels are
+    # digitized once in the segments delimited by the edges of all windows
+    # and summed per pixel and segment with one bincount. Windows, which may
+    # overlap, are then the differences of the prefix sums of the segments.
+    nx, ny = datum.shape[:2]
+    starts = np.asarray(starts)
+    ends = np.asarray(ends) + 1
+    edges = np.unique(np.concatenate([starts, ends]))
+    nsegments = len(edges) - 1
+
+    segments = np.searchsorted(edges, datum.indices, side='right') - 1
+    mask = (segments >= 0) & (segments < nsegments)
+    keys = datum.get_pixel_indices()[mask] * nsegments + segments[mask]
+    sums = np.bincount(keys, datum.values[mask], minlength=nx * ny * nsegments)
+
+    cumsum = np.zeros((nx * ny, nsegments + 1), dtype)
+    np.cumsum(sums.reshape(nx * ny, nsegments).astype(dtype), axis=1,
+              out=cumsum[:, 1:])
+    output = cumsum[:, np.searchsorted(edges, ends)] - \
+        cumsum[:, np.searchsorted(edges, starts)]
+    return output.T.reshape(len(starts), nx, ny)
+
+def _dense_window_maps(datum, starts, ends, dtype, chunk_size, workers):
+    # Only the channels covered by the windows are read
+    lower, upper = min(starts), max(ends) + 1
+    starts = np.array(starts) - lower
+    ends = np.array(ends) - lower
+
+    nx, ny = datum.shape[:2]
+    pixels = max(1, chunk_size // ((upper - lower + 1) * dtype.itemsize))
+    by = min(ny, pixels)
+    bx = max(1, pixels // by)
+
+    array = np.asarray(datum)
+    output = np.zeros((len(starts), nx, ny), dtype)
+
+    def process(xslice, yslice):
+        block = array[xslice, yslice, lower:upper]
+        output[:, xslice, yslice] = \
+            np.moveaxis(_sum_windows(block, starts, ends, dtype), 2, 0)
+
+    tiles = iter_tiles((nx, ny), (bx, by))
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        # Limit the number of submitted chunks to bound memory usage
+        pending = set(executor.submit(process, *slices)
+                      for slices in itertools.islice(tiles, workers * 2))
+
+        while pending:
+            done, pending = concurrent.futures.wait(pending,
+                return_when=concurrent.futures.FIRST_COMPLETED)
+
+            for future in done:
+                future.result()
+
+            pending |= set(executor.submit(process, *slices)
+                           for slices in itertools.islice(tiles, len(done)))
+
+    return output
+
+def window_maps(datum, windows, width=150.0, chunk_size=CHUNK_SIZE,
+                workers=None):
+    """
+    Sums the channels of several windows for every pixel of a spectral
+    raster datum and returns one :class:`ImageRaster2D` per window.
+
+    All windows are computed in a single pass over the datum, chunk by
+    chunk, from the cumulative sum along the channels of the chunk. Only the
+    channels between the lowest and highest channel of the windows are read,
+    so the datum can be memory-mapped. For a
+    :class:`SparseImageRaster2DSpectral`, only its non-zero values are read.
+
+    A window is either:
+
+        * a :class:`RegionOfInterest`, from its start to its end channel
+          (inclusive);
+        * an :class:`ElementalIDXray`, all channels within *width* centered
+          on the energy of the line;
+        * a tuple ``(low, high)`` of energies in eV.
+
+    Energies are converted to channels with the energy calibration of the
+    spectrometer in the conditions of the datum.
+
+    The maps have the conditions of the datum, a ``RegionOfInterest``
+    condition with the channels of the window and, for x-ray lines, the
+    ``ElementalID`` condition. Sums are 64-bit integers for integer datums,
+    64-bit floats otherwise.
+
+    :arg datum: spectral raster datum
+    :type datum: :class:`ImageRaster2DSpectral` or
+        :class:`SparseImageRaster2DSpectral`
+    :arg windows: list of windows, or dictionary of identifiers and windows
+    :arg width: width of the windows of x-ray lines (eV)
+    :arg chunk_size: approximate maximum number of bytes of a chunk
+    :arg workers: number of threads (default: number of CPUs)
+
+    :return: list of maps, or dictionary of identifiers and maps if
+        *windows* is a dictionary
+    """
+    if not isinstance(datum, (ImageRaster2DSpectral,
+                              SparseImageRaster2DSpectral)):
+        raise ValueError('Datum must be an image raster 2D spectral')
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 0:
+        raise ValueError('Number of workers must be greater than 0')
+
+    if hasattr(windows, 'items'):
+        identifiers, windows = zip(*windows.items()) if windows else ((), ())
+    else:
+        identifiers = None
+        windows = list(windows)
+    if not windows:
+        return {} if identifiers is not None else []
+
+    starts, ends, window_conditions = \
+        zip(*(_find_channels(datum, window, width) for window in windows))
+
+    if np.issubdtype(datum.dtype, np.integer):
+        dtype = np.dtype(np.int64)
+    else:
+        dtype = np.dtype(np.float64)
+
+    nx, ny = datum.shape[:2]
+
+    if isinstance(datum, SparseImageRaster2DSpectral):
+        output = _sum_sparse_windows(datum, starts, ends, dtype)
+    else:
+        output = _dense_window_maps(datum, starts, ends, dtype,
+                                    chunk_size, workers)
+
+    maps = []
+    for values, conditions in zip(output, window_conditions):
+        image = ImageRaster2D(nx, ny, dtype, values,
+                              conditions=datum.conditions)
+        image.conditions.update(conditions)
+        maps.append(image)
+
+    if identifiers is not None:
+        return dict(zip(identifiers, maps))
+    return maps
@@ -0,0 +1,256 @@
+"""
+Mosaics of image raster 2D datums
+"""
+
+# Standard library modules.
+import os
+import itertools
+import concurrent.futures
+from collections import namedtuple
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.spec.datum.imageraster import _ImageRaster2D
+from pyhmsa.spec.condition.acquisition import AcquisitionRasterXY
+from pyhmsa.spec.condition.specimenposition import SpecimenPosition
+from pyhmsa.type.numerical import convert_unit, validate_dtype
+
+# Globals and constants variables.
+from pyhmsa.spec.condition.acquisition import \
+    POSITION_LOCATION_START, POSITION_LOCATION_END
+
+CHUNK_SIZE = 16 * 1024 * 1024 # bytes
+
+OVERLAP_LAST = 'last'
+OVERLAP_FIRST = 'first'
+OVERLAP_MEAN = 'mean'
+OVERLAP_MAX = 'max'
+
+_OVERLAPS = frozenset([OVERLAP_LAST, OVERLAP_FIRST, OVERLAP_MEAN, OVERLAP_MAX])
+
+MosaicLayout = namedtuple('MosaicLayout',
+                          ['shape', 'start', 'end', 'acquisition',
+                           'placements'])
+MosaicLayout.__doc__ = """
+Layout of a mosaic: number of pixels in x and y (*shape*), coordinates
+(in mm) of the first (*start*) and last (*end*) pixels, acquisition
+condition of the mosaic and placements of the tiles. *placements* is an
+array with one row per tile with the x and y indices of the tile in the
+mosaic and the direction (1 or -1) of the tile along x and y.
+"""
+
+def _get_acquisition(datum):
+    acqs = datum.conditions.findvalues(AcquisitionRasterXY)
+    if not acqs:
+        raise ValueError('No acquisition raster XY found in conditions')
+    return next(iter(acqs))
+
+def _check_data(data):
+    # Returns the acquisition of the first datum once all data are checked
+    first = data[0]
+    first_acq = _get_acquisition(first)
+    step_size_x_mm = convert_unit('mm', first_acq.step_size_x)
+    step_size_y_mm = convert_unit('mm', first_acq.step_size_y)
+
+    for datum in data:
+        if not isinstance(datum, _ImageRaster2D):
+            raise ValueError('All data must be image raster 2D')
+
+        acq = _get_acquisition(datum)
+        if step_size_x_mm != convert_unit('mm', acq.step_size_x):
+            raise ValueError('All data must have the same step size x')
+        if step_size_y_mm != convert_unit('mm', acq.step_size_y):
+            raise ValueError('All data must have the same step size y')
+        if type(first) != type(datum):
+            raise ValueError('All data must have the same type')
+        if first.dtype != datum.dtype:
+            raise ValueError('All data must have the same data type')
+        if first.datum_dimensions != datum.datum_dimensions:
+            raise ValueError('All data must have the same dimensions')
+
+    return first_acq
+
+def compute_layout(data):
+    """
+    Computes the layout of the mosaic of image raster 2D datums from the
+    geometry of their :class:`AcquisitionRasterXY` condition.
+    All datums must have the same class, data type, datum dimensions and
+    step sizes.
+
+    :arg data: sequence of datums
+
+    :rtype: :class:`MosaicLayout`
+    """
+    data = list(data)
+    if not data:
+        raise ValueError('Specify at least 1 datum')
+    first_acq = _check_data(data)
+
+    geometries = [datum.get_geometry() for datum in data]
+    origins = np.array([geometry.origin for geometry in geometries])
+    steps = np.array([geometry.step for geometry in geometries])
+    sizes = np.array([datum.shape[:2] for datum in data], dtype=np.int64)
+
+    # Coordinates of the first and last pixels of all tiles
+    ends = origins + steps * (sizes - 1)
+    start = np.minimum(origins, ends).min(axis=0)
+    end = np.maximum(origins, ends).max(axis=0)
+
+    index_step = np.array([float(convert_unit('mm', first_acq.step_size_x)),
+                           float(convert_unit('mm', first_acq.step_size_y))])
+    shape = tuple(int(n) for n in
+                  np.abs(np.trunc((end - start) / index_step)).astype(np.int64) + 1)
+
+    indices0 = np.abs(np.trunc((origins - start) / index_step)).astype(np.int64)
+    indices1 = np.abs(np.trunc((ends - start) / index_step)).astype(np.int64)
+    directions = np.where(indices1 > indices0, 1, -1)
+    offsets = np.minimum(indices0, indices1)
+
+    if np.any(offsets + sizes > shape):
+        raise ValueError('Tiles do not fit in the mosaic, check their positions')
+
+    zs = [geometry.z for geometry in geometries if geometry.z is not None]
+    zstart = min(zs) if zs else None
+    zend = max(zs) if zs else None
+
+    acq = AcquisitionRasterXY(shape[0], shape[1],
+                              first_acq.step_size_x, first_acq.step_size_y)
+    acq.positions[POSITION_LOCATION_START] = \
+        SpecimenPosition(start[0], start[1], zstart)
+    acq.positions[POSITION_LOCATION_END] = \
+        SpecimenPosition(end[0], end[1], zend)
+
+    placements = np.concatenate([offsets, directions], axis=1)
+
+    return MosaicLayout(shape, tuple(start), tuple(end), acq, placements)
+
+def _fill_block(out, start, stop, arrays, placements, overlap, fill):
+    """
+    Combines the tiles overlapping rows *start* to *stop* of the mosaic and
+    writes these rows in *out*.
+    """
+    shape = (stop - start,) + out.shape[1:]
+    xs, ys = placements[:, 0], placements[:, 1]
+    nxs = np.array([array.shape[0] for array in arrays])
+    indices = np.nonzero((xs < stop) & (xs + nxs > start))[0]
+
+    if overlap == OVERLAP_FIRST:
+        indices = indices[::-1]
+
+    if overlap == OVERLAP_MEAN:
+        block = np.zeros(shape, np.float64)
+        counts = np.zeros(shape[:2], np.int64)
+    else:
+        block = np.full(shape, fill, out.dtype)
+        covered = np.zeros(shape[:2], bool)
+
+    for index in indices:
+        x, y, xstep, ystep = placements[index]
+        array = arrays[index]
+
+        x0, x1 = max(start, x), min(stop, x + array.shape[0])
+        tile = array[::xstep, ::ystep][x0 - x:x1 - x]
+        region = (slice(x0 - start, x1 - start), slice(y, y + array.shape[1]))
+
+        if overlap == OVERLAP_MEAN:
+            block[region] += tile
+            counts[region] += 1
+        elif overlap == OVERLAP_MAX:
+            mask = covered[region].reshape(covered[region].shape +
+                                           (1,) * (block.ndim - 2))
+            block[region] = np.where(mask, np.maximum(block[region], tile), tile)
+            covered[region] = True
+        else:
+            block[region] = tile
+
+    if overlap == OVERLAP_MEAN:
+        mask = (counts > 0).reshape(counts.shape + (1,) * (block.ndim - 2))
+        counts = np.maximum(counts, 1).reshape(mask.shape)
+        block = np.where(mask, block / counts, fill)
+        if np.issubdtype(out.dtype, np.integer):
+            block = np.rint(block)
+
+    out[start:stop] = block
+
+def mosaic(data, overlap=OVERLAP_LAST, fill=0, out=None,
+           chunk_size=CHUNK_SIZE, workers=None):
+    """
+    Combines image raster 2D datums (tiles) into a single datum according
+    to their positions (see :func:`compute_layout`).
+
+    The placements of all tiles are computed at once from their cached
+    geometry. The mosaic is then filled by blocks of rows of about
+    *chunk_size* bytes in a thread pool: each block only reads the rows of
+    the tiles it overlaps, so tiles can be memory-mapped, and the result is
+    written in *out* if specified, for instance a :class:`numpy.memmap` to
+    create mosaics larger than memory.
+
+    Pixels covered by several tiles are either taken from the last
+    (:const:`OVERLAP_LAST`) or the first (:const:`OVERLAP_FIRST`) tile
+    covering them, or are the mean (:const:`OVERLAP_MEAN`) or maximum
+    (:const:`OVERLAP_MAX`) of the tiles. Pixels not covered by any tile
+    are set to *fill*.
+
+    The mosaic has an ``Acq0`` :class:`AcquisitionRasterXY` condition with
+    the start and end positions of the mosaic.
+
+    :arg data: sequence of datums
+    :arg overlap: how overlapping pixels are combined
+    :arg fill: value of pixels not covered by any tile
+    :arg out: array where the mosaic is written
+    :arg chunk_size: approximate maximum number of bytes of a block
+    :arg workers: number of threads (default: number of CPUs)
+
+    :return: datum of the same class as the tiles
+    """
+    data = list(data)
+    if overlap not in _OVERLAPS:
+        raise ValueError('Unknown overlap: %s' % overlap)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 0:
+        raise ValueError('Number of workers must be greater than 0')
+
+    layout = compute_layout(data)
+    first = data[0]
+    shape = layout.shape + first.shape[2:]
+
+    if out is not None:
+        if tuple(out.shape) != shape:
+            raise ValueError('Output must have shape %s' % (shape,))
+    else:
+        out = np.empty(shape, first.dtype)
+    validate_dtype(out.dtype)
+
+    arrays = [np.asarray(datum) for datum in data]
+
+    itemsize = 8 if overlap == OVERLAP_MEAN else out.dtype.itemsize
+    row_nbytes = max(1, int(np.prod(shape[1:])) * itemsize)
+    step = max(1, chunk_size // row_nbytes)
+    blocks = ((start, min(start + step, shape[0]))
+              for start in range(0, shape[0], step))
+
+    def process(start, stop):
+        _fill_block(out, start, stop, arrays, layout.placements, overlap, fill)
+
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        # Limit the number of submitted blocks to bound memory usage
+        pending = set(executor.submit(process, *block)
+                      for block in itertools.islice(blocks, workers * 2))
+
+        while pending:
+            done, pending = concurrent.futures.wait(pending,
+                return_when=concurrent.futures.FIRST_COMPLETED)
+
+            for future in done:
+                future.result()
+
+            pending |= set(executor.submit(process, *block)
+                           for block in itertools.islice(blocks, len(done)))
+
+    datum = out.view(type(first))
+    datum.conditions.add('Acq0', layout.acquisition)
+
+    return datum
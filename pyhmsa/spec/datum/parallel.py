@@ -0,0 +1,114 @@
+"""
+Parallel processing of raster datums
+"""
+
+# Standard library modules.
+import os
+import itertools
+import concurrent.futures
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.spec.datum.imageraster import \
+    (_ImageRaster2D, ImageRaster2D, ImageRaster2DSpectral,
+     ImageRaster2DHyperimage)
+
+# Globals and constants variables.
+
+BACKEND_THREAD = 'thread'
+BACKEND_PROCESS = 'process'
+
+_BACKENDS = {BACKEND_THREAD: concurrent.futures.ThreadPoolExecutor,
+             BACKEND_PROCESS: concurrent.futures.ProcessPoolExecutor}
+
+_OUTPUT_CLASSES = {2: ImageRaster2D,
+                   3: ImageRaster2DSpectral,
+                   4: ImageRaster2DHyperimage}
+
+def iter_tiles(shape, block):
+    """
+    Yields the ``(xslice, yslice)`` of the tiles covering a 2D raster.
+
+    :arg shape: shape of the raster, only the first two values are used
+    :arg block: size of the tiles in x and y
+    """
+    nx, ny = shape[:2]
+    bx, by = block
+    if bx <= 0 or by <= 0:
+        raise ValueError('Block size must be greater than 0')
+
+    for x0, y0 in itertools.product(range(0, nx, bx), range(0, ny, by)):
+        yield slice(x0, min(x0 + bx, nx)), slice(y0, min(y0 + by, ny))
+
+def _apply(func, tile):
+    return np.asarray(func(tile))
+
+def _create_output(datum, result):
+    clasz = _OUTPUT_CLASSES.get(result.ndim)
+    if clasz is None:
+        raise ValueError('Function must return an array with 2, 3 or 4 dimensions')
+
+    shape = (datum.shape[0], datum.shape[1]) + result.shape[2:]
+    buffer = np.zeros(shape, result.dtype)
+    return clasz(*shape, dtype=result.dtype, buffer=buffer,
+                 conditions=datum.conditions)
+
+def map_pixels(datum, func, block=(64, 64), workers=None,
+               backend=BACKEND_THREAD):
+    """
+    Applies a function over all pixels of a raster datum, tile by tile, and
+    returns the results as a new raster datum with the same conditions.
+
+    The function receives a tile of the raw array (a view for the thread
+    backend) with shape ``(bx, by, ...)`` and must return an array with shape
+    ``(bx, by)``, ``(bx, by, channels)`` or ``(bx, by, u, v)``, which
+    respectively results in a :class:`ImageRaster2D`,
+    :class:`ImageRaster2DSpectral` or :class:`ImageRaster2DHyperimage`.
+    Tiles are handed out as workers become free, so uneven workloads are
+    balanced automatically.
+
+    :arg datum: raster datum
+    :arg func: function applied on each tile. It must be picklable for the
+        process backend.
+    :arg block: size of the tiles in x and y
+    :arg workers: number of workers (default: number of CPUs)
+    :arg backend: either :const:`BACKEND_THREAD` or :const:`BACKEND_PROCESS`
+    """
+    if not isinstance(datum, _ImageRaster2D):
+        raise ValueError('Datum must be an image raster 2D')
+    if backend not in _BACKENDS:
+        raise ValueError('Unknown backend: %s' % backend)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 0:
+        raise ValueError('Number of workers must be greater than 0')
+
+    array = np.asarray(datum)
+    tiles = iter_tiles(array.shape, block)
+    output = None
+
+    with _BACKENDS[backend](max_workers=workers) as executor:
+        # Limit the number of submitted tiles to bound memory usage
+        pending = {}
+        for slices in itertools.islice(tiles, workers * 2):
+            pending[executor.submit(_apply, func, array[slices])] = slices
+
+        while pending:
+            done, _ = concurrent.futures.wait(pending,
+                return_when=concurrent.futures.FIRST_COMPLETED)
+
+            for future in done:
+                slices = pending.pop(future)
+                result = future.result()
+
+                if output is None:
+                    output = _create_output(datum, result)
+                output[slices] = result
+
+                for next_slices in itertools.islice(tiles, 1):
+                    future = executor.submit(_apply, func, array[next_slices])
+                    pending[future] = next_slices
+
+    return output
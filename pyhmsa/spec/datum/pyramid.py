@@ -0,0 +1,235 @@
+"""
+Multi-resolution preview pyramids of raster datums
+"""
+
+# Standard library modules.
+import json
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.spec.datum.imageraster import ImageRaster2D, ImageRaster2DSpectral
+from pyhmsa.spec.datum.binning import _bin_condition
+
+# Globals and constants variables.
+
+CHUNK_SIZE = 16 * 1024 * 1024 # bytes
+
+PYRAMID_HEADER_EXTRA = 'Pyramids'
+
+def _get_group_starts(start, length, factor):
+    # Indices, relative to *start*, where groups of *factor* values start
+    first = -(start % factor) % factor
+    starts = np.arange(first, length, factor)
+    if first != 0:
+        starts = np.concatenate(([0], starts))
+    return starts
+
+def _coarsen(values):
+    # Sums blocks of 2x2 pixels, edges are partial blocks
+    values = np.add.reduceat(values, np.arange(0, values.shape[0], 2), axis=0)
+    return np.add.reduceat(values, np.arange(0, values.shape[1], 2), axis=1)
+
+def _get_level_count(shape):
+    # Levels until the coarsest level has a single pixel
+    return int(np.ceil(np.log2(max(shape[:2])))) + 1 if max(shape[:2]) > 1 else 1
+
+def _create_conditions(datum, factor):
+    conditions = {}
+    for identifier, condition in datum.conditions.items():
+        conditions[identifier] = \
+            _bin_condition(condition, factor, factor, 1, partial=True)
+    return conditions
+
+def build_pyramid(datum, max_spectral_pixels=1024, chunk_size=CHUNK_SIZE):
+    """
+    Computes a multi-resolution pyramid of a raster datum for previews.
+
+    Level *k* sums blocks of ``2**k`` x ``2**k`` pixels (blocks at the edges
+    are partial), down to a single pixel. Each level has a total count
+    image, the sum over the channels of each pixel. Levels with at most
+    *max_spectral_pixels* pixels of an :class:`ImageRaster2DSpectral` also
+    have a spectral raster with the sum spectrum of each block; the last
+    level is the sum spectrum of the datum.
+
+    The datum is read once, by blocks of rows of about *chunk_size* bytes,
+    so it can be memory-mapped. Sums are 64-bit integers for integer
+    datums, 64-bit floats otherwise. Levels have the conditions of the
+    datum, where :class:`AcquisitionRasterXY` is updated for the block size
+    and its positions are moved to the centers of the first and last blocks.
+
+    :arg datum: raster datum
+    :type datum: :class:`ImageRaster2D` or :class:`ImageRaster2DSpectral`
+    :arg max_spectral_pixels: maximum number of pixels of spectral levels
+    :arg chunk_size: approximate maximum number of bytes read at once
+
+    :return: list of ``(factor, total, spectral)`` tuples from the finest to
+        the coarsest level, where *spectral* is ``None`` if not computed.
+        The first level of an :class:`ImageRaster2D` has a factor of 2,
+        since its total count image is the datum itself.
+    """
+    if not isinstance(datum, (ImageRaster2D, ImageRaster2DSpectral)):
+        raise ValueError('Datum must be an ImageRaster2D or ImageRaster2DSpectral')
+
+    array = np.asarray(datum)
+    nx, ny = array.shape[:2]
+    spectral = isinstance(datum, ImageRaster2DSpectral)
+
+    if np.issubdtype(array.dtype, np.integer):
+        dtype = np.dtype(np.int64)
+    else:
+        dtype = np.dtype(np.float64)
+
+    level_count = _get_level_count(array.shape)
+
+    # Finest level with spectra
+    spectral_level = None
+    if spectral:
+        for level in range(level_count):
+            factor = 2 ** level
+            if -(-nx // factor) * -(-ny // factor) <= max_spectral_pixels:
+                spectral_level = level
+                break
+
+    totals = np.zeros((nx, ny), dtype)
+    spectra = None
+    if spectral_level is not None:
+        factor = 2 ** spectral_level
+        spectra = np.zeros((-(-nx // factor), -(-ny // factor),
+                            array.shape[2]), dtype)
+        ystarts = _get_group_starts(0, ny, factor)
+
+    # Single pass over the rows of the datum
+    row_nbytes = max(1, int(np.prod(array.shape[1:])) * array.itemsize)
+    step = max(1, chunk_size // row_nbytes)
+
+    for start in range(0, nx, step):
+        block = np.asarray(array[start:start + step])
+
+        if spectral:
+            totals[start:start + block.shape[0]] = \
+                block.sum(axis=2, dtype=dtype)
+        else:
+            totals[start:start + block.shape[0]] = block
+
+        if spectra is not None:
+            xstarts = _get_group_starts(start, block.shape[0], factor)
+            partial = np.add.reduceat(block, xstarts, axis=0, dtype=dtype)
+            partial = np.add.reduceat(partial, ystarts, axis=1)
+
+            xgroup = start // factor
+            spectra[xgroup:xgroup + partial.shape[0]] += partial
+
+    # Coarser levels from the finer ones
+    levels = []
+    for level in range(level_count):
+        factor = 2 ** level
+        if level > 0:
+            totals = _coarsen(totals)
+        if spectra is not None and level > spectral_level:
+            spectra = _coarsen(spectra)
+
+        if level == 0 and not spectral:
+            continue
+
+        conditions = _create_conditions(datum, factor)
+        total = ImageRaster2D(totals.shape[0], totals.shape[1], dtype, totals,
+                              conditions=conditions)
+
+        level_spectra = None
+        if spectra is not None and level >= spectral_level:
+            level_spectra = ImageRaster2DSpectral(*spectra.shape, dtype=dtype,
+                                                  buffer=spectra,
+                                                  conditions=conditions)
+
+        levels.append((factor, total, level_spectra))
+
+    return levels
+
+def add_pyramid(datafile, identifier, max_spectral_pixels=1024,
+                chunk_size=CHUNK_SIZE):
+    """
+    Computes the pyramid of a datum with :func:`build_pyramid` and adds its
+    levels as derived datums to the data file. The levels are listed in the
+    ``Pyramids`` extra of the header, so they can later be read without
+    reading the datum (see :func:`read_pyramid_level`).
+
+    :arg datafile: data file
+    :arg identifier: identifier of the datum
+    :arg max_spectral_pixels: maximum number of pixels of spectral levels
+    :arg chunk_size: approximate maximum number of bytes read at once
+
+    :return: identifiers of the added datums
+    """
+    datum = datafile.data[identifier]
+    levels = build_pyramid(datum, max_spectral_pixels, chunk_size)
+
+    entries = []
+    identifiers = []
+    for factor, total, spectral in levels:
+        entry = {'factor': factor,
+                 'total': '%s_Pyramid%i' % (identifier, factor),
+                 'spectral': None}
+        datafile.data[entry['total']] = total
+        identifiers.append(entry['total'])
+
+        if spectral is not None:
+            entry['spectral'] = '%s_PyramidSpectral%i' % (identifier, factor)
+            datafile.data[entry['spectral']] = spectral
+            identifiers.append(entry['spectral'])
+
+        entries.append(entry)
+
+    pyramids = _read_header_extra(datafile.header)
+    pyramids[identifier] = entries
+    datafile.header[PYRAMID_HEADER_EXTRA] = json.dumps(pyramids, sort_keys=True)
+
+    return identifiers
+
+def _read_header_extra(header):
+    try:
+        value = header[PYRAMID_HEADER_EXTRA]
+    except KeyError:
+        return {}
+    return json.loads(value)
+
+def get_pyramid(header, identifier):
+    """
+    Returns the levels of the pyramid of a datum, as listed in the header,
+    from the finest to the coarsest level. Each level is a :class:`dict`
+    with the ``factor`` of the level and the identifiers of the ``total``
+    and ``spectral`` (``None`` if not computed) datums.
+    Returns an empty list if the datum has no pyramid.
+
+    :arg header: header of a data file
+    :arg identifier: identifier of the datum
+    """
+    return _read_header_extra(header).get(identifier, [])
+
+def read_pyramid_level(source, identifier, level):
+    """
+    Returns the total count image and the spectral raster (or ``None``) of
+    a level of the pyramid of a datum.
+
+    :arg source: a data file, or a data file handle to read only the datums
+        of the level
+    :arg identifier: identifier of the datum
+    :arg level: index of the level in :func:`get_pyramid`
+    """
+    levels = get_pyramid(source.header, identifier)
+    if not levels:
+        raise ValueError('No pyramid for datum %s' % identifier)
+    entry = levels[level]
+
+    if hasattr(source, 'read_datum'):
+        read = source.read_datum
+    else:
+        read = source.data.__getitem__
+
+    total = read(entry['total'])
+    spectral = None
+    if entry['spectral'] is not None:
+        spectral = read(entry['spectral'])
+
+    return total, spectral
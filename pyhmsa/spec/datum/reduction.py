@@ -0,0 +1,258 @@
+"""
+Reductions of raster and analysis list datums
+"""
+
+# Standard library modules.
+import os
+import itertools
+import concurrent.futures
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.util.monitorable import _Monitorable, _MonitorableThread
+from pyhmsa.spec.datum.analysis import Analysis1D, Analysis2D
+from pyhmsa.spec.datum.analysislist import \
+    AnalysisList0D, AnalysisList1D, AnalysisList2D
+from pyhmsa.spec.datum.imageraster import \
+    ImageRaster2D, ImageRaster2DSpectral, ImageRaster2DHyperimage
+from pyhmsa.spec.datum.parallel import iter_tiles
+
+# Globals and constants variables.
+
+REDUCTION_SUM = 'sum' # Sum over the collection, e.g. sum spectrum
+REDUCTION_MEAN = 'mean' # Mean over the collection, e.g. mean pattern
+REDUCTION_MAX = 'max' # Maximum over the collection, e.g. max pixel spectrum
+REDUCTION_MIN = 'min' # Minimum over the collection
+REDUCTION_TOTAL = 'total' # Sum of each datum, e.g. total count image
+
+_REDUCTIONS = frozenset([REDUCTION_SUM, REDUCTION_MEAN, REDUCTION_MAX,
+                         REDUCTION_MIN, REDUCTION_TOTAL])
+
+CHUNK_SIZE = 16 * 1024 * 1024 # bytes
+
+# Number of collection axes of the supported datum classes
+_COLLECTION_NDIMS = {ImageRaster2DSpectral: 2,
+                     ImageRaster2DHyperimage: 2,
+                     AnalysisList1D: 1,
+                     AnalysisList2D: 1}
+
+def _get_collection_ndim(datum):
+    for clasz, ndim in _COLLECTION_NDIMS.items():
+        if isinstance(datum, clasz):
+            return ndim
+    raise ValueError('Datum must be an ImageRaster2DSpectral, ' + \
+                     'ImageRaster2DHyperimage, AnalysisList1D or ' + \
+                     'AnalysisList2D')
+
+def _get_block_shape(shape, pixels):
+    # Shape of blocks of at most *pixels* datums over the collection axes
+    if len(shape) == 1:
+        return (min(shape[0], pixels),)
+    by = min(shape[1], pixels)
+    return (max(1, pixels // by), by)
+
+def _iter_blocks(shape, block_shape):
+    if len(shape) == 1:
+        size = block_shape[0]
+        for start in range(0, shape[0], size):
+            yield (slice(start, min(start + size, shape[0])),)
+    else:
+        yield from iter_tiles(shape, block_shape)
+
+def _reduce_block(block, ndim, reductions, dtype):
+    block = np.asarray(block)
+    collection_axes = tuple(range(ndim))
+    datum_axes = tuple(range(ndim, block.ndim))
+
+    partials = {}
+    if REDUCTION_SUM in reductions or REDUCTION_MEAN in reductions:
+        partials[REDUCTION_SUM] = block.sum(axis=collection_axes, dtype=dtype)
+    if REDUCTION_MAX in reductions:
+        partials[REDUCTION_MAX] = block.max(axis=collection_axes)
+    if REDUCTION_MIN in reductions:
+        partials[REDUCTION_MIN] = block.min(axis=collection_axes)
+    if REDUCTION_TOTAL in reductions:
+        partials[REDUCTION_TOTAL] = block.sum(axis=datum_axes, dtype=dtype)
+    return partials
+
+def _create_datum(values, conditions):
+    if values.ndim == 1:
+        return Analysis1D(values.shape[0], values.dtype, values,
+                          conditions=conditions)
+    elif values.ndim == 2:
+        return Analysis2D(values.shape[0], values.shape[1], values.dtype,
+                          values, conditions=conditions)
+    raise ValueError('Unsupported number of dimensions: %i' % values.ndim)
+
+def _create_total_datum(values, conditions):
+    if values.ndim == 2:
+        return ImageRaster2D(values.shape[0], values.shape[1], values.dtype,
+                             values, conditions=conditions)
+    return AnalysisList0D(values.shape[0], values.dtype, values,
+                          conditions=conditions)
+
+class _ReducerThread(_MonitorableThread):
+
+    def __init__(self, datum, reductions, chunk_size, max_workers):
+        args = (datum, reductions, chunk_size, max_workers)
+        super().__init__(args=args)
+
+    def _run(self, datum, reductions, chunk_size, max_workers,
+             *args, **kwargs):
+        ndim = _get_collection_ndim(datum)
+        array = np.asarray(datum)
+        collection_shape = array.shape[:ndim]
+        datum_shape = array.shape[ndim:]
+
+        if np.issubdtype(array.dtype, np.integer):
+            dtype = np.dtype(np.int64)
+        else:
+            dtype = np.dtype(np.float64)
+
+        results = {}
+        if REDUCTION_SUM in reductions or REDUCTION_MEAN in reductions:
+            results[REDUCTION_SUM] = np.zeros(datum_shape, dtype)
+        if REDUCTION_MAX in reductions:
+            results[REDUCTION_MAX] = np.full(datum_shape, array.dtype.type(0))
+        if REDUCTION_MIN in reductions:
+            results[REDUCTION_MIN] = np.full(datum_shape, array.dtype.type(0))
+        if REDUCTION_TOTAL in reductions:
+            results[REDUCTION_TOTAL] = np.zeros(collection_shape, dtype)
+
+        # Blocks are sized so that a block is at most about chunk_size bytes
+        datum_nbytes = max(1, int(np.prod(datum_shape)) * array.itemsize)
+        pixels = max(1, chunk_size // datum_nbytes)
+        block_shape = _get_block_shape(collection_shape, pixels)
+        blocks = _iter_blocks(collection_shape, block_shape)
+        block_count = int(np.prod([-(-length // size) for length, size
+                                   in zip(collection_shape, block_shape)]))
+
+        workers = max_workers or os.cpu_count() or 1
+        first = True
+        done_count = 0
+
+        with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+            # Limit the number of submitted blocks to bound memory usage
+            pending = {}
+            for slices in itertools.islice(blocks, workers * 2):
+                future = executor.submit(_reduce_block, array[slices], ndim,
+                                         reductions, dtype)
+                pending[future] = slices
+
+            while pending:
+                done, _ = concurrent.futures.wait(pending,
+                    return_when=concurrent.futures.FIRST_COMPLETED)
+
+                for future in done:
+                    slices = pending.pop(future)
+                    partials = future.result()
+
+                    for reduction, values in partials.items():
+                        result = results[reduction]
+                        if reduction == REDUCTION_SUM:
+                            result += values
+                        elif reduction == REDUCTION_TOTAL:
+                            result[slices] = values
+                        elif first:
+                            result[...] = values
+                        elif reduction == REDUCTION_MAX:
+                            np.maximum(result, values, out=result)
+                        elif reduction == REDUCTION_MIN:
+                            np.minimum(result, values, out=result)
+                    first = False
+
+                    done_count += 1
+                    self._update_status(done_count / block_count, 'Reducing')
+
+                if self.is_cancelled():
+                    for future in pending:
+                        future.cancel()
+                    return
+
+                for slices in itertools.islice(blocks, len(done)):
+                    future = executor.submit(_reduce_block, array[slices],
+                                             ndim, reductions, dtype)
+                    pending[future] = slices
+
+        count = max(1, int(np.prod(collection_shape)))
+        conditions = datum.conditions
+
+        output = {}
+        for reduction in reductions:
+            if reduction == REDUCTION_MEAN:
+                values = results[REDUCTION_SUM] / count
+            else:
+                values = results[reduction]
+
+            if reduction == REDUCTION_TOTAL:
+                output[reduction] = _create_total_datum(values, conditions)
+            else:
+                output[reduction] = _create_datum(values, conditions)
+
+        return output
+
+class Reducer(_Monitorable):
+
+    def __init__(self, chunk_size=CHUNK_SIZE, max_workers=None):
+        """
+        Computes reductions of a datum in a single pass over its values,
+        block by block, to bound memory usage on large (e.g.
+        memory-mapped) datums.
+
+        Supported datums are :class:`ImageRaster2DSpectral`,
+        :class:`ImageRaster2DHyperimage`, :class:`AnalysisList1D` and
+        :class:`AnalysisList2D`. Reductions over the collection
+        (:const:`REDUCTION_SUM`, :const:`REDUCTION_MEAN`,
+        :const:`REDUCTION_MAX` and :const:`REDUCTION_MIN`) return an
+        :class:`Analysis1D` or :class:`Analysis2D`.
+        :const:`REDUCTION_TOTAL` returns the sum of each datum as an
+        :class:`ImageRaster2D` or :class:`AnalysisList0D`.
+        All results have the conditions of the datum.
+        Sums are 64-bit integers for integer datums, 64-bit floats otherwise.
+
+        :arg chunk_size: approximate maximum number of bytes of a block
+        :arg max_workers: number of threads reducing blocks
+            (default: number of CPUs)
+        """
+        super().__init__()
+
+        if chunk_size <= 0:
+            raise ValueError('Chunk size must be greater than 0')
+        if max_workers is not None and max_workers <= 0:
+            raise ValueError('Number of workers must be greater than 0')
+
+        self._chunk_size = chunk_size
+        self._max_workers = max_workers
+
+    def _create_thread(self, datum, reductions, *args, **kwargs):
+        return _ReducerThread(datum, reductions,
+                              self._chunk_size, self._max_workers)
+
+    def reduce(self, datum, reductions=(REDUCTION_SUM,)):
+        """
+        Starts the reductions of a datum. The results, a :class:`dict` of
+        reductions and datums, are returned by :meth:`get`.
+
+        :arg datum: datum
+        :arg reductions: reductions to compute
+        """
+        _get_collection_ndim(datum)
+
+        reductions = tuple(reductions)
+        for reduction in reductions:
+            if reduction not in _REDUCTIONS:
+                raise ValueError('Unknown reduction: %s' % reduction)
+
+        self._start(datum, reductions)
+
+def compute_reductions(datum, reductions=(REDUCTION_SUM,),
+                       chunk_size=CHUNK_SIZE, max_workers=None):
+    """
+    Computes reductions of a datum and returns a :class:`dict` of
+    reductions and datums. See :class:`Reducer`.
+    """
+    reducer = Reducer(chunk_size, max_workers)
+    reducer.reduce(datum, reductions)
+    return reducer.get()
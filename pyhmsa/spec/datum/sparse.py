@@ -0,0 +1,329 @@
+"""
+Sparse spectral raster datums
+"""
+
+# Standard library modules.
+from collections import OrderedDict
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.spec.datum.analysis import Analysis1D
+from pyhmsa.spec.datum.imageraster import ImageRaster2D, ImageRaster2DSpectral
+from pyhmsa.spec.condition.conditions import Conditions
+from pyhmsa.type.numerical import validate_dtype
+
+# Globals and constants variables.
+
+CHUNK_SIZE = 16 * 1024 * 1024 # bytes
+
+def _get_index_dtype(channels):
+    if channels <= np.iinfo(np.uint16).max + 1:
+        return np.dtype(np.uint16)
+    return np.dtype(np.uint32)
+
+def _get_sum_dtype(dtype):
+    if np.issubdtype(dtype, np.integer):
+        return np.dtype(np.int64)
+    return np.dtype(np.float64)
+
+class SparseImageRaster2DSpectral(object):
+    """
+    Represents the same dataset as :class:`ImageRaster2DSpectral`, but only
+    stores the non-zero values, which suits maps with low counts per pixel.
+
+    Values are stored in compressed sparse rows, one row per pixel: the
+    non-zero values of pixel ``(x, y)``, at index ``p = x * y_count + y``,
+    are ``values[indptr[p]:indptr[p + 1]]`` and their channels are
+    ``indices[indptr[p]:indptr[p + 1]]``.
+    Memory usage and processing times scale with the number of non-zero
+    values rather than the number of voxels.
+
+    When written to a HMSA file, the datum is converted to a dense
+    2D/Spectral image raster block by block; it is read back as an
+    :class:`ImageRaster2DSpectral`.
+    """
+
+    TEMPLATE = ImageRaster2DSpectral.TEMPLATE
+    CLASS = ImageRaster2DSpectral.CLASS
+
+    def __init__(self, x, y, channels, dtype=np.float32,
+                 indptr=None, indices=None, values=None, conditions=None):
+        """
+        Creates a sparse spectral raster datum, without any counts if
+        *indptr*, *indices* and *values* are not specified.
+        The channels of a pixel must be unique.
+
+        :arg x: number of pixels in x
+        :arg y: number of pixels in y
+        :arg channels: number of channels
+        :arg dtype: data type of the values
+        :arg indptr: array of ``x * y + 1`` offsets of the pixels in
+            *indices* and *values*
+        :arg indices: array of the channels of the non-zero values
+        :arg values: array of the non-zero values
+        :arg conditions: conditions
+        """
+        validate_dtype(dtype)
+        if x <= 0 or y <= 0 or channels <= 0:
+            raise ValueError('Dimensions must be greater than 0')
+
+        self._shape = (int(x), int(y), int(channels))
+        self._dtype = np.dtype(dtype)
+
+        pixel_count = self._shape[0] * self._shape[1]
+        if indptr is None and indices is None and values is None:
+            indptr = np.zeros(pixel_count + 1, np.int64)
+            indices = np.zeros(0, _get_index_dtype(channels))
+            values = np.zeros(0, dtype)
+
+        indptr = np.asarray(indptr, np.int64)
+        indices = np.asarray(indices, _get_index_dtype(channels))
+        values = np.asarray(values, dtype)
+
+        if indptr.shape != (pixel_count + 1,):
+            raise ValueError('indptr must have %i values' % (pixel_count + 1))
+        if indptr[0] != 0 or np.any(np.diff(indptr) < 0):
+            raise ValueError('indptr must be increasing from 0')
+        if indices.shape != (indptr[-1],) or values.shape != (indptr[-1],):
+            raise ValueError('indices and values must have %i values' % indptr[-1])
+        if indices.size and int(indices.max()) >= channels:
+            raise ValueError('Channels must be lower than %i' % channels)
+
+        self._indptr = indptr
+        self._indices = indices
+        self._values = values
+
+        self._conditions = Conditions()
+        if conditions is not None:
+            self._conditions.update(conditions)
+
+    def __repr__(self):
+        return '<%s(%i x %i x %i, %i non-zero values)>' % \
+            (type(self).__name__, self._shape[0], self._shape[1],
+             self._shape[2], self.nnz)
+
+    @classmethod
+    def fromdense(cls, datum, chunk_size=CHUNK_SIZE):
+        """
+        Converts a spectral raster datum to a sparse datum.
+        The datum is read by blocks of rows of about *chunk_size* bytes, so
+        it can be memory-mapped.
+
+        :arg datum: spectral raster datum
+        :type datum: :class:`ImageRaster2DSpectral`
+        :arg chunk_size: approximate maximum number of bytes read at once
+        """
+        if not isinstance(datum, ImageRaster2DSpectral):
+            raise ValueError('Datum must be an image raster 2D spectral')
+
+        array = np.asarray(datum)
+        nx, ny, channels = array.shape
+        index_dtype = _get_index_dtype(channels)
+
+        row_nbytes = max(1, ny * channels * array.itemsize)
+        step = max(1, chunk_size // row_nbytes)
+
+        counts = []
+        indices = []
+        values = []
+        for start in range(0, nx, step):
+            block = np.asarray(array[start:start + step]).reshape(-1, channels)
+            pixels, channels_ = np.nonzero(block)
+            counts.append(np.bincount(pixels, minlength=block.shape[0]))
+            indices.append(channels_.astype(index_dtype))
+            values.append(block[pixels, channels_])
+
+        indptr = np.zeros(nx * ny + 1, np.int64)
+        np.cumsum(np.concatenate(counts), out=indptr[1:])
+
+        return cls(nx, ny, channels, array.dtype, indptr,
+                   np.concatenate(indices), np.concatenate(values),
+                   conditions=datum.conditions)
+
+    def todense(self, out=None, chunk_size=CHUNK_SIZE):
+        """
+        Converts the datum to a spectral raster datum, by blocks of rows of
+        about *chunk_size* bytes.
+
+        :arg out: array where the values are written, for instance a
+            :class:`numpy.memmap`
+        :arg chunk_size: approximate maximum number of bytes written at once
+
+        :rtype: :class:`ImageRaster2DSpectral`
+        """
+        if out is not None:
+            if tuple(out.shape) != self._shape:
+                raise ValueError('Output must have shape %s' % (self._shape,))
+        else:
+            out = np.empty(self._shape, self._dtype)
+        validate_dtype(out.dtype)
+
+        nx, ny, channels = self._shape
+        step = max(1, chunk_size // max(1, ny * channels * self._dtype.itemsize))
+        for start in range(0, nx, step):
+            xslice = slice(start, min(start + step, nx))
+            out[xslice] = self.get_block(xslice, slice(None))
+
+        datum = out.view(ImageRaster2DSpectral)
+        datum.conditions.update(self.conditions)
+        return datum
+
+    def _gather(self, pixels):
+        """
+        Returns, for the non-zero values of the pixels, the index of their
+        pixel in *pixels* and their position in :attr:`indices` and
+        :attr:`values`.
+        """
+        starts = self._indptr[pixels]
+        lengths = self._indptr[pixels + 1] - starts
+        owners = np.repeat(np.arange(pixels.size), lengths)
+        offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        return owners, np.arange(int(lengths.sum())) + offsets
+
+    def get_block(self, xslice, yslice):
+        """
+        Returns the dense values of a block of pixels.
+
+        :arg xslice: slice of the pixels in x
+        :arg yslice: slice of the pixels in y
+
+        :return: array of shape ``(bx, by, channels)``
+        """
+        nx, ny, channels = self._shape
+        xs = np.arange(nx)[xslice]
+        ys = np.arange(ny)[yslice]
+        pixels = (xs[:, np.newaxis] * ny + ys[np.newaxis, :]).ravel()
+
+        owners, positions = self._gather(pixels)
+        block = np.zeros((pixels.size, channels), self._dtype)
+        block[owners, self._indices[positions]] = self._values[positions]
+
+        return block.reshape(xs.size, ys.size, channels)
+
+    def get_spectrum(self, x, y):
+        """
+        Returns the dense values of a pixel.
+        """
+        nx, ny, _channels = self._shape
+        if x < -nx or x >= nx:
+            raise IndexError('Index %i is out of bounds' % x)
+        if y < -ny or y >= ny:
+            raise IndexError('Index %i is out of bounds' % y)
+        x, y = x % nx, y % ny
+        return self.get_block(slice(x, x + 1), slice(y, y + 1))[0, 0]
+
+    def toanalysis(self, x, y):
+        return Analysis1D(self.channels, self.dtype, self.get_spectrum(x, y),
+                          conditions=self.conditions)
+
+    def get_pixel_indices(self):
+        """
+        Returns the index ``x * y_count + y`` of the pixel of each non-zero
+        value.
+        """
+        return np.repeat(np.arange(self._indptr.size - 1), np.diff(self._indptr))
+
+    def sum(self, axis=None):
+        """
+        Sums the values of the datum.
+        Sums are 64-bit integers for integer datums, 64-bit floats otherwise.
+
+        :arg axis: ``None`` to sum all values, ``(0, 1)`` to sum the spectra
+            of all pixels (returns an :class:`Analysis1D`) or ``2`` to sum
+            the channels of each pixel (returns an :class:`ImageRaster2D`)
+        """
+        nx, ny, channels = self._shape
+        dtype = _get_sum_dtype(self._dtype)
+
+        if axis is None:
+            return self._values.sum(dtype=dtype)
+
+        if isinstance(axis, (tuple, list)) and \
+                sorted(a % 3 for a in axis) == [0, 1]:
+            sums = np.bincount(self._indices, self._values, minlength=channels)
+            return Analysis1D(channels, dtype, sums.astype(dtype),
+                              conditions=self.conditions)
+
+        if not isinstance(axis, (tuple, list)) and axis % 3 == 2:
+            sums = np.bincount(self.get_pixel_indices(), self._values,
+                               minlength=nx * ny)
+            return ImageRaster2D(nx, ny, dtype, sums.astype(dtype),
+                                 conditions=self.conditions)
+
+        raise ValueError('Unsupported axis: %s' % (axis,))
+
+    @property
+    def conditions(self):
+        """
+        Conditions associated to this dataset.
+        """
+        return self._conditions
+
+    @property
+    def indptr(self):
+        return self._indptr
+
+    @property
+    def indices(self):
+        return self._indices
+
+    @property
+    def values(self):
+        return self._values
+
+    @property
+    def nnz(self):
+        """
+        Number of non-zero values.
+        """
+        return self._values.size
+
+    @property
+    def shape(self):
+        return self._shape
+
+    @property
+    def ndim(self):
+        return len(self._shape)
+
+    @property
+    def size(self):
+        """
+        Number of values of the dense datum.
+        """
+        return int(np.prod(self._shape))
+
+    @property
+    def dtype(self):
+        return self._dtype
+
+    @property
+    def itemsize(self):
+        return self._dtype.itemsize
+
+    @property
+    def x(self):
+        return np.uint32(self._shape[0])
+
+    @property
+    def y(self):
+        return np.uint32(self._shape[1])
+
+    @property
+    def channels(self):
+        return np.uint32(self._shape[2])
+
+    @property
+    def datum_dimensions(self):
+        dims = OrderedDict()
+        dims['Channel'] = self.channels
+        return dims
+
+    @property
+    def collection_dimensions(self):
+        dims = OrderedDict()
+        dims['X'] = self.x
+        dims['Y'] = self.y
+        return dims
@@ -12,6 +12,7 @@ from PIL import Image
 # Local modules.
 from pyhmsa.spec.datum.analysis import Analysis0D, Analysis1D, Analysis2D
 from pyhmsa.spec.condition.condition import _Condition
+from pyhmsa.spec.condition.calibration import CalibrationLinear
 
 # Globals and constants variables.
 
@@ -72,6 +73,21 @@ class TestAnalysis1D(unittest.TestCase):
         self.assertEqual(5, len(xy))
         self.assertEqual(2, xy.shape[1])
 
+    def testget_xdata(self):
+        np.testing.assert_array_equal(np.arange(5), self.datum.get_xdata())
+
+        calibration = CalibrationLinear('Energy', 'eV', 10.0, 5.0)
+        xs = self.datum.get_xdata(calibration)
+        np.testing.assert_array_almost_equal([5.0, 15.0, 25.0, 35.0, 45.0], xs)
+        self.assertIsNot(xs, self.datum.get_xdata(calibration))
+
+        xs[0] = 0.0 # Copy of the cached axis
+        self.assertAlmostEqual(5.0, self.datum.get_xdata(calibration)[0], 4)
+
+        calibration.gain = 20.0
+        xs = self.datum.get_xdata(calibration)
+        np.testing.assert_array_almost_equal([5.0, 25.0, 45.0, 65.0, 85.0], xs)
+
     def testxlabel(self):
         self.assertEqual('Channels', self.datum.get_xlabel())
 
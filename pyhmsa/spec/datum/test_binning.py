@@ -0,0 +1,237 @@
+""" """
+
+# Standard library modules.
+import unittest
+import logging
+import os
+import tempfile
+import shutil
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.spec.datum.binning import bin
+from pyhmsa.spec.datum.analysislist import AnalysisList0D, AnalysisList1D
+from pyhmsa.spec.datum.imageraster import \
+    ImageRaster2D, ImageRaster2DSpectral, ImageRaster2DHyperimage
+from pyhmsa.spec.condition.acquisition import \
+    AcquisitionRasterXY, AcquisitionRasterLinescan
+from pyhmsa.spec.condition.detector import DetectorSpectrometer
+from pyhmsa.spec.condition.calibration import \
+    (CalibrationConstant, CalibrationLinear, CalibrationPolynomial,
+     CalibrationExplicit)
+from pyhmsa.spec.condition.elementalid import ElementalID
+from pyhmsa.spec.condition.specimenposition import SpecimenPosition
+
+# Globals and constants variables.
+from pyhmsa.spec.condition.acquisition import \
+    (POSITION_LOCATION_START, POSITION_LOCATION_CENTER,
+     POSITION_LOCATION_END)
+
+class TestModule(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmpdir = tempfile.mkdtemp()
+
+        self.acq = AcquisitionRasterXY(9, 7, 1.0, 2.0, dwell_time=0.5)
+        calibration = CalibrationLinear('Energy', 'eV', 10.0, -5.0)
+        self.det = DetectorSpectrometer(10, calibration)
+        self.el = ElementalID(13)
+
+        buffer = np.arange(9 * 7 * 10, dtype=np.uint16)
+        conditions = {'Acq': self.acq, 'Det': self.det, 'El': self.el}
+        self.datum = ImageRaster2DSpectral(9, 7, 10, np.uint16, buffer,
+                                           conditions=conditions)
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _expected(self, array, factors):
+        shape = [length // factor for length, factor in zip(array.shape, factors)]
+        array = array[tuple(slice(0, length * factor)
+                            for length, factor in zip(shape, factors))]
+        block_shape = []
+        for length, factor in zip(shape, factors):
+            block_shape.extend((length, factor))
+        return array.reshape(block_shape).sum(axis=tuple(range(1, 2 * len(shape), 2)))
+
+    def testbin_spectral(self):
+        binned = bin(self.datum, 2, 3, 4, chunk_size=100)
+
+        self.assertIsInstance(binned, ImageRaster2DSpectral)
+        self.assertEqual((4, 2, 2), binned.shape)
+        self.assertEqual(np.int64, binned.dtype)
+        expected = self._expected(np.asarray(self.datum, np.int64), (2, 3, 4))
+        np.testing.assert_array_equal(expected, binned)
+
+    def testbin_conditions(self):
+        binned = bin(self.datum, 2, 3, 4)
+
+        acq = binned.conditions['Acq']
+        self.assertIsNot(self.acq, acq)
+        self.assertEqual(4, acq.step_count_x)
+        self.assertEqual(2, acq.step_count_y)
+        self.assertAlmostEqual(2.0, acq.step_size_x, 4)
+        self.assertAlmostEqual(6.0, acq.step_size_y, 4)
+        self.assertEqual('um', acq.step_size_y.unit)
+        self.assertAlmostEqual(3.0, acq.dwell_time, 4)
+        self.assertEqual(9, self.acq.step_count_x)
+
+        det = binned.conditions['Det']
+        self.assertEqual(2, det.channel_count)
+        self.assertAlmostEqual(40.0, det.calibration.gain, 4)
+        self.assertAlmostEqual(10.0, det.calibration.offset, 4)
+        self.assertAlmostEqual(-5.0, self.det.calibration.offset, 4)
+
+        self.assertIs(self.el, binned.conditions['El'])
+
+    def testbin_conditions_units(self):
+        acq = AcquisitionRasterXY(10, 8, (2.0, 'mm'), (3.0, 'nm'),
+                                  dwell_time=(5.0, 'ms'),
+                                  dwell_time_live=(4.0, 'us'))
+        datum = ImageRaster2D(10, 8, conditions={'Acq': acq})
+        binned = bin(datum, 2, 2)
+
+        acq = binned.conditions['Acq']
+        self.assertAlmostEqual(4.0, acq.step_size_x, 4)
+        self.assertEqual('mm', acq.step_size_x.unit)
+        self.assertAlmostEqual(6.0, acq.step_size_y, 4)
+        self.assertEqual('nm', acq.step_size_y.unit)
+        self.assertAlmostEqual(20.0, acq.dwell_time, 4)
+        self.assertEqual('ms', acq.dwell_time.unit)
+        self.assertAlmostEqual(16.0, acq.dwell_time_live, 4)
+        self.assertEqual('us', acq.dwell_time_live.unit)
+
+        acq = AcquisitionRasterLinescan(11, (0.5, 'mm'), dwell_time=(2.0, 'ms'))
+        datum = AnalysisList0D(11, conditions={'Acq': acq})
+        acq = bin(datum, x=5).conditions['Acq']
+        self.assertAlmostEqual(2.5, acq.step_size, 4)
+        self.assertEqual('mm', acq.step_size.unit)
+        self.assertEqual('ms', acq.dwell_time.unit)
+
+    def testbin_conditions_positions(self):
+        # Centers of the first and last blocks, the last column is discarded
+        expected = {POSITION_LOCATION_START: (1.001, 2.0015),
+                    POSITION_LOCATION_CENTER: (0.999, 2.0),
+                    POSITION_LOCATION_END: (0.997, 1.9985)}
+
+        for location, (x, y) in expected.items():
+            position = SpecimenPosition(1.0, 2.0, 3.0)
+            acq = AcquisitionRasterXY(5, 4, (2.0, 'um'), (0.003, 'mm'),
+                                      position=(position, location))
+            datum = ImageRaster2D(5, 4, conditions={'Acq': acq})
+            binned = bin(datum, 2, 2).conditions['Acq']
+
+            position, binned_location = binned.get_position(True)
+            self.assertEqual(location, binned_location)
+            self.assertAlmostEqual(x, position.x, 6)
+            self.assertAlmostEqual(y, position.y, 6)
+            self.assertAlmostEqual(3.0, position.z, 6)
+            self.assertEqual('mm', position.x.unit)
+            self.assertAlmostEqual(1.0, acq.position.x, 6)
+
+        # Positions are unchanged without step sizes
+        acq = AcquisitionRasterXY(5, 4, position=SpecimenPosition(1.0, 2.0))
+        datum = ImageRaster2D(5, 4, conditions={'Acq': acq})
+        position = bin(datum, 2, 2).conditions['Acq'].position
+        self.assertAlmostEqual(1.0, position.x, 6)
+        self.assertAlmostEqual(2.0, position.y, 6)
+
+    def testbin_conditions_positions_linescan(self):
+        acq = AcquisitionRasterLinescan(11, position_start=SpecimenPosition(0.0, 0.0),
+                                        position_end=SpecimenPosition(1.0, 2.0))
+        datum = AnalysisList0D(11, conditions={'Acq': acq})
+        binned = bin(datum, x=5).conditions['Acq']
+
+        self.assertAlmostEqual(0.2, binned.position_start.x, 6)
+        self.assertAlmostEqual(0.4, binned.position_start.y, 6)
+        self.assertIsNone(binned.position_start.z)
+        self.assertAlmostEqual(0.7, binned.position_end.x, 6)
+        self.assertAlmostEqual(1.4, binned.position_end.y, 6)
+        self.assertAlmostEqual(1.0, acq.position_end.x, 6)
+
+    def testbin_calibrations(self):
+        datum = self.datum.copy()
+
+        centers = np.arange(5) * 2 + 0.5
+        cases = [(CalibrationConstant('Energy', 'eV', 5.0), np.full(5, 5.0)),
+                 (CalibrationPolynomial('Energy', 'eV', [0.5, 2.0, 1.0]),
+                  0.5 * centers ** 2 + 2.0 * centers + 1.0),
+                 (CalibrationExplicit('Energy', 'eV', np.arange(10.0) ** 2),
+                  np.interp(centers, np.arange(10), np.arange(10.0) ** 2))]
+
+        for calibration, expected in cases:
+            datum.conditions['Det'] = DetectorSpectrometer(10, calibration)
+            binned = bin(datum, channel=2)
+
+            actual = binned.conditions['Det'].calibration.get_axis(5)
+            np.testing.assert_array_almost_equal(expected, actual)
+
+    def testbin_image(self):
+        datum = ImageRaster2D(9, 7, np.float32,
+                              np.arange(63, dtype=np.float32))
+        binned = bin(datum, 3, 7)
+
+        self.assertIsInstance(binned, ImageRaster2D)
+        self.assertEqual((3, 1), binned.shape)
+        self.assertEqual(np.float64, binned.dtype)
+        expected = self._expected(np.asarray(datum, np.float64), (3, 7))
+        np.testing.assert_array_almost_equal(expected, binned)
+
+    def testbin_hyperimage(self):
+        datum = ImageRaster2DHyperimage(4, 4, 2, 3, np.int32,
+                                        np.arange(96, dtype=np.int32))
+        binned = bin(datum, 2, 2, dtype=np.int32)
+
+        self.assertEqual((2, 2, 2, 3), binned.shape)
+        self.assertEqual(np.int32, binned.dtype)
+        expected = self._expected(np.asarray(datum), (2, 2, 1, 1))
+        np.testing.assert_array_equal(expected, binned)
+
+    def testbin_analysislist(self):
+        acq = AcquisitionRasterLinescan(11, 0.5)
+        datum = AnalysisList1D(11, 6, np.uint16, np.arange(66, dtype=np.uint16),
+                               conditions={'Acq': acq})
+        binned = bin(datum, x=5, channel=3)
+
+        self.assertIsInstance(binned, AnalysisList1D)
+        expected = self._expected(np.asarray(datum, np.int64), (5, 3))
+        np.testing.assert_array_equal(expected, binned)
+        self.assertEqual(2, binned.conditions['Acq'].step_count)
+        self.assertAlmostEqual(2.5, binned.conditions['Acq'].step_size, 4)
+
+        datum = AnalysisList0D(11, np.float32, np.ones(11, np.float32))
+        binned = bin(datum, x=2)
+        np.testing.assert_array_almost_equal(np.full((5, 1), 2.0), binned)
+
+    def testbin_out(self):
+        filepath = os.path.join(self.tmpdir, 'binned.raw')
+        out = np.memmap(filepath, np.uint32, 'w+', shape=(3, 7, 5))
+
+        binned = bin(self.datum, x=3, channel=2, out=out, chunk_size=1)
+        self.assertIsInstance(binned, ImageRaster2DSpectral)
+        self.assertEqual(np.uint32, binned.dtype)
+
+        out.flush()
+        del out, binned
+
+        values = np.fromfile(filepath, np.uint32).reshape(3, 7, 5)
+        expected = self._expected(np.asarray(self.datum, np.int64), (3, 1, 2))
+        np.testing.assert_array_equal(expected, values)
+
+    def testbin_invalid(self):
+        self.assertRaises(ValueError, bin, self.datum, 0)
+        self.assertRaises(ValueError, bin, self.datum, 1.5)
+        self.assertRaises(ValueError, bin, self.datum, 10)
+        self.assertRaises(ValueError, bin, ImageRaster2D(4, 4), channel=2)
+        self.assertRaises(ValueError, bin, AnalysisList1D(4, 4), y=2)
+        self.assertRaises(ValueError, bin, self.datum, 2,
+                          out=np.zeros((5, 7, 10)))
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,160 @@
+""" """
+
+# Standard library modules.
+import unittest
+import logging
+import os
+import tempfile
+import shutil
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.spec.datum.events import EventBinner, read_events, EVENT_DTYPE
+from pyhmsa.spec.datum.imageraster import ImageRaster2DSpectral
+from pyhmsa.spec.datum.analysislist import AnalysisList1D, AnalysisList2D
+from pyhmsa.spec.condition.acquisition import AcquisitionRasterXY
+from pyhmsa.spec.condition.detector import DetectorSpectrometerXEDS
+from pyhmsa.spec.condition.calibration import CalibrationLinear
+
+# Globals and constants variables.
+
+def _expected_counts(events, shape):
+    expected = np.zeros(shape, np.int64)
+    for event in events:
+        expected[event['x'], event['y'], event['channel']] += 1
+    return expected
+
+class TestEventBinner(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmpdir = tempfile.mkdtemp()
+
+        random = np.random.RandomState(0)
+        self.events = np.zeros(500, EVENT_DTYPE)
+        self.events['x'] = random.randint(0, 6, 500)
+        self.events['y'] = random.randint(0, 4, 500)
+        self.events['channel'] = random.randint(0, 10, 500)
+        self.events['timestamp'] = np.sort(random.randint(0, 1000, 500))
+
+        self.calibration = CalibrationLinear('Energy', 'eV', 10.0, 0.0)
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def testadd(self):
+        binner = EventBinner(6, 4, 10, self.calibration, 1.0, 1.0)
+        for start in range(0, 500, 7): # sparse chunks
+            binner.add_events(self.events[start:start + 7])
+        binner.add_events(self.events) # dense chunk
+
+        hypermap = binner.hypermap
+        self.assertIsInstance(hypermap, ImageRaster2DSpectral)
+        self.assertEqual(np.uint32, hypermap.dtype)
+        expected = _expected_counts(self.events, (6, 4, 10)) * 2
+        np.testing.assert_array_equal(expected, hypermap)
+        self.assertEqual(1000, binner.event_count)
+        self.assertEqual(0, binner.rejected_count)
+
+    def testconditions(self):
+        binner = EventBinner(6, 4, 10, self.calibration, 1.0, 2.0, tick=1e-3)
+        binner.add_events(self.events)
+
+        conditions = binner.hypermap.conditions
+        acq = next(iter(conditions.findvalues(AcquisitionRasterXY)))
+        self.assertEqual(6, acq.step_count_x)
+        self.assertAlmostEqual(2.0, acq.step_size_y, 4)
+        duration = (self.events['timestamp'].max() -
+                    self.events['timestamp'].min()) * 1e-3
+        self.assertAlmostEqual(duration, acq.total_time, 6)
+        self.assertAlmostEqual(duration / 24, acq.dwell_time, 6)
+        self.assertIsNone(acq.frame_count)
+
+        det = next(iter(conditions.findvalues(DetectorSpectrometerXEDS)))
+        self.assertEqual(10, det.channel_count)
+        self.assertIs(self.calibration, det.calibration)
+
+    def testframes(self):
+        binner = EventBinner(6, 4, 10, self.calibration, frame_duration=0.25,
+                             frame_images=True, tick=1e-3)
+        binner.add_events(self.events[::-1])
+
+        self.assertEqual(4, binner.frame_count)
+
+        frames = self.events['timestamp'] // 250
+        spectra = binner.frame_spectra
+        self.assertIsInstance(spectra, AnalysisList1D)
+        self.assertEqual((4, 10), spectra.shape)
+        for frame in range(4):
+            events = self.events[frames == frame]
+            np.testing.assert_array_equal(
+                np.bincount(events['channel'], minlength=10), spectra[frame])
+
+        images = binner.frame_images
+        self.assertIsInstance(images, AnalysisList2D)
+        self.assertEqual((4, 6, 4), images.shape)
+        np.testing.assert_array_equal(np.asarray(binner.hypermap).sum(axis=2),
+                                      np.asarray(images).sum(axis=0))
+        self.assertEqual(4, images.conditions['Acq0'].frame_count)
+
+    def testrejected(self):
+        binner = EventBinner(6, 4, 10, self.calibration)
+        accepted = binner.add([0, 6, 1, -1], [0, 0, 4, 0], [0, 0, 0, 0])
+
+        self.assertEqual(1, accepted)
+        self.assertEqual(1, binner.event_count)
+        self.assertEqual(3, binner.rejected_count)
+        self.assertEqual(1, binner.hypermap.sum())
+        self.assertIsNone(binner.frame_spectra)
+        self.assertIsNone(binner.frame_images)
+
+    def testout(self):
+        filepath = os.path.join(self.tmpdir, 'hypermap.raw')
+        out = np.memmap(filepath, np.uint16, 'w+', shape=(6, 4, 10))
+
+        binner = EventBinner(6, 4, 10, self.calibration, out=out)
+        binner.add_events(self.events)
+        self.assertEqual(np.uint16, binner.hypermap.dtype)
+
+        out.flush()
+        del out, binner
+
+        values = np.fromfile(filepath, np.uint16).reshape(6, 4, 10)
+        np.testing.assert_array_equal(_expected_counts(self.events, (6, 4, 10)),
+                                      values)
+
+    def testread_events(self):
+        filepath = os.path.join(self.tmpdir, 'events.bin')
+        with open(filepath, 'wb') as fp:
+            fp.write(b'HEADER')
+            self.events.tofile(fp)
+
+        chunks = list(read_events(filepath, offset=6, chunk_size=1000))
+        self.assertEqual(8, len(chunks)) # 71 events of 14 bytes per chunk
+        np.testing.assert_array_equal(self.events, np.concatenate(chunks))
+
+        binner = EventBinner(6, 4, 10, self.calibration)
+        self.assertEqual(500, binner.add_chunks(read_events(filepath, offset=6)))
+
+    def testinvalid(self):
+        self.assertRaises(ValueError, EventBinner, 0, 4, 10, self.calibration)
+        self.assertRaises(ValueError, EventBinner, 6, 4, 10, self.calibration,
+                          frame_duration=0.0)
+        self.assertRaises(ValueError, EventBinner, 6, 4, 10, self.calibration,
+                          frame_images=True)
+        self.assertRaises(ValueError, EventBinner, 6, 4, 10, self.calibration,
+                          out=np.zeros((6, 4, 9), np.uint32))
+        self.assertRaises(ValueError, EventBinner, 6, 4, 10, self.calibration,
+                          out=np.zeros((10, 4, 6), np.uint32).T)
+
+        binner = EventBinner(6, 4, 10, self.calibration, frame_duration=1.0)
+        self.assertRaises(ValueError, binner.add, [0], [0], [0])
+        self.assertRaises(ValueError, binner.add, [0, 1], [0], [0])
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
@@ -225,6 +225,86 @@ class TestImageRaster2D(unittest.TestCase):
         position = self.datum.get_position(-1, -1)
         self.assertEqual((6, 6), self.datum.get_index(position))
 
+    def testget_geometry(self):
+        self.assertRaises(ValueError, self.datum.get_geometry)
+
+        acq = AcquisitionRasterXY(7, 7, 2.0, 3.0)
+        acq.positions[POSITION_LOCATION_START] = SpecimenPosition(-1.0, 1.0, 0.5, 10.0)
+        self.datum.conditions.add('Acq0', acq)
+
+        geometry = self.datum.get_geometry()
+        self.assertAlmostEqual(-1.0, geometry.origin[0], 4)
+        self.assertAlmostEqual(1.0, geometry.origin[1], 4)
+        self.assertAlmostEqual(0.002 * 7 / 6, geometry.step[0], 6)
+        self.assertAlmostEqual(0.003 * 7 / 6, geometry.step[1], 6)
+        self.assertAlmostEqual(0.002, geometry.index_step[0], 6)
+        self.assertAlmostEqual(0.5, geometry.z, 4)
+        self.assertAlmostEqual(10.0, geometry.rotation, 4)
+        self.assertIsNone(geometry.tilt)
+
+        # Cached
+        self.assertIs(geometry, self.datum.get_geometry())
+
+        # Invalidated when a condition changes
+        acq.step_size_x = 4.0
+        geometry = self.datum.get_geometry()
+        self.assertAlmostEqual(0.004, geometry.index_step[0], 6)
+
+        acq.positions[POSITION_LOCATION_START] = SpecimenPosition(2.0, 1.0)
+        geometry = self.datum.get_geometry()
+        self.assertAlmostEqual(2.0, geometry.origin[0], 4)
+
+        acq.positions[POSITION_LOCATION_START].y = 5.0
+        geometry = self.datum.get_geometry()
+        self.assertAlmostEqual(5.0, geometry.origin[1], 4)
+
+    def testget_positions(self):
+        acq = AcquisitionRasterXY(7, 7)
+        acq.positions[POSITION_LOCATION_CENTER] = SpecimenPosition(0.0, 0.0, 0.0)
+        acq.positions[POSITION_LOCATION_START] = SpecimenPosition(-1.0, 1.0, 0.0)
+        self.datum.conditions.add('Acq0', acq)
+
+        xs, ys = np.meshgrid(np.arange(7), np.arange(7), indexing='ij')
+        positions = self.datum.get_positions(xs, ys)
+        self.assertEqual((7, 7, 2), positions.shape)
+
+        for x, y in [(0, 0), (3, 0), (3, 3), (6, 2)]:
+            position = self.datum.get_position(x, y)
+            self.assertAlmostEqual(position.x, positions[x, y, 0], 4)
+            self.assertAlmostEqual(position.y, positions[x, y, 1], 4)
+
+        positions = self.datum.get_positions([-1, 0], 0)
+        self.assertAlmostEqual(1.0, positions[0, 0], 4)
+        self.assertAlmostEqual(-1.0, positions[1, 0], 4)
+
+        self.assertRaises(IndexError, self.datum.get_positions, [7], [0])
+        self.assertRaises(IndexError, self.datum.get_positions, [0], [-8])
+
+    def testget_indices(self):
+        acq = AcquisitionRasterXY(7, 7)
+        acq.positions[POSITION_LOCATION_CENTER] = SpecimenPosition(0.0, 0.0, 0.0)
+        acq.positions[POSITION_LOCATION_START] = SpecimenPosition(-1.0, 1.0, 0.0)
+        self.datum.conditions.add('Acq0', acq)
+
+        xs, ys = np.meshgrid(np.arange(7), np.arange(7), indexing='ij')
+        positions = self.datum.get_positions(xs, ys)
+        # Positions within pixels, away from the boundaries
+        positions += [1.0 / 12.0, -1.0 / 12.0]
+
+        actual_xs, actual_ys = self.datum.get_indices(positions)
+        np.testing.assert_array_equal(xs, actual_xs)
+        np.testing.assert_array_equal(ys, actual_ys)
+
+        position = self.datum.get_position(3, 5)
+        self.assertEqual(self.datum.get_index(position),
+                         tuple(np.ravel(self.datum.get_indices([[position.x, position.y]]))))
+
+        actual_xs, actual_ys = self.datum.get_indices([[10.0, 0.0]])
+        self.assertEqual(-1, actual_xs[0])
+        self.assertEqual(-1, actual_ys[0])
+
+        self.assertRaises(ValueError, self.datum.get_indices, [1.0, 2.0, 3.0])
+
 class TestImageRaster2DSpectral(unittest.TestCase):
 
     def setUp(self):
@@ -0,0 +1,143 @@
+""" """
+
+# Standard library modules.
+import unittest
+import logging
+import os
+import tempfile
+import shutil
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.spec.datum.maps import window_maps
+from pyhmsa.spec.datum.imageraster import \
+    ImageRaster2D, ImageRaster2DSpectral
+from pyhmsa.spec.datum.sparse import SparseImageRaster2DSpectral
+from pyhmsa.spec.condition.region import RegionOfInterest
+from pyhmsa.spec.condition.elementalid import ElementalID, ElementalIDXray
+from pyhmsa.spec.condition.detector import DetectorSpectrometer
+from pyhmsa.spec.condition.calibration import CalibrationLinear
+
+# Globals and constants variables.
+
+class TestModule(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmpdir = tempfile.mkdtemp()
+
+        calibration = CalibrationLinear('Energy', 'eV', 10.0, 0.0)
+        detector = DetectorSpectrometer(20, calibration)
+        buffer = np.arange(9 * 7 * 20, dtype=np.uint16) % 13
+        self.datum = ImageRaster2DSpectral(9, 7, 20, np.uint16, buffer,
+                                           conditions={'Det': detector})
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def testwindow_maps(self):
+        windows = [RegionOfInterest(2, 5), RegionOfInterest(0, 19)]
+        maps = window_maps(self.datum, windows, chunk_size=64, workers=3)
+
+        self.assertEqual(2, len(maps))
+        expected = np.asarray(self.datum)[:, :, 2:6].sum(axis=2)
+        self.assertIsInstance(maps[0], ImageRaster2D)
+        self.assertEqual((9, 7), maps[0].shape)
+        self.assertEqual(np.int64, maps[0].dtype)
+        np.testing.assert_array_equal(expected, maps[0])
+        np.testing.assert_array_equal(np.asarray(self.datum).sum(axis=2),
+                                      maps[1])
+
+    def testwindow_maps_conditions(self):
+        maps = window_maps(self.datum, {'Map0': RegionOfInterest(3, 4)})
+
+        conditions = maps['Map0'].conditions
+        self.assertIn('Det', conditions)
+        self.assertEqual(3, conditions['RegionOfInterest'].start_channel)
+        self.assertEqual(4, conditions['RegionOfInterest'].end_channel)
+        self.assertNotIn('RegionOfInterest', self.datum.conditions)
+
+    def testwindow_maps_energy(self):
+        xray = ElementalIDXray(13, 'Ka', 100.0)
+        maps = window_maps(self.datum, [xray, (25.0, 61.0)], width=40.0)
+
+        expected = np.asarray(self.datum)[:, :, 8:13].sum(axis=2)
+        np.testing.assert_array_equal(expected, maps[0])
+        self.assertIs(xray, maps[0].conditions['ElementalID'])
+
+        expected = np.asarray(self.datum)[:, :, 3:7].sum(axis=2)
+        np.testing.assert_array_equal(expected, maps[1])
+
+    def testwindow_maps_float(self):
+        datum = ImageRaster2DSpectral(9, 7, 20, np.float32,
+                                      np.asarray(self.datum, np.float32))
+        maps = window_maps(datum, [RegionOfInterest(10, 30)], chunk_size=100)
+
+        self.assertEqual(np.float64, maps[0].dtype)
+        expected = np.asarray(datum)[:, :, 10:].sum(axis=2)
+        np.testing.assert_array_almost_equal(expected, maps[0])
+
+    def testwindow_maps_memmap(self):
+        filepath = os.path.join(self.tmpdir, 'cube.raw')
+        buffer = np.memmap(filepath, np.uint16, 'w+', shape=self.datum.shape)
+        buffer[:] = self.datum
+        buffer.flush()
+
+        buffer = np.memmap(filepath, np.uint16, 'r', shape=self.datum.shape)
+        datum = ImageRaster2DSpectral(9, 7, 20, np.uint16, buffer)
+        maps = window_maps(datum, [RegionOfInterest(1, 1)], chunk_size=32)
+
+        np.testing.assert_array_equal(np.asarray(self.datum)[:, :, 1], maps[0])
+        del datum, buffer
+
+    def testwindow_maps_sparse(self):
+        sparse = SparseImageRaster2DSpectral.fromdense(self.datum)
+        windows = {'Map0': RegionOfInterest(2, 5), 'Map1': (25.0, 61.0)}
+        maps = window_maps(sparse, windows)
+
+        expected = window_maps(self.datum, windows)
+        for identifier in windows:
+            self.assertEqual(np.int64, maps[identifier].dtype)
+            np.testing.assert_array_equal(expected[identifier], maps[identifier])
+            self.assertIn('Det', maps[identifier].conditions)
+
+    def testwindow_maps_sparse_overlapping(self):
+        buffer = np.asarray(self.datum, dtype=np.float32) * 0.5
+        buffer[::2, :, 7:12] = 0.0
+        datum = ImageRaster2DSpectral(9, 7, 20, np.float32, buffer,
+                                      conditions=self.datum.conditions)
+        sparse = SparseImageRaster2DSpectral.fromdense(datum)
+        windows = [RegionOfInterest(2, 9), RegionOfInterest(5, 5),
+                   RegionOfInterest(4, 15), RegionOfInterest(2, 9),
+                   RegionOfInterest(19, 19)]
+        maps = window_maps(sparse, windows)
+
+        self.assertEqual(5, len(maps))
+        for window, image in zip(windows, maps):
+            start, end = window.start_channel, window.end_channel
+            expected = buffer[:, :, start:end + 1].sum(axis=2, dtype=np.float64)
+            self.assertEqual(np.float64, image.dtype)
+            np.testing.assert_array_almost_equal(expected, image, 4)
+
+    def testwindow_maps_invalid(self):
+        image = ImageRaster2D(9, 7)
+        self.assertRaises(ValueError, window_maps, image, [])
+        self.assertRaises(ValueError, window_maps, self.datum,
+                          [(1000.0, 2000.0)])
+        self.assertRaises(ValueError, window_maps, self.datum,
+                          [ElementalIDXray(13, 'Ka')])
+        self.assertRaises(ValueError, window_maps, self.datum,
+                          [RegionOfInterest(2, 5)], workers=0)
+
+        datum = ImageRaster2DSpectral(9, 7, 20, conditions={'El': ElementalID(13)})
+        self.assertRaises(ValueError, window_maps, datum, [(10.0, 20.0)])
+
+        self.assertEqual([], window_maps(self.datum, []))
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,149 @@
+""" """
+
+# Standard library modules.
+import unittest
+import logging
+import os
+import tempfile
+import shutil
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.spec.datum.mosaic import compute_layout, mosaic
+from pyhmsa.spec.datum.imageraster import ImageRaster2D, ImageRaster2DSpectral
+from pyhmsa.spec.condition.acquisition import AcquisitionRasterXY
+from pyhmsa.spec.condition.specimenposition import SpecimenPosition
+
+# Globals and constants variables.
+from pyhmsa.spec.datum.mosaic import \
+    OVERLAP_LAST, OVERLAP_FIRST, OVERLAP_MEAN, OVERLAP_MAX
+from pyhmsa.spec.condition.acquisition import \
+    POSITION_LOCATION_START, POSITION_LOCATION_END
+
+def _create_tile(clasz, nx, ny, start, end, values, *args, **kwargs):
+    acq = AcquisitionRasterXY(nx, ny, 1e3, 1e3)
+    acq.positions[POSITION_LOCATION_START] = SpecimenPosition(*start)
+    acq.positions[POSITION_LOCATION_END] = SpecimenPosition(*end)
+    datum = clasz(nx, ny, *args, **kwargs)
+    datum[...] = values
+    datum.conditions.add('Acq0', acq)
+    return datum
+
+class TestModule(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmpdir = tempfile.mkdtemp()
+
+        # 3x4 grid of 5x5 tiles overlapping by 1 pixel
+        self.tiles = []
+        for i in range(3):
+            for j in range(4):
+                start = (4.0 * i, 4.0 * j, 1.0)
+                end = (4.0 * i + 4.0, 4.0 * j + 4.0, 1.0)
+                self.tiles.append(_create_tile(ImageRaster2D, 5, 5, start, end,
+                                               i * 4 + j + 1, dtype=np.int32))
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def testcompute_layout(self):
+        layout = compute_layout(self.tiles)
+
+        self.assertEqual((13, 17), layout.shape)
+        self.assertEqual((0.0, 0.0), layout.start)
+        self.assertEqual((12.0, 16.0), layout.end)
+        self.assertEqual(13, layout.acquisition.step_count_x)
+        self.assertAlmostEqual(1.0, layout.acquisition.positions['Start'].z, 4)
+
+        self.assertEqual((12, 4), layout.placements.shape)
+        np.testing.assert_array_equal([8, 12, 1, 1], layout.placements[-1])
+
+    def testcompute_layout_flipped(self):
+        tile = _create_tile(ImageRaster2D, 5, 5, (4.0, 4.0), (0.0, 0.0), 1.0)
+        layout = compute_layout([tile])
+
+        self.assertEqual((5, 5), layout.shape)
+        np.testing.assert_array_equal([0, 0, -1, -1], layout.placements[0])
+
+    def testmosaic_last(self):
+        datum = mosaic(self.tiles, OVERLAP_LAST, chunk_size=50, workers=3)
+
+        self.assertIsInstance(datum, ImageRaster2D)
+        self.assertEqual(np.int32, datum.dtype)
+        self.assertEqual((13, 17), datum.shape)
+        self.assertEqual(1, datum[0, 0])
+        self.assertEqual(2, datum[0, 4])
+        self.assertEqual(6, datum[4, 4])
+        self.assertEqual(12, datum[12, 16])
+        self.assertIn('Acq0', datum.conditions)
+
+        position = self.tiles[-1].get_position(0, 0)
+        self.assertEqual((8, 12), datum.get_index(position))
+
+    def testmosaic_first(self):
+        datum = mosaic(self.tiles, OVERLAP_FIRST, chunk_size=50)
+
+        self.assertEqual(1, datum[0, 4])
+        self.assertEqual(1, datum[4, 4])
+        self.assertEqual(2, datum[0, 5])
+
+    def testmosaic_mean(self):
+        tiles = [_create_tile(ImageRaster2D, 5, 5, (0.0, 0.0), (4.0, 4.0), 1.0),
+                 _create_tile(ImageRaster2D, 5, 5, (2.0, 0.0), (6.0, 4.0), 2.0),
+                 _create_tile(ImageRaster2D, 5, 5, (6.0, 6.0), (10.0, 10.0), 4.0)]
+        datum = mosaic(tiles, OVERLAP_MEAN, fill=-1, chunk_size=1)
+
+        self.assertEqual((11, 11), datum.shape)
+        self.assertAlmostEqual(1.0, datum[0, 0], 4)
+        self.assertAlmostEqual(1.5, datum[3, 2], 4)
+        self.assertAlmostEqual(2.0, datum[5, 0], 4)
+        self.assertAlmostEqual(4.0, datum[6, 6], 4)
+        self.assertAlmostEqual(4.0, datum[10, 10], 4)
+        self.assertAlmostEqual(-1.0, datum[10, 0], 4)
+
+    def testmosaic_max(self):
+        tiles = [_create_tile(ImageRaster2DSpectral, 3, 3, (0.0, 0.0), (2.0, 2.0),
+                              [5.0, 1.0], 2),
+                 _create_tile(ImageRaster2DSpectral, 3, 3, (2.0, 2.0), (0.0, 0.0),
+                              [2.0, 3.0], 2)]
+        tiles[1][0, 0] = [7.0, 8.0]
+        datum = mosaic(tiles, OVERLAP_MAX)
+
+        self.assertIsInstance(datum, ImageRaster2DSpectral)
+        self.assertEqual((3, 3, 2), datum.shape)
+        np.testing.assert_array_almost_equal([5.0, 3.0], datum[0, 0])
+        np.testing.assert_array_almost_equal([7.0, 8.0], datum[2, 2])
+
+    def testmosaic_out(self):
+        filepath = os.path.join(self.tmpdir, 'mosaic.raw')
+        out = np.memmap(filepath, np.int32, 'w+', shape=(13, 17))
+
+        datum = mosaic(self.tiles, out=out, chunk_size=1, workers=2)
+        self.assertIsInstance(datum, ImageRaster2D)
+
+        out.flush()
+        del out, datum
+
+        values = np.fromfile(filepath, np.int32).reshape(13, 17)
+        expected = np.asarray(mosaic(self.tiles))
+        np.testing.assert_array_equal(expected, values)
+
+    def testmosaic_invalid(self):
+        self.assertRaises(ValueError, mosaic, [])
+        self.assertRaises(ValueError, mosaic, self.tiles, 'abc')
+        self.assertRaises(ValueError, mosaic, self.tiles, workers=0)
+        self.assertRaises(ValueError, mosaic, self.tiles,
+                          out=np.zeros((5, 5), np.int32))
+        self.assertRaises(ValueError, mosaic, [ImageRaster2D(3, 3)])
+
+        tiles = [self.tiles[0], self.tiles[1].astype(np.float32)]
+        self.assertRaises(ValueError, mosaic, tiles)
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,66 @@
+""" """
+
+# Standard library modules.
+import unittest
+import logging
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.spec.datum.parallel import map_pixels, iter_tiles
+from pyhmsa.spec.datum.imageraster import \
+    ImageRaster2D, ImageRaster2DSpectral
+from pyhmsa.spec.condition.elementalid import ElementalID
+
+# Globals and constants variables.
+from pyhmsa.spec.datum.parallel import BACKEND_PROCESS
+
+def _total(tile):
+    return tile.sum(axis=2)
+
+class TestModule(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        buffer = np.arange(10 * 7 * 3, dtype=np.int32)
+        self.datum = ImageRaster2DSpectral(10, 7, 3, np.int32, buffer,
+                                           conditions={'El': ElementalID(13)})
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+
+    def testiter_tiles(self):
+        tiles = list(iter_tiles((10, 7, 3), (4, 4)))
+        self.assertEqual(6, len(tiles))
+        self.assertEqual((slice(8, 10), slice(4, 7)), tiles[-1])
+
+    def testmap_pixels_image(self):
+        datum = map_pixels(self.datum, _total, block=(3, 2), workers=3)
+
+        self.assertIsInstance(datum, ImageRaster2D)
+        self.assertEqual((10, 7), datum.shape)
+        np.testing.assert_array_equal(self.datum.sum(axis=2), datum)
+        self.assertEqual(1, len(datum.conditions))
+
+    def testmap_pixels_spectral(self):
+        datum = map_pixels(self.datum, lambda tile: tile * 2.0, block=(4, 4))
+
+        self.assertIsInstance(datum, ImageRaster2DSpectral)
+        self.assertEqual(np.float64, datum.dtype)
+        np.testing.assert_array_almost_equal(self.datum * 2.0, datum)
+
+    def testmap_pixels_process(self):
+        datum = map_pixels(self.datum, _total, block=(5, 5), workers=2,
+                           backend=BACKEND_PROCESS)
+        np.testing.assert_array_equal(self.datum.sum(axis=2), datum)
+
+    def testmap_pixels_invalid(self):
+        self.assertRaises(ValueError, map_pixels, self.datum, _total,
+                          backend='gpu')
+        self.assertRaises(ValueError, map_pixels, self.datum, lambda tile: tile[0, 0, 0])
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
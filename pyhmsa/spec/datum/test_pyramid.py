@@ -0,0 +1,179 @@
+""" """
+
+# Standard library modules.
+import unittest
+import logging
+import os
+import tempfile
+import shutil
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.spec.datum.pyramid import \
+    build_pyramid, add_pyramid, get_pyramid, read_pyramid_level
+from pyhmsa.spec.datum.imageraster import ImageRaster2D, ImageRaster2DSpectral
+from pyhmsa.spec.condition.acquisition import AcquisitionRasterXY
+from pyhmsa.spec.condition.elementalid import ElementalID
+from pyhmsa.spec.condition.specimenposition import SpecimenPosition
+from pyhmsa.datafile import DataFile
+from pyhmsa.fileformat.datafile import DataFileHandle
+
+# Globals and constants variables.
+from pyhmsa.spec.condition.acquisition import POSITION_LOCATION_CENTER
+
+def _block_sum(array, factor):
+    nx, ny = array.shape[:2]
+    shape = (-(-nx // factor), -(-ny // factor)) + array.shape[2:]
+    expected = np.zeros(shape, np.int64)
+    for i in range(shape[0]):
+        for j in range(shape[1]):
+            expected[i, j] = array[i * factor:(i + 1) * factor,
+                                   j * factor:(j + 1) * factor].sum(axis=(0, 1))
+    return expected
+
+class TestModule(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmpdir = tempfile.mkdtemp()
+
+        self.acq = AcquisitionRasterXY(11, 6, 1.0, 1.0)
+        buffer = (np.arange(11 * 6 * 5, dtype=np.uint16) * 31) % 17
+        self.datum = ImageRaster2DSpectral(11, 6, 5, np.uint16, buffer,
+                                           conditions={'Acq': self.acq,
+                                                       'El': ElementalID(13)})
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def testbuild_pyramid(self):
+        levels = build_pyramid(self.datum, max_spectral_pixels=6, chunk_size=70)
+        array = np.asarray(self.datum)
+
+        self.assertEqual([1, 2, 4, 8, 16], [level[0] for level in levels])
+
+        for factor, total, spectral in levels:
+            self.assertIsInstance(total, ImageRaster2D)
+            np.testing.assert_array_equal(_block_sum(array.sum(axis=2), factor),
+                                          total)
+
+            if factor < 4:
+                self.assertIsNone(spectral)
+            else:
+                self.assertIsInstance(spectral, ImageRaster2DSpectral)
+                np.testing.assert_array_equal(_block_sum(array, factor),
+                                              spectral)
+
+        _factor, _total, spectral = levels[-1]
+        self.assertEqual((1, 1, 5), spectral.shape)
+        np.testing.assert_array_equal(array.sum(axis=(0, 1)), spectral[0, 0])
+
+    def testbuild_pyramid_conditions(self):
+        levels = build_pyramid(self.datum)
+
+        _factor, total, _spectral = levels[0]
+        self.assertIs(self.acq, total.conditions['Acq'])
+
+        _factor, total, spectral = levels[2]
+        acq = total.conditions['Acq']
+        self.assertEqual(3, acq.step_count_x)
+        self.assertEqual(2, acq.step_count_y)
+        self.assertAlmostEqual(4.0, acq.step_size_x, 4)
+        self.assertIn('El', spectral.conditions)
+        self.assertEqual(11, self.acq.step_count_x)
+
+    def testbuild_pyramid_conditions_units(self):
+        acq = AcquisitionRasterXY(11, 6, (2.0, 'mm'), (3.0, 'nm'),
+                                  dwell_time=(5.0, 'ms'))
+        datum = ImageRaster2D(11, 6, conditions={'Acq': acq})
+        levels = build_pyramid(datum)
+
+        factor, total, _spectral = levels[1]
+        self.assertEqual(4, factor)
+        acq = total.conditions['Acq']
+        self.assertAlmostEqual(8.0, acq.step_size_x, 4)
+        self.assertEqual('mm', acq.step_size_x.unit)
+        self.assertAlmostEqual(12.0, acq.step_size_y, 4)
+        self.assertEqual('nm', acq.step_size_y.unit)
+        self.assertAlmostEqual(80.0, acq.dwell_time, 4)
+        self.assertEqual('ms', acq.dwell_time.unit)
+
+    def testbuild_pyramid_conditions_positions(self):
+        # Centers of the first and last blocks, the last blocks are partial
+        acq = AcquisitionRasterXY(11, 6, (1.0, 'um'), (1.0, 'um'),
+                                  position=(SpecimenPosition(0.0, 0.0),
+                                            POSITION_LOCATION_CENTER))
+        datum = ImageRaster2D(11, 6, conditions={'Acq': acq})
+        levels = build_pyramid(datum)
+
+        factor, total, _spectral = levels[1]
+        self.assertEqual(4, factor)
+        position, location = total.conditions['Acq'].get_position(True)
+        self.assertEqual(POSITION_LOCATION_CENTER, location)
+        self.assertAlmostEqual(0.00025, position.x, 8)
+        self.assertAlmostEqual(0.0005, position.y, 8)
+        self.assertAlmostEqual(0.0, acq.position.x, 8)
+
+    def testbuild_pyramid_image(self):
+        datum = ImageRaster2D(5, 4, np.float32,
+                              np.arange(20, dtype=np.float32))
+        levels = build_pyramid(datum)
+
+        self.assertEqual([2, 4, 8], [level[0] for level in levels])
+        _factor, total, spectral = levels[0]
+        self.assertIsNone(spectral)
+        self.assertEqual(np.float64, total.dtype)
+        np.testing.assert_array_almost_equal(_block_sum(np.asarray(datum), 2),
+                                             total)
+        self.assertAlmostEqual(190.0, levels[-1][1][0, 0], 4)
+
+    def testbuild_pyramid_invalid(self):
+        self.assertRaises(ValueError, build_pyramid, np.zeros((4, 4)))
+
+    def testadd_pyramid(self):
+        datafile = DataFile()
+        datafile.data['Map'] = self.datum
+
+        identifiers = add_pyramid(datafile, 'Map', max_spectral_pixels=6)
+        self.assertIn('Map_Pyramid1', identifiers)
+        self.assertIn('Map_PyramidSpectral16', identifiers)
+
+        levels = get_pyramid(datafile.header, 'Map')
+        self.assertEqual(5, len(levels))
+        self.assertEqual('Map_Pyramid4', levels[2]['total'])
+        self.assertEqual('Map_PyramidSpectral4', levels[2]['spectral'])
+        self.assertIsNone(levels[0]['spectral'])
+        self.assertEqual([], get_pyramid(datafile.header, 'Other'))
+
+        total, spectral = read_pyramid_level(datafile, 'Map', -1)
+        self.assertEqual((1, 1), total.shape)
+        self.assertEqual((1, 1, 5), spectral.shape)
+
+    def testread_pyramid_level_handle(self):
+        datafile = DataFile()
+        datafile.data['Map'] = self.datum
+        add_pyramid(datafile, 'Map', max_spectral_pixels=6)
+
+        filepath = os.path.join(self.tmpdir, 'pyramid.hmsa')
+        datafile.write(filepath)
+
+        handle = DataFileHandle(filepath)
+        self.assertEqual(5, len(get_pyramid(handle.header, 'Map')))
+
+        total, spectral = read_pyramid_level(handle, 'Map', 3)
+        np.testing.assert_array_equal(_block_sum(np.asarray(self.datum), 8),
+                                      spectral)
+        self.assertEqual(int(np.asarray(self.datum).sum()), total.sum())
+
+        total, spectral = read_pyramid_level(handle, 'Map', 0)
+        self.assertIsNone(spectral)
+
+        self.assertRaises(ValueError, read_pyramid_level, handle, 'Other', 0)
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
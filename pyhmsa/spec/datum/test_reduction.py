@@ -0,0 +1,121 @@
+""" """
+
+# Standard library modules.
+import unittest
+import logging
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.spec.datum.reduction import Reducer, compute_reductions
+from pyhmsa.spec.datum.analysis import Analysis1D, Analysis2D
+from pyhmsa.spec.datum.analysislist import \
+    AnalysisList0D, AnalysisList1D, AnalysisList2D
+from pyhmsa.spec.datum.imageraster import \
+    ImageRaster2D, ImageRaster2DSpectral, ImageRaster2DHyperimage
+from pyhmsa.spec.condition.elementalid import ElementalID
+
+# Globals and constants variables.
+from pyhmsa.spec.datum.reduction import \
+    (REDUCTION_SUM, REDUCTION_MEAN, REDUCTION_MAX, REDUCTION_MIN,
+     REDUCTION_TOTAL)
+
+_ALL_REDUCTIONS = (REDUCTION_SUM, REDUCTION_MEAN, REDUCTION_MAX,
+                   REDUCTION_MIN, REDUCTION_TOTAL)
+
+class TestReducer(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        buffer = (np.arange(9 * 7 * 5, dtype=np.int32) * 7919) % 101 - 50
+        self.datum = ImageRaster2DSpectral(9, 7, 5, np.int32, buffer,
+                                           conditions={'El': ElementalID(13)})
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+
+    def testreduce_spectral(self):
+        array = np.asarray(self.datum)
+        results = compute_reductions(self.datum, _ALL_REDUCTIONS,
+                                     chunk_size=64, max_workers=3)
+
+        self.assertEqual(set(_ALL_REDUCTIONS), set(results.keys()))
+
+        self.assertIsInstance(results[REDUCTION_SUM], Analysis1D)
+        self.assertEqual(np.int64, results[REDUCTION_SUM].dtype)
+        np.testing.assert_array_equal(array.sum(axis=(0, 1)),
+                                      results[REDUCTION_SUM])
+        np.testing.assert_array_almost_equal(array.mean(axis=(0, 1)),
+                                             results[REDUCTION_MEAN])
+        np.testing.assert_array_equal(array.max(axis=(0, 1)),
+                                      results[REDUCTION_MAX])
+        np.testing.assert_array_equal(array.min(axis=(0, 1)),
+                                      results[REDUCTION_MIN])
+
+        self.assertIsInstance(results[REDUCTION_TOTAL], ImageRaster2D)
+        np.testing.assert_array_equal(array.sum(axis=2),
+                                      results[REDUCTION_TOTAL])
+
+        for datum in results.values():
+            self.assertIn('El', datum.conditions)
+
+    def testreduce_hyperimage(self):
+        buffer = np.arange(4 * 3 * 2 * 5, dtype=np.float32)
+        datum = ImageRaster2DHyperimage(4, 3, 2, 5, np.float32, buffer)
+        array = np.asarray(datum)
+
+        results = compute_reductions(datum, (REDUCTION_MEAN, REDUCTION_TOTAL),
+                                     chunk_size=100)
+
+        self.assertIsInstance(results[REDUCTION_MEAN], Analysis2D)
+        np.testing.assert_array_almost_equal(array.mean(axis=(0, 1)),
+                                             results[REDUCTION_MEAN])
+        self.assertIsInstance(results[REDUCTION_TOTAL], ImageRaster2D)
+        np.testing.assert_array_almost_equal(array.sum(axis=(2, 3)),
+                                             results[REDUCTION_TOTAL])
+
+    def testreduce_analysislist1d(self):
+        buffer = np.arange(11 * 4, dtype=np.uint16)
+        datum = AnalysisList1D(11, 4, np.uint16, buffer)
+        array = np.asarray(datum)
+
+        results = compute_reductions(datum, (REDUCTION_MAX, REDUCTION_TOTAL),
+                                     chunk_size=20)
+
+        self.assertEqual(np.uint16, results[REDUCTION_MAX].dtype)
+        np.testing.assert_array_equal(array.max(axis=0),
+                                      results[REDUCTION_MAX])
+        self.assertIsInstance(results[REDUCTION_TOTAL], AnalysisList0D)
+        np.testing.assert_array_equal(array.sum(axis=1),
+                                      results[REDUCTION_TOTAL][:, 0])
+
+    def testreduce_analysislist2d(self):
+        buffer = np.arange(6 * 2 * 3, dtype=np.float64)
+        datum = AnalysisList2D(6, 2, 3, np.float64, buffer)
+
+        results = compute_reductions(datum, chunk_size=1)
+
+        self.assertIsInstance(results[REDUCTION_SUM], Analysis2D)
+        np.testing.assert_array_almost_equal(np.asarray(datum).sum(axis=0),
+                                             results[REDUCTION_SUM])
+
+    def testreduce_progress(self):
+        reducer = Reducer(chunk_size=64)
+        reducer.reduce(self.datum, (REDUCTION_SUM,))
+        reducer.get()
+
+        self.assertAlmostEqual(1.0, reducer.progress, 4)
+        self.assertEqual('Completed', reducer.status)
+
+    def testreduce_invalid(self):
+        reducer = Reducer()
+        self.assertRaises(ValueError, reducer.reduce, ImageRaster2D(3, 3))
+        self.assertRaises(ValueError, reducer.reduce, self.datum, ('abc',))
+        self.assertRaises(ValueError, Reducer, 0)
+        self.assertRaises(ValueError, Reducer, max_workers=0)
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
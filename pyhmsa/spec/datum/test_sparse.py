@@ -0,0 +1,149 @@
+""" """
+
+# Standard library modules.
+import unittest
+import logging
+import os
+import tempfile
+import shutil
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+from pyhmsa.spec.datum.sparse import SparseImageRaster2DSpectral
+from pyhmsa.spec.datum.imageraster import ImageRaster2D, ImageRaster2DSpectral
+from pyhmsa.spec.datum.analysis import Analysis1D
+from pyhmsa.spec.condition.elementalid import ElementalID
+from pyhmsa.datafile import DataFile
+from pyhmsa.fileformat.exporter.npy import ExporterNPY
+from pyhmsa.fileformat.sharedmemory import SharedDataFile
+
+# Globals and constants variables.
+
+class TestSparseImageRaster2DSpectral(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.tmpdir = tempfile.mkdtemp()
+
+        random = np.random.RandomState(0)
+        buffer = random.poisson(0.1, 9 * 7 * 20).astype(np.uint16)
+        self.dense = ImageRaster2DSpectral(9, 7, 20, np.uint16, buffer,
+                                           conditions={'El': ElementalID(13)})
+        self.datum = SparseImageRaster2DSpectral.fromdense(self.dense,
+                                                           chunk_size=300)
+
+    def tearDown(self):
+        unittest.TestCase.tearDown(self)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def testfromdense(self):
+        array = np.asarray(self.dense)
+
+        self.assertEqual((9, 7, 20), self.datum.shape)
+        self.assertEqual(np.uint16, self.datum.dtype)
+        self.assertEqual(np.count_nonzero(array), self.datum.nnz)
+        self.assertEqual(9 * 7 + 1, self.datum.indptr.size)
+        self.assertEqual(np.uint16, self.datum.indices.dtype)
+        self.assertIn('El', self.datum.conditions)
+
+        self.assertEqual(9, self.datum.x)
+        self.assertEqual(7, self.datum.y)
+        self.assertEqual(20, self.datum.channels)
+        self.assertEqual(20, self.datum.datum_dimensions['Channel'])
+        self.assertEqual(7, self.datum.collection_dimensions['Y'])
+
+    def testtodense(self):
+        dense = self.datum.todense(chunk_size=500)
+
+        self.assertIsInstance(dense, ImageRaster2DSpectral)
+        self.assertEqual(np.uint16, dense.dtype)
+        np.testing.assert_array_equal(self.dense, dense)
+        self.assertIn('El', dense.conditions)
+
+    def testtodense_out(self):
+        filepath = os.path.join(self.tmpdir, 'dense.raw')
+        out = np.memmap(filepath, np.uint32, 'w+', shape=(9, 7, 20))
+
+        dense = self.datum.todense(out, chunk_size=1)
+        self.assertEqual(np.uint32, dense.dtype)
+
+        out.flush()
+        del out, dense
+
+        values = np.fromfile(filepath, np.uint32).reshape(9, 7, 20)
+        np.testing.assert_array_equal(self.dense, values)
+
+    def testget_block(self):
+        block = self.datum.get_block(slice(2, 5), slice(None, None, 3))
+        np.testing.assert_array_equal(np.asarray(self.dense)[2:5, ::3], block)
+
+    def testtoanalysis(self):
+        analysis = self.datum.toanalysis(-1, 3)
+
+        self.assertIsInstance(analysis, Analysis1D)
+        np.testing.assert_array_equal(self.dense[8, 3], analysis)
+        self.assertIn('El', analysis.conditions)
+        self.assertRaises(IndexError, self.datum.toanalysis, 9, 0)
+
+    def testsum(self):
+        array = np.asarray(self.dense)
+
+        self.assertEqual(array.sum(), self.datum.sum())
+
+        spectrum = self.datum.sum(axis=(0, 1))
+        self.assertIsInstance(spectrum, Analysis1D)
+        self.assertEqual(np.int64, spectrum.dtype)
+        np.testing.assert_array_equal(array.sum(axis=(0, 1)), spectrum)
+
+        totals = self.datum.sum(axis=2)
+        self.assertIsInstance(totals, ImageRaster2D)
+        np.testing.assert_array_equal(array.sum(axis=2), totals)
+        self.assertIn('El', totals.conditions)
+
+        self.assertRaises(ValueError, self.datum.sum, 0)
+
+    def testempty(self):
+        datum = SparseImageRaster2DSpectral(3, 2, 70000, np.float32)
+
+        self.assertEqual(0, datum.nnz)
+        self.assertEqual(np.uint32, datum.indices.dtype)
+        self.assertEqual(0.0, datum.sum())
+        self.assertEqual(3 * 2 * 70000, datum.size)
+
+    def testinvalid(self):
+        self.assertRaises(ValueError, SparseImageRaster2DSpectral, 0, 2, 3)
+        self.assertRaises(ValueError, SparseImageRaster2DSpectral, 2, 2, 3,
+                          np.uint16, [0, 1, 1], [0], [1])
+        self.assertRaises(ValueError, SparseImageRaster2DSpectral, 1, 2, 3,
+                          np.uint16, [0, 2, 1], [0], [1])
+        self.assertRaises(ValueError, SparseImageRaster2DSpectral, 1, 2, 3,
+                          np.uint16, [0, 1, 1], [3], [1])
+        self.assertRaises(ValueError, SparseImageRaster2DSpectral.fromdense,
+                          ImageRaster2D(3, 3))
+
+    def testwrite_read(self):
+        datafile = DataFile()
+        datafile.data['Map'] = self.datum
+
+        filepath = os.path.join(self.tmpdir, 'sparse.hmsa')
+        datafile.write(filepath)
+
+        datafile = DataFile.read(filepath)
+        datum = datafile.data['Map']
+        self.assertIsInstance(datum, ImageRaster2DSpectral)
+        np.testing.assert_array_equal(self.dense, datum)
+        self.assertIn('El', datum.conditions)
+
+    def testdense_only(self):
+        datafile = DataFile()
+        datafile.data['Map'] = self.datum
+
+        self.assertFalse(ExporterNPY().can_export(datafile))
+        self.assertRaises(ValueError, SharedDataFile.create, datafile)
+
+if __name__ == '__main__': #pragma: no cover
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
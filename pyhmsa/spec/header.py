@@ -38,7 +38,7 @@ class Header(_BaseHeader):
                 time=None, timezone=None, checksum=None, **kwargs):
         obj = super().__new__(cls)
 
-        obj._lock = datafile._lock if datafile else threading.Lock()
+        obj._lock = threading.Lock()
 
         obj.title = title
         obj.author = author
@@ -13,6 +13,7 @@ import logging
 import os
 import tempfile
 import shutil
+import threading
 
 # Third party modules.
 
@@ -135,6 +136,64 @@ class TestDataFile(unittest.TestCase):
 
         self.assertEqual(1, len(datum.conditions))
 
+    def testiterate_modified(self):
+        for i in range(3):
+            self.datafile.data['datum%i' % i] = Analysis0D(float(i))
+
+        iterator = iter(self.datafile.data)
+        identifier = next(iterator)
+        del self.datafile.data['datum2']
+        self.datafile.data['datum3'] = Analysis0D(3.0)
+
+        self.assertEqual(['datum0', 'datum1', 'datum2'],
+                         sorted([identifier] + list(iterator)))
+        self.assertEqual(['datum0', 'datum1', 'datum3'],
+                         sorted(self.datafile.data))
+
+    def testconcurrent_iteration(self):
+        errors = []
+
+        def modify_data(prefix):
+            try:
+                for i in range(200):
+                    identifier = '%s%i' % (prefix, i)
+                    self.datafile.data[identifier] = \
+                        Analysis0D(1.0, conditions={'cond': ElementalID(13)})
+                    if i % 2:
+                        del self.datafile.data[identifier]
+            except Exception as ex:
+                errors.append(ex)
+
+        threads = [threading.Thread(target=modify_data, args=('datum%i_' % i,))
+                   for i in range(4)]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            for identifier in self.datafile.data:
+                self.assertTrue(identifier.startswith('datum'))
+            list(self.datafile.conditions.items())
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([], errors)
+        self.assertEqual(400, len(self.datafile.data))
+
+    def testconcurrent_conditions(self):
+        def add_conditions(prefix):
+            for i in range(200):
+                self.datafile.conditions['%s%i' % (prefix, i)] = ElementalID(13)
+
+        threads = [threading.Thread(target=add_conditions, args=('cond%i_' % i,))
+                   for i in range(4)]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            list(self.datafile.conditions.keys())
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(800, len(self.datafile.conditions))
+
     def testread(self):
         # Read
         testdatadir = os.path.join(os.path.dirname(__file__), 'testdata')
@@ -9,6 +9,7 @@ import inspect
 import copy
 import re
 import weakref
+import threading
 
 # Third party modules.
 
@@ -100,12 +101,20 @@ class _IdentifierDict(MutableMapping, _BaseIdentifierDict):
         super().__init__()
         self._data = {}
 
+        # Subclasses hold the lock while they modify the dictionary.
+        # Iterators are created from the current dictionary, which is then
+        # copied by the next modification instead of on each iteration.
+        self._lock = threading.Lock()
+        self._shared = False
+
     def __repr__(self):
         return '<%s(%s)>' % (self.__class__.__name__,
                              ','.join(sorted(self.keys())))
 
     def __iter__(self):
-        return iter(self._data)
+        with self._lock:
+            self._shared = True
+            return iter(self._data)
 
     def __len__(self):
         return len(self._data)
@@ -113,11 +122,18 @@ class _IdentifierDict(MutableMapping, _BaseIdentifierDict):
     def __getitem__(self, identifier):
         return self._data[identifier]
 
+    def _unshare(self):
+        if self._shared:
+            self._data = dict(self._data)
+            self._shared = False
+
     def __setitem__(self, identifier, item):
         validate_identifier(identifier)
+        self._unshare()
         self._data[identifier] = item
 
     def __delitem__(self, identifier):
+        self._unshare()
         del self._data[identifier]
 
     def copy(self):
@@ -127,6 +143,8 @@ class _IdentifierDict(MutableMapping, _BaseIdentifierDict):
             c = copy.copy(self)
         finally:
             self._data = data
+        c._lock = threading.Lock()
+        c._shared = False
         c.update(self)
         return c
 
@@ -39,12 +39,14 @@ class _MonitorableThread(threading.Thread):
         self._cancel_event.clear()
         self._result = None
 
-        logger.debug('Starting %s' % self.name)
-        super().start()
-
+        # Set before starting, otherwise the final status of a short thread
+        # could be overwritten
         self._progress = 0.0
         self._status = 'Running'
 
+        logger.debug('Starting %s' % self.name)
+        super().start()
+
     def run(self):
         self._update_status(0.0, 'Running')
         if self.is_cancelled(): return
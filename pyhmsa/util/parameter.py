@@ -147,7 +147,7 @@ class TextListAttribute(TextAttribute):
     def _prepare_value(self, values):
         if values is None:
             return None
-        return np.array(values, dtype=np.object)
+        return np.array(values, dtype=object)
 
     def _validate_value(self, values):
         if values is None:
@@ -80,13 +80,19 @@ ENTRY_POINTS = \
             'ImageRaster2D = pyhmsa.fileformat.xmlhandler.datum.imageraster:ImageRaster2DXMLHandler',
             'ImageRaster2DSpectral = pyhmsa.fileformat.xmlhandler.datum.imageraster:ImageRaster2DSpectralXMLHandler',
             'ImageRaster2DHyperimage = pyhmsa.fileformat.xmlhandler.datum.imageraster:ImageRaster2DHyperimageXMLHandler',
+            'SparseImageRaster2DSpectral = pyhmsa.fileformat.xmlhandler.datum.imageraster:SparseImageRaster2DSpectralXMLHandler',
              ],
          'pyhmsa.fileformat.importer':
             ['EMSA = pyhmsa.fileformat.importer.emsa:ImporterEMSA',
-             'RAW = pyhmsa.fileformat.importer.raw:ImporterRAW'],
+             'RAW = pyhmsa.fileformat.importer.raw:ImporterRAW',
+             'NPY = pyhmsa.fileformat.importer.npy:ImporterNPY',
+             'CHUNKED = pyhmsa.fileformat.importer.chunked:ImporterChunked',
+             'HMSA = pyhmsa.fileformat.importer.hmsa:ImporterHMSA'],
          'pyhmsa.fileformat.exporter':
             ['EMSA = pyhmsa.fileformat.exporter.emsa:ExporterEMSA',
-             'RAW = pyhmsa.fileformat.exporter.raw:ExporterRAW'],
+             'RAW = pyhmsa.fileformat.exporter.raw:ExporterRAW',
+             'NPY = pyhmsa.fileformat.exporter.npy:ExporterNPY',
+             'CHUNKED = pyhmsa.fileformat.exporter.chunked:ExporterChunked'],
         }
 
 setup(name='pyHMSA',